@@ -3,6 +3,10 @@
 -- if new container is started (hard delete -v which deletes volume or docker system prune -a --volumes with deletes containers, images networks and volumes)
 -- then this will run. then migration script populates it.
 
+-- Monotonic change version shared by all write paths. Every write to a plasmid or its
+-- samples stamps plasmids.version with a new value, so clients can sync deltas.
+CREATE SEQUENCE IF NOT EXISTS change_version_seq;
+
 -- Create plasmids table (without volume columns)
 CREATE TABLE IF NOT EXISTS plasmids (
     id SERIAL PRIMARY KEY,
@@ -11,6 +15,8 @@ CREATE TABLE IF NOT EXISTS plasmids (
     bag VARCHAR(50) NOT NULL,
     notes TEXT,
     date_added TIMESTAMP DEFAULT NOW(),
+    version BIGINT NOT NULL DEFAULT nextval('change_version_seq'),
+    created_version BIGINT NOT NULL DEFAULT nextval('change_version_seq'),
     UNIQUE(lot, sublot, bag)
 );
 
@@ -20,13 +26,55 @@ CREATE TABLE IF NOT EXISTS samples (
     plasmid_id INTEGER NOT NULL REFERENCES plasmids(id) ON DELETE CASCADE,
     volume DECIMAL(10,1) NOT NULL,
     date_created TIMESTAMP DEFAULT NOW(),
-    date_modified TIMESTAMP DEFAULT NOW()
+    date_modified TIMESTAMP DEFAULT NOW(),
+    version BIGINT NOT NULL DEFAULT nextval('change_version_seq')
+);
+
+-- Tombstones for deleted (or moved away) plasmid locations, for delta sync
+CREATE TABLE IF NOT EXISTS plasmid_tombstones (
+    id SERIAL PRIMARY KEY,
+    lot INTEGER NOT NULL,
+    sublot INTEGER NOT NULL,
+    bag VARCHAR(50) NOT NULL,
+    deleted_at TIMESTAMP DEFAULT NOW(),
+    version BIGINT NOT NULL DEFAULT nextval('change_version_seq')
 );
 
+-- Append-only ledger of sample history (checkout, checkin, volume_change, move, delete),
+-- partitioned by month. The backend creates monthly partitions as needed; the default
+-- partition catches anything outside them.
+CREATE TABLE IF NOT EXISTS sample_events (
+    id BIGSERIAL,
+    occurred_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    event_type VARCHAR(20) NOT NULL,
+    lot INTEGER NOT NULL,
+    sublot INTEGER NOT NULL,
+    bag VARCHAR(50) NOT NULL,
+    sample_index INTEGER,
+    actor VARCHAR(100),
+    volume DECIMAL(10,1),
+    previous_volume DECIMAL(10,1),
+    previous_bag VARCHAR(50),
+    PRIMARY KEY (id, occurred_at)
+) PARTITION BY RANGE (occurred_at);
+CREATE TABLE IF NOT EXISTS sample_events_default PARTITION OF sample_events DEFAULT;
+
+-- Upgrade databases created before change versions existed
+ALTER TABLE plasmids ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT nextval('change_version_seq');
+ALTER TABLE plasmids ADD COLUMN IF NOT EXISTS created_version BIGINT NOT NULL DEFAULT nextval('change_version_seq');
+ALTER TABLE samples ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT nextval('change_version_seq');
+
 -- Create indexes for performance
 CREATE INDEX IF NOT EXISTS idx_plasmids_lot_sublot ON plasmids(lot, sublot);
 CREATE INDEX IF NOT EXISTS idx_plasmids_bag ON plasmids(bag);
+-- Bag number (C25 -> 25) for bag range searches like C10-C25
+CREATE INDEX IF NOT EXISTS idx_plasmids_bag_number ON plasmids((CAST(SUBSTRING(bag FROM 2) AS INTEGER)));
 CREATE INDEX IF NOT EXISTS idx_samples_plasmid ON samples(plasmid_id);
+CREATE INDEX IF NOT EXISTS idx_plasmids_version ON plasmids(version);
+CREATE INDEX IF NOT EXISTS idx_plasmids_created_version ON plasmids(created_version);
+CREATE INDEX IF NOT EXISTS idx_tombstones_version ON plasmid_tombstones(version);
+CREATE INDEX IF NOT EXISTS idx_sample_events_plasmid ON sample_events(lot, sublot, occurred_at);
+CREATE INDEX IF NOT EXISTS idx_sample_events_actor ON sample_events(LOWER(actor), occurred_at) WHERE actor IS NOT NULL;
 
 -- Create a flag table to track if CSV migration has been completed
 CREATE TABLE IF NOT EXISTS migration_status (
@@ -0,0 +1,121 @@
+import os
+import threading
+import time
+
+
+#----------------------------
+# Admission Control
+#----------------------------
+# Requests are admitted through priority lanes, each with its own concurrency limit and
+# queue. Heavy work (full inventory loads, batch adds, imports, exports) runs in the bulk
+# lane, so however much of it arrives it can only ever hold a couple of workers and
+# database connections, and a checkout never waits behind it. A request that finds its
+# lane's queue full - or waits in it too long - is turned away with 503 and Retry-After.
+
+class LaneSaturatedError(ValueError):
+    """A lane is at its concurrency limit with a full queue; retry_after is a suggested wait in seconds"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Lane:
+    def __init__(self, name, max_concurrent, max_queued, queue_timeout, retry_after):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._condition = threading.Condition()
+        self.active = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    def acquire(self):
+        with self._condition:
+            if self.active >= self.max_concurrent:
+                if self.queued >= self.max_queued:
+                    self._reject("queue is full")
+                self.queued += 1
+                try:
+                    deadline = time.monotonic() + self.queue_timeout
+                    while self.active >= self.max_concurrent:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._reject(f"no capacity within {self.queue_timeout:g}s")
+                        self._condition.wait(remaining)
+                finally:
+                    self.queued -= 1
+            self.active += 1
+            self.admitted += 1
+
+    def release(self):
+        with self._condition:
+            self.active -= 1
+            self._condition.notify()
+
+    def stats(self):
+        with self._condition:
+            return {
+                'active': self.active,
+                'queued': self.queued,
+                'max_concurrent': self.max_concurrent,
+                'max_queued': self.max_queued,
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+            }
+
+    def _reject(self, reason):
+        self.rejected += 1
+        raise LaneSaturatedError(f"Server busy ({self.name} requests: {reason}), try again shortly", self.retry_after)
+
+
+class AdmissionController:
+    """Maps endpoints to lanes and admits requests through them
+
+    Endpoints not assigned to a lane use the default lane; exempt endpoints (long-lived
+    streams, health checks) are never queued or counted.
+    """
+
+    def __init__(self, lanes, default_lane):
+        self.lanes = {lane.name: lane for lane in lanes}
+        self.default_lane = default_lane
+        self._endpoint_lanes = {}
+        self._exempt = set()
+
+    def assign(self, lane_name, endpoints):
+        if lane_name not in self.lanes:
+            raise ValueError(f"Unknown admission lane: {lane_name}")
+        for endpoint in endpoints:
+            self._endpoint_lanes[endpoint] = lane_name
+
+    def exempt(self, endpoints):
+        self._exempt.update(endpoints)
+
+    def admit(self, endpoint):
+        """Wait for a slot in the endpoint's lane - returns the lane to release, or None if exempt"""
+        if endpoint is None or endpoint in self._exempt:
+            return None
+        lane = self.lanes[self._endpoint_lanes.get(endpoint, self.default_lane)]
+        lane.acquire()
+        return lane
+
+    def stats(self):
+        return {name: lane.stats() for name, lane in self.lanes.items()}
+
+
+# Global admission controller instance
+admission = AdmissionController([
+    Lane('interactive',
+         max_concurrent=int(os.getenv('ADMISSION_INTERACTIVE_LIMIT', '8')),
+         max_queued=int(os.getenv('ADMISSION_INTERACTIVE_QUEUE', '64')),
+         queue_timeout=float(os.getenv('ADMISSION_INTERACTIVE_TIMEOUT', '5')),
+         retry_after=1),
+    Lane('bulk',
+         max_concurrent=int(os.getenv('ADMISSION_BULK_LIMIT', '2')),
+         max_queued=int(os.getenv('ADMISSION_BULK_QUEUE', '32')),
+         queue_timeout=float(os.getenv('ADMISSION_BULK_TIMEOUT', '30')),
+         retry_after=5),
+], default_lane='interactive')
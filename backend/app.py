@@ -1,12 +1,42 @@
-from flask import Flask, request, jsonify
+import os
+import queue
+import re
+import time
+
+from flask import Flask, request, jsonify, Response, g
 from flask_cors import CORS
 from flask_httpauth import HTTPBasicAuth
 
-from plasmid_record_repository import get_all_plasmids, find_plasmids, add_plasmid_record, modify_plasmid_record, delete_plasmid_record, check_database_health, find_plasmids_by_bag, find_plasmids_by_lot
+from plasmid_record_repository import find_changes_since, find_sample_history, SAMPLE_EVENT_TYPES, DatabaseUnavailableError, QueryTimeoutError, set_query_deadline, read_from_primary, set_last_write, last_write
+from plasmid_storage import ConflictError, register_write_listener, inventory_version, PLASMID_FIELDS
+from plasmid_backends import backend
 from plasmid_records import Plasmid, PlasmidCollection
+from search_cache import search_cache
+from search_language import SearchQuery
+from suggest_index import suggest_index
+from inventory_snapshot import inventory_snapshot
+from compression import compress_response, negotiate_encoding, precompressed_payloads
+from single_flight import single_flight
+from admission_control import admission, LaneSaturatedError
+from profiling import profiler
+from traffic_capture import recorder_from_env
+from wire_format import NegotiatedJSONProvider, NegotiatedRequest, response_mimetype
+import inventory_analytics
+from inventory_io import import_inventory_file, stream_csv, stream_xlsx
+from change_feed import change_feed, format_sse
 
 app = Flask(__name__)
-CORS(app)
+# JSON or MessagePack, whichever the client accepts (see wire_format.py)
+app.json = NegotiatedJSONProvider(app)
+app.request_class = NegotiatedRequest
+CORS(app, expose_headers=['X-Last-Write'])
+
+# Drop cached searches as soon as a write touches their bags or lots
+register_write_listener(search_cache.on_write)
+# Keep typeahead suggestions current
+register_write_listener(suggest_index.on_write)
+# Requests after a write must not share a read started before it
+register_write_listener(single_flight.on_write)
 
 # HTTP Basic Auth setup
 auth = HTTPBasicAuth()
@@ -25,6 +55,134 @@ def auth_error(status):
 def require_auth():
     pass  # All routes now require HTTP Basic Auth
 
+# Traffic capture for replay_traffic.py, only installed with CAPTURE_TRAFFIC_PATH (see traffic_capture.py)
+traffic_recorder = recorder_from_env()
+if traffic_recorder is not None:
+    @app.before_request
+    def start_capture():
+        # Before admission, so queueing time and rejected requests are captured too
+        g.capture_started = time.perf_counter()
+
+    @app.after_request
+    def capture_request(response):
+        started = g.pop('capture_started', None)
+        if started is not None:
+            traffic_recorder.record(request, response.status_code, time.perf_counter() - started)
+        return response
+
+# Endpoints built on Postgres features (NOTIFY, the change version sequence, the event ledger,
+# analytics SQL) - other backends answer them with 501 rather than what looks like an outage
+POSTGRES_ONLY_ENDPOINTS = frozenset({'get_changes', 'stream_events', 'get_sample_history', 'get_bag_index',
+                                     'analytics_summary', 'analytics_bags', 'analytics_lots', 'analytics_sample_counts', 'analytics_age'})
+
+@app.before_request
+def reject_unsupported_endpoint():
+    if backend.name != 'postgres' and request.endpoint in POSTGRES_ONLY_ENDPOINTS:
+        return jsonify({"error": f"{request.path} is not supported by the {backend.name} backend"}), 501
+
+# Admission lanes (see admission_control.py) - endpoints not listed are interactive
+admission.assign('bulk', ['get_bags', 'lookup_records', 'add_record', 'move_records', 'import_records', 'export_records',
+                          'analytics_summary', 'analytics_bags', 'analytics_lots', 'analytics_sample_counts', 'analytics_age'])
+admission.exempt(['stream_events', 'health_check', 'database_health_check', 'search_cache_stats', 'admission_stats'])
+
+@app.before_request
+def admit_request():
+    # Registered after require_auth, so only authenticated requests take a slot
+    try:
+        g.admission_lane = admission.admit(request.endpoint)
+    except LaneSaturatedError as e:
+        return _server_busy(e)
+
+# Database deadline per endpoint in seconds (None: no limit), on top of REQUEST_DEADLINE_SECONDS
+# for everything else - override with e.g. ROUTE_DEADLINES="search_records=5,import_records=300"
+REQUEST_DEADLINE_SECONDS = float(os.getenv('REQUEST_DEADLINE_SECONDS', '30'))
+ROUTE_DEADLINES = {
+    'suggest': 2,
+    'checkout_sample': 5,
+    'checkin_sample': 5,
+    'search_records': 10,
+    'lookup_records': 15,
+    'add_record': 60,
+    'move_records': 60,
+    'import_records': 120,
+    'export_records': None,  # streams for as long as the download takes
+    'stream_events': None,
+}
+for _assignment in filter(None, os.getenv('ROUTE_DEADLINES', '').split(',')):
+    _endpoint, _, _seconds = _assignment.partition('=')
+    ROUTE_DEADLINES[_endpoint.strip()] = float(_seconds) if _seconds.strip() else None
+
+@app.before_request
+def apply_query_deadline():
+    # Set on every request - worker threads are reused, and this replaces the previous request's deadline
+    set_query_deadline(ROUTE_DEADLINES.get(request.endpoint, REQUEST_DEADLINE_SECONDS))
+
+# Read-after-write per client (see ReadRouter): a response to a write carries X-Last-Write, and
+# a client that sends it back keeps reading from the primary for READ_AFTER_WRITE_SECONDS after
+# its write - whichever worker process serves it. A header, not a cookie: the frontend is cross-origin.
+@app.before_request
+def restore_last_write():
+    # Set on every request - worker threads are reused, and this replaces the previous request's value
+    try:
+        g.last_write = float(request.headers.get('X-Last-Write', 0))
+    except ValueError:
+        g.last_write = 0.0
+    set_last_write(g.last_write)
+    g.last_write = last_write()
+
+@app.after_request
+def send_last_write(response):
+    # Only when this request wrote - g.last_write is unset if an earlier hook rejected the request
+    if 'last_write' in g and last_write() > g.last_write:
+        response.headers['X-Last-Write'] = repr(last_write())
+    return response
+
+# Request profiling hooks are only installed when profiling is configured (see profiling.py)
+if profiler.enabled:
+    @app.before_request
+    def start_profiling():
+        if not request.endpoint or request.endpoint.startswith('admin_'):
+            return
+        if profiler.should_profile(request.headers):
+            g.profile_session = profiler.start()
+
+    @app.after_request
+    def finish_profiling(response):
+        session = g.pop('profile_session', None)
+        if session is not None:
+            profile = profiler.finish(session, request.method, request.path, request.endpoint, response.status_code)
+            response.headers['X-Profile-Id'] = str(profile['id'])
+        return response
+
+    @app.teardown_request
+    def abort_profiling(error):
+        # after_request is skipped when a view raises - end the session anyway, or cProfile and
+        # tracemalloc would keep running on this worker for the rest of the process
+        session = g.pop('profile_session', None)
+        if session is not None:
+            profiler.finish(session, request.method, request.path, request.endpoint, 500)
+
+@app.after_request
+def release_admission_on_close(response):
+    # Streamed responses (exports) keep their slot until the last byte is sent
+    if response.is_streamed:
+        lane = g.pop('admission_lane', None)
+        if lane is not None:
+            response.call_on_close(lane.release)
+    return response
+
+@app.teardown_request
+def release_admission(error):
+    # Everything else is done once the view returns - also when it raised
+    lane = g.pop('admission_lane', None)
+    if lane is not None:
+        lane.release()
+
+@app.after_request
+def compress_api_response(response):
+    # gzip/Brotli for responses over COMPRESS_MIN_SIZE (see compression.py)
+    return compress_response(response, request.headers.get('Accept-Encoding'))
+
 @app.route('/health', methods=['GET'])
 def health_check():
     return jsonify({
@@ -35,7 +193,7 @@ def health_check():
 @app.route('/health/database', methods=['GET'])
 def database_health_check():
     try:
-        is_healthy, message = check_database_health()
+        is_healthy, message = backend.check_database_health()
 
         if is_healthy:
             return jsonify({
@@ -55,30 +213,122 @@ def database_health_check():
 
 @app.route('/api/bags', methods =['GET'])
 def get_bags():
+    """
+        Full inventory grouped by bag
+        The serialized and compressed body is stored with the inventory version, so it is
+        only rebuilt after a write rather than on every request
+        """
     try:
-        bags = get_all_plasmids().group_by_bags()
+        encoding = negotiate_encoding(request.headers.get('Accept-Encoding'))
+        mimetype = response_mimetype()
+        stored = precompressed_payloads.get(('bags', mimetype), backend.get_inventory_version(), encoding)
+        if stored is None:
+            # Concurrent cold loads (a room full of browsers opening at once) share one query
+            version, body = single_flight.do(('bags', mimetype), lambda: _build_bags_body(mimetype))
+            stored = precompressed_payloads.get(('bags', mimetype), version, encoding) or (body, None)
+
+        body, content_encoding = stored
+        response = Response(body, mimetype=mimetype)
+        response.vary.update(['Accept', 'Accept-Encoding'])
+        if content_encoding:
+            response.headers['Content-Encoding'] = content_encoding
+        return response, 200
+
+    except DatabaseUnavailableError as e:
+        return _stale_or_unavailable(e, lambda: {"data": inventory_snapshot.find().group_by_bags()})
+    except Exception as e:
+        return _route_error(e)
+
+def _build_bags_body(mimetype):
+    """Load and serialize the full inventory and store it for its version - (version, body)"""
+    plasmids = backend.get_all_plasmids()
+    # Keep the last good inventory around for outages
+    inventory_snapshot.update(plasmids)
+    body = jsonify({
+        "success": True,
+        "data": plasmids.group_by_bags()
+    }).get_data()
+
+    # Stored under the version of the rows actually loaded - a write that landed after
+    # backend.get_inventory_version() then just means a rebuild on the next request
+    version = inventory_version(plasmids)
+    precompressed_payloads.put(('bags', mimetype), version, body)
+    return version, body
+
+@app.route('/api/bags/index', methods=['GET'])
+def get_bag_index():
+    """
+        Bag directory without the records - one aggregate query, sized by the number of bags
+        Each bag: plasmid_count, sample_count, total_volume, checked_out_count, fill_level
+        Load a bag's contents with /api/bags/<bag>
+        """
+    try:
+        return _coalesced_response('bag_index', lambda: {
+            "success": True,
+            "data": inventory_analytics.volume_by_bag()
+        })
+
+    except DatabaseUnavailableError as e:
+        return _stale_or_unavailable(e, lambda: {"data": _bag_index_from_snapshot()})
+    except Exception as e:
+        return _route_error(e)
+
+def _bag_index_from_snapshot():
+    """The /api/bags/index counts, computed from the inventory snapshot (no fill level)"""
+    index = {}
+    for plasmid in inventory_snapshot.find():
+        bag = index.setdefault(plasmid.bag, {'bag': plasmid.bag, 'plasmid_count': 0, 'sample_count': 0, 'total_volume': 0.0, 'checked_out_count': 0})
+        bag['plasmid_count'] += 1
+        for sample in plasmid.samples:
+            bag['sample_count'] += 1
+            bag['total_volume'] += float(sample.volume)
+            bag['checked_out_count'] += 1 if sample.is_checked_out else 0
+    return sorted(index.values(), key=lambda bag: (len(bag['bag']), bag['bag']))
+
+@app.route('/api/bags/<bag_name>', methods=['GET'])
+def get_bag(bag_name):
+    """One bag's records, in the same {bag: [records]} shape as /api/bags"""
+    try:
+        bag_name = Plasmid.validate_bag(bag_name)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        plasmids = backend.find_plasmids_by_bag(bag_name)
+        if len(plasmids) == 0:
+            return jsonify({"error": f"Bag {bag_name} not found"}), 404
 
         return jsonify({
             "success": True,
-            "data": bags
+            "data": plasmids.group_by_bags()
         }), 200
 
+    except DatabaseUnavailableError as e:
+        return _stale_or_unavailable(e, lambda: {"data": inventory_snapshot.find(lambda p: p.bag == bag_name).group_by_bags()})
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return _route_error(e)
 
 @app.route('/api/search', methods=['POST'])
 def search_records():
     """
     Unified search function with input parsing, validation, and routing
 
-    Input patterns:
+    Input patterns (any mix, see search_language.py):
     - "5317" -> search by lot only
     - "5317, 5318, 5319" -> search by multiple lots
     - "5317-1, 5317-2" -> search by specific lot-sublot combinations
     - "5317-1, 5318, 5319-2" -> mixed: specific sublots and all sublots
     - "C25" -> search by bag
+    - "5317-1..5317-40", "5300..5399", "C10-C25" -> ranges of ids, lots or bags
+
+    Optional response shape:
+    - "view": "full" (default) summary and results, "grouped" only summary.bags,
+      "results" only results, "summary" only found and per-bag counts (summary.bag_counts)
+    - "fields": e.g. "lot,sublot,bag" (or a list) - records carry only those fields,
+      and without "samples" the samples are never read
+
+    Responses are cached on the canonical parsed query and shape (see search_cache.py)
     """
-    import re
     try:
         data = request.get_json()
         if not data or 'user_input' not in data:
@@ -86,106 +336,407 @@ def search_records():
 
         user_input = data['user_input'].strip()
 
-        # Clean up trailing dashes not followed by digits or commas
-        # e.g., "3333-" -> "3333", "111-" -> "111"
-        # but keep "3333-1" and "111-1, 222-2"
-        user_input = re.sub(r'(\d+)-(?!\d)', r'\1', user_input)
-
-        summary = {}
-
-        # Input validation and routing:
-
         #empty?
         if not user_input:
             return jsonify({"error": "Search input cannot be empty"}), 400
 
-        #bag search route - find all records for a bag
-        if re.match(r'^[Cc]\d+$', user_input):
-            # Validate bag format using Plasmid's validation
-            validated_bag = Plasmid.validate_bag(user_input)
-            results = find_plasmids_by_bag(validated_bag)
-
-        #lot search route - find all variants for lot number(s)
-        elif re.match(r'^\d+(?:[\s,;]+\d+)*$', user_input):
-            # Parse lot numbers separated by commas, semicolons, or spaces
-            lot_strings = re.split(r'[\s,;]+', user_input.strip())
-            lot_strings = [lot.strip() for lot in lot_strings if lot.strip() and lot.strip().isdigit()]
-            validated_lots = [Plasmid.validate_lot(lot) for lot in lot_strings]
-            results = find_plasmids_by_lot(validated_lots)
-        # Otherwise, handle mixed input (lot-sublot combinations and/or bare lots)
-        else:
+        try:
+            query = SearchQuery.parse(user_input)
+        except ValueError as e:
+            raise ValueError(f"Invalid search input format: {user_input}. Error: {str(e)}")
+
+        view = data.get('view', 'full')
+        if view not in SEARCH_VIEWS:
+            return jsonify({"error": f"Invalid view '{view}'. Expected one of: {', '.join(SEARCH_VIEWS)}"}), 400
+        try:
+            fields = _parse_fields(data.get('fields'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        cache_key = (query, view, fields)
+        response = search_cache.get(cache_key)
+        if response is None:
+            generation = search_cache.generation()
             try:
-                # Parse mixed input: "1234-1, 2345, 3456-2"
-                input_strings = re.split(r'[\s,;]+', user_input.strip())
-                input_strings = [s.strip() for s in input_strings if s.strip()]
-
-                specific_plasmids = []  # For lot-sublot pairs like "1234-1"
-                bare_lots = []         # For bare lots like "2345"
-
-                for input_str in input_strings:
-                    if re.match(r'^\d+-\d+$', input_str):
-                        # Specific lot-sublot pair
-                        specific_plasmids.append(input_str)
-                    elif re.match(r'^\d+$', input_str):
-                        # Bare lot - find all sublots
-                        bare_lots.append(input_str)
+                # Cached for the full TTL, so never from a replica that may still lag a write the cache was just invalidated for
+                with read_from_primary():
+                    if view == 'summary':
+                        bag_counts = backend.count_plasmids_by_search(query)
+                        records = []
+                    elif fields is None:
+                        records = [plasmid.to_dict() for plasmid in backend.find_plasmids_by_search(query)]
                     else:
-                        raise ValueError(f"Invalid format: '{input_str}'")
-
-                # Get results from both sources
-                all_results = PlasmidCollection([])
-
-                # Handle specific lot-sublot pairs
-                if specific_plasmids:
-                    specific_input = ', '.join(specific_plasmids)
-                    user_input_collection = PlasmidCollection.from_user_input(specific_input)
-                    specific_results = find_plasmids(user_input_collection)
-                    all_results.extend(specific_results)
-
-                # Handle bare lots
-                if bare_lots:
-                    validated_lots = [Plasmid.validate_lot(lot) for lot in bare_lots]
-                    lot_results = find_plasmids_by_lot(validated_lots)
-                    all_results.extend(lot_results)
-
-                results = all_results
-
-                summary = {
-                    "bags": results.group_by_bags(),
-                    "found": f"{len(results)}"
-                }
-
-            except Exception as e:
-                raise ValueError(f"Invalid search input format: {user_input}. Expected formats: '5317', '5317-1', '5317-1, 5317-2', or 'C25'. Error: {str(e)}")
-
-        # For bag/lot searches, create consistent summary format
-        if not summary:
-            summary = {
-                "bags": results.group_by_bags(),
-                "found": f"{len(results)}"
-            }
+                        records = backend.find_plasmid_fields_by_search(query, _fetched_fields(fields))
+            except QueryTimeoutError as e:
+                return _query_timeout(e)
+            except DatabaseUnavailableError as e:
+                matching = inventory_snapshot.find(lambda p: query.matches(p.lot, p.sublot, p.bag))
+                return _stale_or_unavailable(e, lambda: _snapshot_search_payload(matching, view, fields))
+
+            if view == 'summary':
+                response = {"success": True, **_search_summary_payload(bag_counts)}
+                bags = bag_counts.keys()
+            else:
+                response = {"success": True, **_search_payload(records, view, fields)}
+                bags = {record['bag'] for record in records}
+
+            # Depends on everything it found (changes, moves away) and on whatever the query would newly match
+            lots = {record['lot'] for record in records if 'lot' in record}
+            search_cache.put(cache_key, response, bags, lots, generation, matches=query.matches)
+
+        return jsonify(response), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Response shapes for /api/search
+SEARCH_VIEWS = ('full', 'grouped', 'results', 'summary')
+
+def _parse_fields(fields):
+    """Canonical tuple of requested record fields, or None for whole records"""
+    if fields is None:
+        return None
+    if isinstance(fields, str):
+        fields = fields.split(',')
+    fields = tuple(dict.fromkeys(str(field).strip() for field in fields if str(field).strip()))
+    unknown = [field for field in fields if field not in PLASMID_FIELDS]
+    if not fields or unknown:
+        raise ValueError(f"Invalid fields '{', '.join(unknown)}'. Available fields: {', '.join(PLASMID_FIELDS)}")
+    return fields
+
+def _fetched_fields(fields):
+    # The bag is always read - it groups summary.bags and keys cache invalidation
+    return fields if 'bag' in fields else fields + ('bag',)
+
+def _search_payload(records, view='full', fields=None):
+    ##Summary groups by bags and shows found count. results ungrouped
+    ##records are dicts, built once and shared by both parts
+    shown = records
+    if fields is not None and 'bag' not in fields:
+        shown = [{field: record[field] for field in fields} for record in records]
+
+    payload = {"summary": {"found": f"{len(records)}"}}
+    if view in ('full', 'grouped'):
+        bags = {}
+        for record, shown_record in zip(records, shown):
+            bags.setdefault(record['bag'], []).append(shown_record)
+        payload["summary"]["bags"] = bags
+    if view in ('full', 'results'):
+        payload["results"] = shown
+    return payload
+
+def _search_summary_payload(bag_counts):
+    return {
+        "summary": {
+            "bag_counts": bag_counts,
+            "found": f"{sum(bag_counts.values())}"
+        }
+    }
+
+def _snapshot_search_payload(plasmids, view, fields):
+    """The /api/search payload built from snapshot plasmids instead of the database"""
+    if view == 'summary':
+        bag_counts = {}
+        for plasmid in plasmids:
+            bag_counts[plasmid.bag] = bag_counts.get(plasmid.bag, 0) + 1
+        return _search_summary_payload(bag_counts)
+
+    records = [plasmid.to_dict() for plasmid in plasmids]
+    if fields is not None:
+        records = [{field: record[field] for field in _fetched_fields(fields)} for record in records]
+    return _search_payload(records, view, fields)
+
+@app.route('/api/admission', methods=['GET'])
+def admission_stats():
+    return jsonify({
+        "success": True,
+        "data": admission.stats()
+    }), 200
+
+@app.route('/api/admin/profiles', methods=['GET'])
+def admin_list_profiles():
+    """Kept request profiles, newest first - requires the X-Profile-Token admin header"""
+    if not profiler.is_admin(request.headers):
+        return jsonify({"error": "Admin token required"}), 403
+    return jsonify({
+        "success": True,
+        "data": profiler.list_profiles()
+    }), 200
+
+@app.route('/api/admin/profiles/<int:profile_id>', methods=['GET'])
+def admin_get_profile(profile_id):
+    """
+        One profile: top functions by cumulative time, top allocation sites and the pstats report
+        ?format=text returns just the pstats report as plain text
+        """
+    if not profiler.is_admin(request.headers):
+        return jsonify({"error": "Admin token required"}), 403
+
+    profile = profiler.get_profile(profile_id)
+    if profile is None:
+        return jsonify({"error": f"Profile {profile_id} not found"}), 404
+    if request.args.get('format') == 'text':
+        return Response(profile['stats_text'], mimetype='text/plain')
+    return jsonify({
+        "success": True,
+        "data": profile
+    }), 200
+
+@app.route('/api/admin/profiles', methods=['DELETE'])
+def admin_clear_profiles():
+    if not profiler.is_admin(request.headers):
+        return jsonify({"error": "Admin token required"}), 403
+    profiler.clear()
+    return jsonify({"success": True}), 200
+
+@app.route('/api/search/cache', methods=['GET'])
+def search_cache_stats():
+    return jsonify({
+        "success": True,
+        "data": search_cache.stats()
+    }), 200
+
+@app.route('/api/suggest', methods=['GET'])
+def suggest():
+    """
+        Typeahead completions for lot-sublot ids and bag names
+        Usage: /api/suggest?prefix=53&limit=10
+        """
+    try:
+        prefix = request.args.get('prefix', '')
+        limit = request.args.get('limit', '10')
+        if not limit.isdigit() or not 0 < int(limit) <= 100:
+            return jsonify({"error": "Invalid 'limit' - must be between 1 and 100"}), 400
 
-        ##Summary groups by bags and shows found count. results ungrouped
         return jsonify({
             "success": True,
-            "summary": summary,
-            "results": [plasmid.to_dict() for plasmid in results]
+            "data": suggest_index.suggest(prefix, int(limit))
         }), 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# Upper bound on ids per /api/lookup request - a full freezer scan is well under this
+MAX_LOOKUP_IDS = 50000
+
+@app.route('/api/lookup', methods=['POST'])
+def lookup_records():
+    """
+        Bulk id lookup - e.g. a scanner dump or a pasted spreadsheet column
+        Body: {"ids": ["5317-1", "5317-2", ...]} or {"ids": "5317-1, 5317-2\n5318-1"}
+        Returns found records grouped by bag, "found": "N/M", and the ids that were not found.
+        Malformed ids are reported under "invalid" instead of failing the whole lookup.
+        """
+    try:
+        data = request.get_json()
+        if not data or 'ids' not in data:
+            return jsonify({"error": "Missing 'ids' field"}), 400
+
+        parsed = _parse_plasmid_ids(data['ids'])
+        if parsed is None:
+            return jsonify({"error": "'ids' must be a list of lot-sublot ids or a string of them"}), 400
+        requested, invalid = parsed
+        seen = requested.get_lot_sublot_tuples()
+
+        if len(requested) > MAX_LOOKUP_IDS:
+            return jsonify({"error": f"Too many ids ({len(requested)}) - look up at most {MAX_LOOKUP_IDS} at a time"}), 400
+        if len(requested) == 0:
+            return jsonify({"error": "No valid lot-sublot ids provided", "invalid": invalid}), 400
+
+        def lookup_payload(found):
+            output = requested.to_dict(found)
+            if invalid:
+                output['invalid'] = invalid
+            return {"summary": output}
+
+        try:
+            # One round trip: the ids are joined against plasmids as an unnested array
+            found = backend.find_plasmids(requested)
+        except QueryTimeoutError as e:
+            return _query_timeout(e)
+        except DatabaseUnavailableError as e:
+            return _stale_or_unavailable(e, lambda: lookup_payload(inventory_snapshot.find(lambda p: (p.lot, p.sublot) in seen)))
+
+        return jsonify({"success": True, **lookup_payload(found)}), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def _parse_plasmid_ids(ids):
+    """Ids from a list or a pasted string - (PlasmidCollection of unique ids, invalid ids), or None for any other type"""
+    if isinstance(ids, str):
+        ids = re.split(r'[\s,;]+', ids)
+    if not isinstance(ids, list):
+        return None
+
+    requested, seen, invalid = PlasmidCollection([]), set(), []
+    for plasmid_id in ids:
+        plasmid_id = str(plasmid_id).strip()
+        if not plasmid_id:
+            continue
+        try:
+            plasmid = Plasmid.temp_plasmid_from_id(plasmid_id)
+        except ValueError:
+            invalid.append(plasmid_id)
+            continue
+        if (plasmid.lot, plasmid.sublot) not in seen:
+            seen.add((plasmid.lot, plasmid.sublot))
+            requested.append(plasmid)
+    return requested, invalid
+
 @app.route('/api/getCheckedOut', methods=['GET'])
 def get_checked_out_samples():
     try:
-        checked_out_samples = find_plasmids(filters={"checked_out": True})
+        def build_payload():
+            checked_out_samples = backend.find_plasmids(filters={"checked_out": True})
+            return {
+                "success": True,
+                "data": checked_out_samples.group_by_bags()
+            }
+
+        return _coalesced_response('checked_out', build_payload)
+
+    except DatabaseUnavailableError as e:
+        checked_out = lambda p: any(sample.is_checked_out for sample in p.samples)
+        return _stale_or_unavailable(e, lambda: {"data": inventory_snapshot.find(checked_out).group_by_bags()})
+    except Exception as e:
+        return _route_error(e)
+
+@app.route('/api/changes', methods=['GET'])
+def get_changes():
+    """
+        Delta sync - records inserted, updated and deleted after a change version
+        Usage: /api/changes?since=42  (since=0 returns the whole inventory as inserts)
+        Clients store the returned "version" and pass it as "since" on the next sync
+        """
+    try:
+        since = request.args.get('since')
+        if since is None or not since.isdigit():
+            return jsonify({"error": "Missing or invalid 'since' version - must be a non-negative integer"}), 400
+
+        changes = find_changes_since(int(since))
+
         return jsonify({
             "success": True,
-            "data": checked_out_samples.group_by_bags()
+            "version": changes['version'],
+            "inserted": [plasmid.to_dict() for plasmid in changes['inserted']],
+            "updated": [plasmid.to_dict() for plasmid in changes['updated']],
+            "deleted": changes['deleted']
         }), 200
 
+    except DatabaseUnavailableError as e:
+        return _database_unavailable(e)
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return _route_error(e)
+
+@app.route('/api/history', methods=['GET'])
+def get_sample_history():
+    """
+        Sample history from the event ledger, newest first
+        Usage: /api/history?id=5317-2&since=2026-07-01&until=2026-10-01&type=checkout,checkin&actor=Sam&limit=100
+        All parameters are optional; since/until are ISO dates or datetimes (until is exclusive)
+        """
+    from datetime import datetime
+    try:
+        plasmid = None
+        if request.args.get('id'):
+            plasmid = Plasmid.temp_plasmid_from_id(request.args['id'], bag=request.args.get('bag'))
+
+        since = datetime.fromisoformat(request.args['since']) if request.args.get('since') else None
+        until = datetime.fromisoformat(request.args['until']) if request.args.get('until') else None
+
+        event_types = [t.strip() for t in request.args.get('type', '').split(',') if t.strip()]
+        unknown_types = [t for t in event_types if t not in SAMPLE_EVENT_TYPES]
+        if unknown_types:
+            return jsonify({"error": f"Unknown event type(s): {', '.join(unknown_types)}. Use {', '.join(SAMPLE_EVENT_TYPES)}"}), 400
+
+        limit = request.args.get('limit', '500')
+        if not limit.isdigit() or not 0 < int(limit) <= 5000:
+            return jsonify({"error": "Invalid 'limit' - must be between 1 and 5000"}), 400
+
+        events = find_sample_history(plasmid, since, until, event_types, request.args.get('actor'), int(limit))
+
+        return jsonify({
+            "success": True,
+            "data": [{
+                **event,
+                'occurred_at': event['occurred_at'].isoformat(),
+                'volume': float(event['volume']) if event['volume'] is not None else None,
+                'previous_volume': float(event['previous_volume']) if event['previous_volume'] is not None else None,
+            } for event in events]
+        }), 200
+
+    except DatabaseUnavailableError as e:
+        return _database_unavailable(e)
+    except ValueError as e:
+        return _route_error(e, 400)
+    except Exception as e:
+        return _route_error(e)
+
+@app.route('/api/analytics/summary', methods=['GET'])
+def analytics_summary():
+    try:
+        return jsonify({
+            "success": True,
+            "data": inventory_analytics.inventory_summary()
+        }), 200
+
+    except DatabaseUnavailableError as e:
+        return _database_unavailable(e)
+    except Exception as e:
+        return _route_error(e)
+
+@app.route('/api/analytics/bags', methods=['GET'])
+def analytics_bags():
+    try:
+        return _coalesced_response('bag_index', lambda: {
+            "success": True,
+            "data": inventory_analytics.volume_by_bag()
+        })
+
+    except DatabaseUnavailableError as e:
+        return _database_unavailable(e)
+    except Exception as e:
+        return _route_error(e)
+
+@app.route('/api/analytics/lots', methods=['GET'])
+def analytics_lots():
+    try:
+        return jsonify({
+            "success": True,
+            "data": inventory_analytics.volume_by_lot()
+        }), 200
+
+    except DatabaseUnavailableError as e:
+        return _database_unavailable(e)
+    except Exception as e:
+        return _route_error(e)
+
+@app.route('/api/analytics/sample-counts', methods=['GET'])
+def analytics_sample_counts():
+    try:
+        return jsonify({
+            "success": True,
+            "data": inventory_analytics.sample_count_distribution()
+        }), 200
+
+    except DatabaseUnavailableError as e:
+        return _database_unavailable(e)
+    except Exception as e:
+        return _route_error(e)
+
+@app.route('/api/analytics/age', methods=['GET'])
+def analytics_age():
+    try:
+        return jsonify({
+            "success": True,
+            "data": inventory_analytics.stock_age()
+        }), 200
+
+    except DatabaseUnavailableError as e:
+        return _database_unavailable(e)
+    except Exception as e:
+        return _route_error(e)
 
 
 @app.route('/api/add', methods=['POST'])
@@ -217,7 +768,7 @@ def add_record():
             validated_plasmids.append(validated_plasmid)
 
         # Add all plasmids in a single transaction
-        result = add_plasmid_record(validated_plasmids)
+        result = backend.add_plasmid_record(validated_plasmids)
         
         # Create response message
         if len(validated_plasmids) == 1:
@@ -233,8 +784,103 @@ def add_record():
             "plasmids": result["plasmids"]
         }), 201
 
+    except DatabaseUnavailableError as e:
+        return _database_unavailable(e)
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return _route_error(e)
+
+@app.route('/api/import', methods=['POST'])
+def import_records():
+    """
+        Bulk import an inventory file in the CsCl_Inventory.csv layout
+        Expected: multipart/form-data with a 'file' field (.csv or .xlsx)
+        Columns: BAG ID, Lot #, Variant #, Volume(mL), Volumes(mL), Notes
+        Valid rows are loaded in chunks; invalid and duplicate rows are reported by row number.
+        """
+    try:
+        upload = request.files.get('file')
+        if upload is None:
+            return jsonify({"error": "No file uploaded. Send the inventory as multipart form field 'file'"}), 400
+
+        report = import_inventory_file(upload)
+
+        return jsonify({
+            "success": True,
+            "message": f"Imported {report['inserted_count']} of {report['rows_read']} rows",
+            **report
+        }), 200
+
+    except DatabaseUnavailableError as e:
+        return _database_unavailable(e)
+    except ValueError as e:
+        return _route_error(e, 400)
+    except Exception as e:
+        return _route_error(e)
+
+@app.route('/api/export', methods=['GET'])
+def export_records():
+    """
+        Download the inventory (or a filtered subset) in the CsCl_Inventory.csv layout
+        Query parameters:
+        - format: 'csv' (default) or 'xlsx'
+        - checked_out, has_volume: 'true' / 'false'
+        - bags: comma separated bag names, e.g. "C1,C2"
+        - time_filter: 'this_month', 'last_6_months', 'last_12_months'
+        - time_filter_type: 'added' (default) or 'modified'
+        - start_date, end_date: custom date range (ISO dates)
+        """
+    try:
+        export_format = request.args.get('format', 'csv').lower()
+        if export_format not in ('csv', 'xlsx'):
+            return jsonify({"error": "Invalid format - use 'csv' or 'xlsx'"}), 400
+
+        filters = _filters_from_args(request.args)
+        # Start the cursor now so database errors become a proper error response, not a cut-off download
+        plasmids = iter(backend.find_plasmids_lazy(filters=filters))
+
+        if export_format == 'xlsx':
+            body = stream_xlsx(plasmids)
+            mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        else:
+            body = stream_csv(plasmids)
+            mimetype = 'text/csv'
+
+        return Response(body, mimetype=mimetype, headers={
+            'Content-Disposition': f'attachment; filename=CsCl_Inventory.{export_format}'
+        })
+
+    except DatabaseUnavailableError as e:
+        return _database_unavailable(e)
+    except ValueError as e:
+        return _route_error(e, 400)
+    except Exception as e:
+        return _route_error(e)
+
+def _filters_from_args(args):
+    """Build a find_plasmids filter dict from query string arguments"""
+    filters = {}
+
+    for flag in ('checked_out', 'has_volume'):
+        if flag in args:
+            value = args[flag].lower()
+            if value not in ('true', 'false'):
+                raise ValueError(f"'{flag}' must be 'true' or 'false'")
+            filters[flag] = value == 'true'
+
+    if args.get('bags'):
+        filters['bags'] = [Plasmid.validate_bag(bag) for bag in args['bags'].split(',') if bag.strip()]
+
+    if args.get('time_filter'):
+        filters['time_filter'] = args['time_filter']
+    if args.get('time_filter_type'):
+        filters['time_filter_type'] = args['time_filter_type']
+
+    if args.get('start_date') or args.get('end_date'):
+        if not (args.get('start_date') and args.get('end_date')):
+            raise ValueError("Both 'start_date' and 'end_date' are required for a date range")
+        filters['date_range'] = (args['start_date'], args['end_date'])
+
+    return filters
 
 @app.route('/api/modify', methods=['PUT'])
 def modify_record():
@@ -256,18 +902,76 @@ def modify_record():
         if str(updated_plasmid) != str(previous_plasmid):
             return jsonify({"Cannot change lot-sublot. If the id changed, please delete old record and make a new one"}), 400
 
-        modify_plasmid_record(updated_plasmid, previous_plasmid)
+        backend.modify_plasmid_record(updated_plasmid, previous_plasmid)
 
         return jsonify({
             "success": True,
-            "message": f"Plasmid {updated_plasmid.lot}-{updated_plasmid.sublot} successfully updated"
+            "message": f"Plasmid {updated_plasmid.lot}-{updated_plasmid.sublot} successfully updated",
+            "record": updated_plasmid.to_dict()
         }), 201
 
+    except DatabaseUnavailableError as e:
+        return _database_unavailable(e)
+    except ConflictError as e:
+        return jsonify({"error": str(e), "conflict": True}), 409
     except Exception as e:
-        return jsonify({"error": str
+        return _route_error(e)
 
-        (e)}), 500
 
+@app.route('/api/move', methods=['POST'])
+def move_records():
+    """
+        Bulk move - e.g. consolidating duplicates or reorganizing a freezer
+        Body: {"target_bag": "C17", "ids": ["9999-0", ...]} moves those ids, and
+              {"target_bag": "C17", "source_bag": "C20"} moves everything in C20.
+        With both ids and source_bag, only the copies in source_bag are moved.
+        Samples move along untouched; the batch is checked as a whole and either moves
+        completely or not at all (409 if a plasmid changed while moving). Ids already in
+        target_bag are listed under "unchanged".
+        """
+    try:
+        data = request.get_json()
+        if not data or 'target_bag' not in data:
+            return jsonify({"error": "Missing 'target_bag' field"}), 400
+        if 'ids' not in data and 'source_bag' not in data:
+            return jsonify({"error": "Give 'ids' to move, or a 'source_bag' to move everything from"}), 400
+
+        try:
+            target_bag = Plasmid.validate_bag(data['target_bag'])
+            source_bag = Plasmid.validate_bag(data['source_bag']) if data.get('source_bag') else None
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        requested = None
+        if 'ids' in data:
+            parsed = _parse_plasmid_ids(data['ids'])
+            if parsed is None:
+                return jsonify({"error": "'ids' must be a list of lot-sublot ids or a string of them"}), 400
+            requested, invalid = parsed
+            if invalid:
+                return jsonify({"error": "Invalid lot-sublot ids - nothing was moved", "invalid": invalid}), 400
+            if len(requested) == 0:
+                return jsonify({"error": "No lot-sublot ids provided"}), 400
+            if len(requested) > MAX_LOOKUP_IDS:
+                return jsonify({"error": f"Too many ids ({len(requested)}) - move at most {MAX_LOOKUP_IDS} at a time"}), 400
+
+        result = backend.move_plasmids(target_bag, requested, source_bag)
+
+        return jsonify({
+            "success": True,
+            "message": f"Moved {result['moved_count']} plasmid(s) to {target_bag}",
+            **result
+        }), 200
+
+    except DatabaseUnavailableError as e:
+        return _database_unavailable(e)
+    except ConflictError as e:
+        return jsonify({"error": str(e), "conflict": True}), 409
+    except ValueError as e:
+        # The batch checks - ids not found, in several bags or already in target_bag, bag range
+        return _route_error(e, 400)
+    except Exception as e:
+        return _route_error(e)
 
 @app.route('/api/delete', methods=['DELETE'])
 def delete_record():
@@ -277,15 +981,17 @@ def delete_record():
             return jsonify({"error": "Missing 'lot', 'sublot' or 'bag' fields"}), 400
 
         validated_plasmid = Plasmid(**data)
-        delete_plasmid_record(validated_plasmid)
+        backend.delete_plasmid_record(validated_plasmid)
 
         return jsonify({
             "success": True,
             "message": f"Plasmid {data['lot']}-{data['sublot']} successfully deleted"
         }), 200
 
+    except DatabaseUnavailableError as e:
+        return _database_unavailable(e)
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return _route_error(e)
 
 @app.route('/api/checkout', methods=['POST'])
 def checkout_sample():
@@ -297,6 +1003,8 @@ def checkout_sample():
             "sample_index": 0,
             "checked_out_by": "John Doe"
         }
+        If the record's samples carry their "version", the checkout is rejected with 409
+        when that sample changed since the client loaded it.
         """
     try:
         data = request.get_json()
@@ -310,24 +1018,22 @@ def checkout_sample():
         if sample_index >= len(plasmid.samples) or sample_index < 0:
             return jsonify({"error": f"Invalid sample_index {sample_index}. Must be between 0 and {len(plasmid.samples)-1}"}), 400
 
-        #update checkout status
-        sample = plasmid.samples[sample_index]
-        if sample.is_checked_out:
-            return jsonify({"error": f"Sample at index {sample_index} is already checked out by {sample.checked_out_by}"}), 400
-
-        from datetime import datetime
-        sample.is_checked_out = True
-        sample.checked_out_by = data['checked_out_by']
-        sample.checked_out_at = datetime.now()
+        #update checkout status atomically - the database decides if the sample is still available
+        expected_version = plasmid.samples[sample_index].version
+        result = backend.checkout_sample(plasmid, sample_index, data['checked_out_by'], expected_version)
 
-        #save
-        modify_plasmid_record(plasmid)
         return jsonify({
             "success": True,
-            "message": f"Sample {sample_index} of record {plasmid.lot}-{plasmid.sublot} checked out by {data['checked_out_by']}"
+            "message": f"Sample {sample_index} of record {plasmid.lot}-{plasmid.sublot} checked out by {data['checked_out_by']}",
+            "version": result['version'],
+            "sample_version": result['sample_version']
         }), 200
+    except DatabaseUnavailableError as e:
+        return _database_unavailable(e)
+    except ConflictError as e:
+        return jsonify({"error": str(e), "conflict": True}), 409
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return _route_error(e)
 
 @app.route('/api/checkin', methods=['POST'])
 def checkin_sample():
@@ -338,6 +1044,7 @@ def checkin_sample():
             "record": { full record object },
             "sample_index": 0
         }
+        Rejected with 409 if the sample is not checked out or changed since the client loaded it.
         """
     try:
         data = request.get_json()
@@ -351,25 +1058,98 @@ def checkin_sample():
         if sample_index >= len(plasmid.samples) or sample_index < 0:
             return jsonify({"error": f"Invalid sample_index {sample_index}. Must be between 0 and {len(plasmid.samples)-1}"}), 400
 
-        #update checkin status
+        #update checkin status atomically - keeps checked_out_by and checked_out_at for history
         sample = plasmid.samples[sample_index]
-        if not sample.is_checked_out:
-            return jsonify({"error": f"Sample at index {sample_index} is not checked out"}), 400
-
-        from datetime import datetime
-        sample.is_checked_out = False
-        sample.checked_in_at = datetime.now()
-        # Keep checked_out_by and checked_out_at for history
+        result = backend.checkin_sample(plasmid, sample_index, sample.version, sample.volume)
 
-        #save
-        modify_plasmid_record(plasmid)
         return jsonify({
             "success": True,
-            "message": f"Sample {sample_index} of record {plasmid.lot}-{plasmid.sublot} checked in successfully"
+            "message": f"Sample {sample_index} of record {plasmid.lot}-{plasmid.sublot} checked in successfully",
+            "version": result['version'],
+            "sample_version": result['sample_version']
         }), 200
+    except DatabaseUnavailableError as e:
+        return _database_unavailable(e)
+    except ConflictError as e:
+        return jsonify({"error": str(e), "conflict": True}), 409
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return _route_error(e)
 
+@app.route('/api/events', methods=['GET'])
+def stream_events():
+    """
+        Server-Sent Events stream of inventory changes made by any user
+        Each event: {"kind": "added|modified|deleted", "version": 42, "records": [{"id": "5317-1", "lot", "sublot", "bag", ...}]}
+        """
+    subscriber = change_feed.subscribe()
+
+    def generate():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    change = subscriber.get(timeout=15)
+                except queue.Empty:
+                    # Comment line keeps proxies and the browser from timing out an idle stream
+                    yield ": keep-alive\n\n"
+                    continue
+                if change is None:
+                    return  # dropped by the feed for falling behind; client will reconnect
+                yield format_sse(change)
+        finally:
+            change_feed.unsubscribe(subscriber)
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+#----------------------------
+# Request Coalescing
+#----------------------------
+
+def _coalesced_response(key, build_payload):
+    """200 response whose body is built once for all concurrent identical requests (see single_flight.py)"""
+    mimetype = response_mimetype()
+    body = single_flight.do((key, mimetype), lambda: jsonify(build_payload()).get_data())
+    response = Response(body, mimetype=mimetype)
+    response.vary.add('Accept')
+    return response, 200
+
+#----------------------------
+# Database Outages
+#----------------------------
+
+def _database_unavailable(error):
+    headers = {'Retry-After': str(error.retry_after)} if error.retry_after else {}
+    return jsonify({"error": str(error)}), 503, headers
+
+def _query_timeout(error):
+    return jsonify({"error": str(error), "timeout": True}), 504
+
+def _route_error(error, status=500):
+    """Response for an error a route doesn't handle itself - query timeouts go on to query_timeout() below"""
+    if isinstance(error, QueryTimeoutError):
+        raise error
+    if isinstance(error, ConflictError):
+        # e.g. a deadlock or serialization failure - nothing was saved and a retry should succeed
+        return jsonify({"error": str(error), "conflict": True}), 409
+    return jsonify({"error": str(error)}), status
+
+def _server_busy(error):
+    return jsonify({"error": str(error), "busy": True}), 503, {'Retry-After': str(error.retry_after)}
+
+def _stale_or_unavailable(error, build_payload):
+    """While the database is down, answer a read from the last good inventory snapshot, marked stale"""
+    if not inventory_snapshot.available():
+        return _database_unavailable(error)
+    print(f"WARNING: Serving stale inventory snapshot: {error}")
+    payload = {"success": True, **build_payload(), **inventory_snapshot.stale_fields()}
+    return jsonify(payload), 200, {'Warning': '110 - "Response is Stale"'}
+
+@app.errorhandler(QueryTimeoutError)
+def query_timeout(error):
+    return _query_timeout(error)
 
 @app.errorhandler(404)
 def not_found(error):
@@ -0,0 +1,99 @@
+import json
+import queue
+import select
+import threading
+import time
+
+from plasmid_record_repository import db, CHANGE_CHANNEL
+
+
+#----------------------------
+# Live Change Feed
+#----------------------------
+
+class ChangeFeed:
+    """Fans Postgres NOTIFY messages from the write paths out to subscribed clients
+
+    A single background thread holds a dedicated LISTEN connection; every subscriber
+    (one per /api/events stream) gets its own bounded queue.
+    """
+    POLL_SECONDS = 5
+    RECONNECT_SECONDS = 3
+    SUBSCRIBER_QUEUE_SIZE = 1000
+
+    def __init__(self, channel=CHANGE_CHANNEL):
+        self.channel = channel
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def subscribe(self):
+        """Register a new subscriber and return its queue of change dicts"""
+        subscriber = queue.Queue(maxsize=self.SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.add(subscriber)
+            self._ensure_listening()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, change):
+        """Deliver a change to every subscriber, dropping subscribers that stopped reading"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(change)
+            except queue.Full:
+                print(f"WARNING: change feed subscriber is not reading - disconnecting it")
+                self.unsubscribe(subscriber)
+                # Make room for the sentinel that tells the stream it was dropped
+                try:
+                    subscriber.get_nowait()
+                except queue.Empty:
+                    pass
+                subscriber.put_nowait(None)
+
+    def _ensure_listening(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._listen_forever, name="change-feed", daemon=True)
+            self._thread.start()
+
+    def _listen_forever(self):
+        while True:
+            conn = None
+            try:
+                conn = db.open_connection()
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {self.channel}")
+                print(f"Change feed listening on '{self.channel}'")
+
+                while True:
+                    if select.select([conn], [], [], self.POLL_SECONDS) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        try:
+                            self.publish(json.loads(notify.payload))
+                        except ValueError:
+                            print(f"WARNING: ignoring malformed change notification: {notify.payload}")
+
+            except Exception as e:
+                print(f"ERROR: Change feed connection lost: {e}. Reconnecting in {self.RECONNECT_SECONDS}s")
+                time.sleep(self.RECONNECT_SECONDS)
+            finally:
+                if conn is not None and not conn.closed:
+                    conn.close()
+
+
+def format_sse(change):
+    """Format a change dict as a Server-Sent Event"""
+    return f"id: {change['version']}\nevent: {change['kind']}\ndata: {json.dumps(change)}\n\n"
+
+
+# Global change feed instance
+change_feed = ChangeFeed()
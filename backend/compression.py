@@ -0,0 +1,114 @@
+import gzip
+import os
+import threading
+
+try:
+    import brotli
+except ImportError:  # optional - without it responses are only gzip-compressed
+    brotli = None
+
+
+#----------------------------
+# Response Compression
+#----------------------------
+# API responses are compressed with Brotli or gzip, whichever the client accepts (Brotli
+# preferred), once they are larger than COMPRESS_MIN_SIZE bytes. Inventory JSON repeats
+# the same keys and timestamps on every sample and shrinks to a small fraction of its size.
+
+COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', '1024'))
+GZIP_LEVEL = int(os.getenv('GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', '5'))
+
+_COMPRESSIBLE_TYPES = ('application/json', 'application/msgpack', 'text/csv', 'text/plain', 'text/html')
+
+
+def negotiate_encoding(accept_encoding):
+    """'br', 'gzip' or None for an Accept-Encoding header value (q=0 rules an encoding out)"""
+    accepted = set()
+    for item in (accept_encoding or '').split(','):
+        coding, _, parameters = item.strip().partition(';')
+        quality = parameters.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+
+    if brotli is not None and ('br' in accepted or '*' in accepted):
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return None
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    return data
+
+def compress_response(response, accept_encoding):
+    """Compress a finished response in place if it is worth it (after_request hook)"""
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code in (204, 304)
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in _COMPRESSIBLE_TYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding(accept_encoding)
+    if encoding is None or response.content_length is None or response.content_length < COMPRESS_MIN_SIZE:
+        return response
+
+    response.set_data(compress(response.get_data(), encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+class PrecompressedPayloads:
+    """Serialized response bodies stored with the inventory version they were built from
+
+    Each encoding is compressed once per version, the first time a client asks for it,
+    so repeated loads of an unchanged inventory cost neither serialization nor compression.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._payloads = {}  # key -> (version, {encoding or None: bytes})
+
+    def get(self, key, version, encoding):
+        """(body, content encoding) for this version, or None if the stored body is out of date
+
+        The body comes back uncompressed (encoding None) when it is under COMPRESS_MIN_SIZE.
+        """
+        with self._lock:
+            stored = self._payloads.get(key)
+            if stored is None or stored[0] != version:
+                return None
+            bodies = stored[1]
+            identity = bodies[None]
+            if encoding is None or len(identity) < COMPRESS_MIN_SIZE:
+                return identity, None
+            if encoding in bodies:
+                return bodies[encoding], encoding
+
+        body = compress(identity, encoding)
+        with self._lock:
+            stored = self._payloads.get(key)
+            if stored is not None and stored[0] == version:
+                stored[1][encoding] = body
+        return body, encoding
+
+    def put(self, key, version, body):
+        with self._lock:
+            self._payloads[key] = (version, {None: body})
+
+    def clear(self):
+        with self._lock:
+            self._payloads.clear()
+
+
+# Global precompressed payload instance
+precompressed_payloads = PrecompressedPayloads()
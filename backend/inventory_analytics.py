@@ -0,0 +1,127 @@
+import os
+
+from plasmid_record_repository import execute_read
+
+
+#----------------------------
+# Inventory Analytics
+#----------------------------
+# All statistics are computed inside Postgres with aggregate queries so only the
+# summarized rows travel over the wire - never the full sample table. They run on the
+# read replica when one is configured (see ReadRouter).
+
+# Stock age buckets in days: (label, lower bound inclusive, upper bound exclusive)
+AGE_BUCKETS = [
+    ("0-30 days", 0, 30),
+    ("30-90 days", 30, 90),
+    ("90-180 days", 90, 180),
+    ("180-365 days", 180, 365),
+    ("1-2 years", 365, 730),
+    ("2+ years", 730, None),
+]
+
+
+def volume_by_bag():
+    """Volume totals, sample/plasmid counts and fill level per bag"""
+    query = """
+            SELECT p.bag,
+                   COUNT(DISTINCT p.id) as plasmid_count,
+                   COUNT(s.id) as sample_count,
+                   COALESCE(SUM(s.volume), 0)::float as total_volume,
+                   COUNT(s.id) FILTER (WHERE s.is_checked_out) as checked_out_count
+            FROM plasmids p
+                     LEFT JOIN samples s ON p.id = s.plasmid_id
+            GROUP BY p.bag
+            ORDER BY LENGTH(p.bag), p.bag
+        """
+    rows = execute_read(query)
+
+    # Fill level is relative to a configured bag capacity, or to the fullest bag if none is set
+    capacity = _bag_capacity() or max((row['plasmid_count'] for row in rows), default=0)
+    return [{**row, 'fill_level': round(row['plasmid_count'] / capacity, 3) if capacity else 0.0} for row in rows]
+
+
+def volume_by_lot():
+    """Volume totals and sublot/sample counts per lot"""
+    query = """
+            SELECT p.lot,
+                   COUNT(DISTINCT p.id) as plasmid_count,
+                   COUNT(s.id) as sample_count,
+                   COALESCE(SUM(s.volume), 0)::float as total_volume,
+                   ARRAY_AGG(DISTINCT p.bag) as bags
+            FROM plasmids p
+                     LEFT JOIN samples s ON p.id = s.plasmid_id
+            GROUP BY p.lot
+            ORDER BY p.lot
+        """
+    return execute_read(query)
+
+
+def sample_count_distribution():
+    """How many plasmids have 0, 1, 2, ... samples"""
+    query = """
+            SELECT sample_count, COUNT(*) as plasmid_count
+            FROM (SELECT p.id, COUNT(s.id) as sample_count
+                  FROM plasmids p
+                           LEFT JOIN samples s ON p.id = s.plasmid_id
+                  GROUP BY p.id) counts
+            GROUP BY sample_count
+            ORDER BY sample_count
+        """
+    return execute_read(query)
+
+
+def stock_age():
+    """Age of stock derived from sample date_created - bucket histogram plus percentiles in days"""
+    bucket_columns = []
+    for label, lower, upper in AGE_BUCKETS:
+        condition = f"age_days >= {lower}" + (f" AND age_days < {upper}" if upper is not None else "")
+        bucket_columns.append(f"COUNT(*) FILTER (WHERE {condition}) as \"{label}\"")
+
+    query = f"""
+            SELECT COUNT(*) as sample_count,
+                   COALESCE(SUM(volume), 0)::float as total_volume,
+                   MIN(age_days) as newest_days,
+                   MAX(age_days) as oldest_days,
+                   PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY age_days) as median_days,
+                   PERCENTILE_CONT(0.9) WITHIN GROUP (ORDER BY age_days) as p90_days,
+                   {", ".join(bucket_columns)}
+            FROM (SELECT s.volume,
+                         EXTRACT(EPOCH FROM (NOW() - s.date_created)) / 86400.0 as age_days
+                  FROM samples s) ages
+        """
+    row = execute_read(query)[0]
+
+    return {
+        'sample_count': row['sample_count'],
+        'total_volume': row['total_volume'],
+        'newest_days': _round_days(row['newest_days']),
+        'oldest_days': _round_days(row['oldest_days']),
+        'median_days': _round_days(row['median_days']),
+        'p90_days': _round_days(row['p90_days']),
+        'buckets': [{'label': label, 'sample_count': row[label]} for label, _, _ in AGE_BUCKETS],
+    }
+
+
+def inventory_summary():
+    """Freezer-wide totals"""
+    query = """
+            SELECT (SELECT COUNT(*) FROM plasmids) as plasmid_count,
+                   (SELECT COUNT(DISTINCT lot) FROM plasmids) as lot_count,
+                   (SELECT COUNT(DISTINCT bag) FROM plasmids) as bag_count,
+                   COUNT(s.id) as sample_count,
+                   COALESCE(SUM(s.volume), 0)::float as total_volume,
+                   COUNT(s.id) FILTER (WHERE s.is_checked_out) as checked_out_count
+            FROM samples s
+        """
+    return execute_read(query)[0]
+
+
+def _bag_capacity():
+    """Optional plasmids-per-bag capacity used for fill levels"""
+    capacity = os.getenv('BAG_CAPACITY')
+    return int(capacity) if capacity and capacity.isdigit() and int(capacity) > 0 else None
+
+
+def _round_days(days):
+    return round(float(days), 1) if days is not None else None
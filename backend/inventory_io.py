@@ -0,0 +1,241 @@
+import csv
+import io
+import tempfile
+
+from migrate_docker_samples import parse_volumes
+from plasmid_backends import backend
+from plasmid_records import Plasmid
+
+
+#----------------------------
+# Inventory File Import (CsCl_Inventory.csv layout)
+#----------------------------
+
+# Column headers of Data/CsCl_Inventory.csv
+BAG_COLUMN = "BAG ID"
+LOT_COLUMN = "Lot #"
+SUBLOT_COLUMN = "Variant #"
+VOLUME_COLUMN = "Volume(mL)"
+VOLUMES_COLUMN = "Volumes(mL)"
+NOTES_COLUMN = "Notes"
+INVENTORY_COLUMNS = [BAG_COLUMN, LOT_COLUMN, SUBLOT_COLUMN, VOLUME_COLUMN, VOLUMES_COLUMN, NOTES_COLUMN]
+
+IMPORT_CHUNK_SIZE = 500
+# Keep the error report bounded for files that are garbage from top to bottom
+MAX_REPORTED_ERRORS = 1000
+
+
+def import_inventory_file(file_storage, chunk_size=IMPORT_CHUNK_SIZE):
+    """Stream an uploaded CSV or XLSX inventory into the database in chunks
+
+    Rows are validated with parse_volumes and the Plasmid validators as they are read; each
+    chunk of valid rows is loaded with one set-based insert in its own transaction, so
+    neither the file nor the transaction ever has to hold the whole inventory.
+    Plasmids that already exist in their bag are skipped and reported.
+
+    Args:
+        file_storage: werkzeug FileStorage from request.files
+        chunk_size: number of valid rows per insert transaction
+
+    Returns:
+        dict: import report with counts and per-row errors
+    """
+    filename = (file_storage.filename or "").lower()
+    if filename.endswith('.xlsx'):
+        rows = _read_xlsx_rows(file_storage.stream)
+    elif filename.endswith('.csv') or not filename:
+        rows = _read_csv_rows(file_storage.stream)
+    else:
+        raise ValueError(f"Unsupported file type '{file_storage.filename}'. Upload a .csv or .xlsx file")
+
+    report = {'rows_read': 0, 'inserted_count': 0, 'duplicate_count': 0, 'error_count': 0, 'errors': []}
+
+    chunk = []  # (row number, Plasmid)
+    # Same bag increment rule as /api/add, counting bags accepted earlier in this file
+    max_bag_number = backend.get_max_bag_number()
+    for row_number, row in rows:
+        report['rows_read'] += 1
+        try:
+            plasmid = _plasmid_from_row(row)
+            bag_number = int(plasmid.bag[1:])
+            if max_bag_number is not None and bag_number > max_bag_number + 1:
+                raise ValueError(f"Bag number {plasmid.bag} is not allowed. Please increment bags. Most recent bag number is: C{max_bag_number}")
+            max_bag_number = max(bag_number, max_bag_number or 0)
+            chunk.append((row_number, plasmid))
+        except Exception as e:
+            _report_error(report, row_number, e)
+
+        if len(chunk) >= chunk_size:
+            _load_chunk(chunk, report)
+            chunk = []
+
+    _load_chunk(chunk, report)
+
+    if report['error_count'] > len(report['errors']):
+        report['errors_truncated'] = True
+    return report
+
+
+def _plasmid_from_row(row):
+    """Validate one inventory row the same way the migration does"""
+    samples = parse_volumes(row.get(VOLUME_COLUMN), row.get(VOLUMES_COLUMN))
+    return Plasmid(
+        lot=row.get(LOT_COLUMN),
+        sublot=row.get(SUBLOT_COLUMN),
+        bag=row.get(BAG_COLUMN),
+        samples=samples,
+        notes=row.get(NOTES_COLUMN) or ""
+    )
+
+
+def _load_chunk(chunk, report):
+    """Insert a chunk of validated rows and record duplicates"""
+    if not chunk:
+        return
+
+    # A plasmid listed twice in the same bag keeps its first row; later rows are duplicates
+    unique_rows, seen = [], set()
+    for row_number, plasmid in chunk:
+        key = (plasmid.lot, plasmid.sublot, plasmid.bag)
+        if key in seen:
+            _report_error(report, row_number, ValueError(f"Duplicate of an earlier row: {plasmid} in {plasmid.bag}"), duplicate=True)
+        else:
+            seen.add(key)
+            unique_rows.append((row_number, plasmid))
+
+    try:
+        inserted = backend.import_plasmid_records([plasmid for _, plasmid in unique_rows])
+    except Exception as e:
+        # The chunk's transaction rolled back - report every row in it rather than aborting the import
+        for row_number, _ in unique_rows:
+            _report_error(report, row_number, e)
+        return
+
+    for row_number, plasmid in unique_rows:
+        if (plasmid.lot, plasmid.sublot, plasmid.bag) in inserted:
+            report['inserted_count'] += 1
+        else:
+            _report_error(report, row_number, ValueError(f"{plasmid} already exists in {plasmid.bag}"), duplicate=True)
+
+
+def _report_error(report, row_number, error, duplicate=False):
+    if duplicate:
+        report['duplicate_count'] += 1
+    report['error_count'] += 1
+    if len(report['errors']) < MAX_REPORTED_ERRORS:
+        report['errors'].append({'row': row_number, 'error': str(error)})
+
+
+def _read_csv_rows(stream):
+    """Yield (spreadsheet row number, row dict) from a CSV upload without reading it all"""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    reader = csv.DictReader(text)
+    _check_columns(reader.fieldnames or [])
+    for row_number, row in enumerate(reader, 2):
+        if any(value and value.strip() for value in row.values() if isinstance(value, str)):
+            yield row_number, row
+
+
+def _read_xlsx_rows(stream):
+    """Yield (spreadsheet row number, row dict) from the first sheet of an XLSX upload"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("XLSX import needs the 'openpyxl' package - upload a CSV instead")
+
+    # read_only mode streams rows from the zip instead of building the whole sheet in memory
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        sheet_rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [str(cell).strip() if cell is not None else "" for cell in next(sheet_rows, [])]
+        _check_columns(header)
+        for row_number, values in enumerate(sheet_rows, 2):
+            if any(value is not None and str(value).strip() for value in values):
+                yield row_number, {column: _xlsx_cell_text(value) for column, value in zip(header, values)}
+    finally:
+        workbook.close()
+
+
+def _xlsx_cell_text(value):
+    """Render a cell like it would appear in the CSV (7 -> '7', None -> '')"""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _check_columns(columns):
+    missing = [column for column in (BAG_COLUMN, LOT_COLUMN, SUBLOT_COLUMN, VOLUME_COLUMN) if column not in columns]
+    if missing:
+        raise ValueError(f"File is missing required column(s): {', '.join(missing)}. Expected header: {', '.join(INVENTORY_COLUMNS)}")
+
+
+#----------------------------
+# Inventory File Export (CsCl_Inventory.csv layout)
+#----------------------------
+
+EXPORT_FLUSH_ROWS = 500
+EXPORT_READ_BYTES = 64 * 1024
+
+
+def inventory_row(plasmid):
+    """One plasmid as a CsCl_Inventory.csv row: first volume in Volume(mL), the rest in Volumes(mL)"""
+    volumes = [_format_volume(volume) for volume in plasmid.samples.to_list()]
+    return [
+        plasmid.bag,
+        plasmid.lot,
+        plasmid.sublot,
+        volumes[0] if volumes else "",
+        ", ".join(volumes[1:]),
+        plasmid.notes or ""
+    ]
+
+
+def stream_csv(plasmids, flush_rows=EXPORT_FLUSH_ROWS):
+    """Yield CSV text in chunks of flush_rows rows while iterating plasmids"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(INVENTORY_COLUMNS)
+
+    for count, plasmid in enumerate(plasmids, 1):
+        writer.writerow(inventory_row(plasmid))
+        if count % flush_rows == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def stream_xlsx(plasmids, read_bytes=EXPORT_READ_BYTES):
+    """Yield an XLSX workbook of plasmids in byte chunks
+
+    openpyxl's write-only mode spools rows to disk as they come, but the zip container can
+    only be finished once every row is written, so the download starts after the last row.
+    """
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise ValueError("XLSX export needs the 'openpyxl' package - export as CSV instead")
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Inventory")
+    sheet.append(INVENTORY_COLUMNS)
+    for plasmid in plasmids:
+        row = inventory_row(plasmid)
+        row[3:5] = [float(row[3]) if row[3] else None, row[4] or None]
+        sheet.append(row)
+
+    with tempfile.TemporaryFile() as output:
+        workbook.save(output)
+        output.seek(0)
+        while True:
+            data = output.read(read_bytes)
+            if not data:
+                break
+            yield data
+
+
+def _format_volume(volume):
+    return f"{volume:.1f}" if volume % 1 == 0 else str(volume)
@@ -0,0 +1,44 @@
+import threading
+from datetime import datetime
+
+from plasmid_records import PlasmidCollection
+
+
+#----------------------------
+# Last Good Inventory Snapshot
+#----------------------------
+
+class InventorySnapshot:
+    """The last full inventory read from the database, for serving reads during an outage
+
+    Refreshed every time the full inventory is loaded (/api/bags). While the database is
+    unavailable, read endpoints answer from it and mark the response as stale, so tube
+    locations can still be looked up during a restart or upgrade.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._plasmids = None
+        self._taken_at = None
+
+    def update(self, plasmid_collection):
+        with self._lock:
+            self._plasmids = list(plasmid_collection)
+            self._taken_at = datetime.now()
+
+    def available(self):
+        return self._plasmids is not None
+
+    def find(self, predicate=None):
+        """PlasmidCollection of snapshot plasmids matching predicate(plasmid), or all of them"""
+        with self._lock:
+            plasmids = self._plasmids or []
+        return PlasmidCollection([p for p in plasmids if predicate is None or predicate(p)])
+
+    def stale_fields(self):
+        """Fields added to every response served from the snapshot"""
+        return {'stale': True, 'snapshot_taken_at': self._taken_at.isoformat() if self._taken_at else None}
+
+
+# Global snapshot instance
+inventory_snapshot = InventorySnapshot()
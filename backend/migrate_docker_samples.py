@@ -28,8 +28,12 @@ def create_new_schema():
             # Drop existing tables
             cur.execute("DROP TABLE IF EXISTS samples CASCADE")
             cur.execute("DROP TABLE IF EXISTS plasmids CASCADE")
+            cur.execute("DROP TABLE IF EXISTS plasmid_tombstones CASCADE")
             
             print("📋 Creating new schema...")
+
+            # Change version sequence used for delta sync and change notifications (kept across re-migrations)
+            cur.execute("CREATE SEQUENCE IF NOT EXISTS change_version_seq")
             
             # Create plasmids table (without volume columns)
             cur.execute("""
@@ -40,6 +44,8 @@ def create_new_schema():
                     bag VARCHAR(50) NOT NULL,
                     notes TEXT,
                     date_added TIMESTAMP DEFAULT NOW(),
+                    version BIGINT NOT NULL DEFAULT nextval('change_version_seq'),
+                    created_version BIGINT NOT NULL DEFAULT nextval('change_version_seq'),
                     UNIQUE(lot, sublot, bag)
                 )
             """)
@@ -55,15 +61,53 @@ def create_new_schema():
                     is_checked_out BOOLEAN DEFAULT FALSE,
                     checked_out_by VARCHAR(100),
                     checked_out_at TIMESTAMP,
-                    checked_in_at TIMESTAMP
+                    checked_in_at TIMESTAMP,
+                    version BIGINT NOT NULL DEFAULT nextval('change_version_seq')
                 )
             """)
+
+            # Tombstones for deleted (or moved away) plasmid locations, for delta sync
+            cur.execute("""
+                CREATE TABLE plasmid_tombstones (
+                    id SERIAL PRIMARY KEY,
+                    lot INTEGER NOT NULL,
+                    sublot INTEGER NOT NULL,
+                    bag VARCHAR(50) NOT NULL,
+                    deleted_at TIMESTAMP DEFAULT NOW(),
+                    version BIGINT NOT NULL DEFAULT nextval('change_version_seq')
+                )
+            """)
+            
+            # Sample history ledger, partitioned by month - history survives re-migrations like the version sequence
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS sample_events (
+                    id BIGSERIAL,
+                    occurred_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                    event_type VARCHAR(20) NOT NULL,
+                    lot INTEGER NOT NULL,
+                    sublot INTEGER NOT NULL,
+                    bag VARCHAR(50) NOT NULL,
+                    sample_index INTEGER,
+                    actor VARCHAR(100),
+                    volume DECIMAL(10,1),
+                    previous_volume DECIMAL(10,1),
+                    previous_bag VARCHAR(50),
+                    PRIMARY KEY (id, occurred_at)
+                ) PARTITION BY RANGE (occurred_at)
+            """)
+            cur.execute("CREATE TABLE IF NOT EXISTS sample_events_default PARTITION OF sample_events DEFAULT")
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_sample_events_plasmid ON sample_events(lot, sublot, occurred_at)")
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_sample_events_actor ON sample_events(LOWER(actor), occurred_at) WHERE actor IS NOT NULL")
             
             # Create indexes for performance
             cur.execute("CREATE INDEX idx_plasmids_lot_sublot ON plasmids(lot, sublot)")
             cur.execute("CREATE INDEX idx_plasmids_bag ON plasmids(bag)")
+            cur.execute("CREATE INDEX idx_plasmids_bag_number ON plasmids((CAST(SUBSTRING(bag FROM 2) AS INTEGER)))")
             cur.execute("CREATE INDEX idx_samples_plasmid ON samples(plasmid_id)")
             cur.execute("CREATE INDEX idx_samples_checked_out ON samples(is_checked_out) WHERE is_checked_out = TRUE")
+            cur.execute("CREATE INDEX idx_plasmids_version ON plasmids(version)")
+            cur.execute("CREATE INDEX idx_plasmids_created_version ON plasmids(created_version)")
+            cur.execute("CREATE INDEX idx_tombstones_version ON plasmid_tombstones(version)")
             
             conn.commit()
             print("✅ New schema created successfully")
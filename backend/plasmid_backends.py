@@ -0,0 +1,544 @@
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime
+
+import plasmid_record_repository as repository
+from plasmid_storage import (ConflictError, PLASMID_FIELDS, SQLITE, build_filter_conditions, check_bag_numbers,
+                            format_inventory_version, notify_write_listeners, plan_move, sample_state_error)
+from plasmid_records import Plasmid, PlasmidCollection, LazyPlasmidCollection
+
+
+#----------------------------
+# Repository Backends
+#----------------------------
+# The API talks to storage through one backend object, picked with PLASMID_BACKEND:
+#   postgres (default)  the Postgres repository in plasmid_record_repository.py
+#   sqlite              an embedded SQLite file at SQLITE_PATH - no server, starts instantly,
+#                       for single-bench installs, tests and benchmarks
+# Both expose the methods of PlasmidBackend with the same arguments, return values and
+# errors as the repository functions. The change feed, change sync, sample history and
+# analytics are built on Postgres features (NOTIFY, sequences, partitions) and stay Postgres-only
+# (app.py answers them with 501 on other backends).
+
+class PlasmidBackend(ABC):
+    """Storage operations behind the inventory API - a backend missing one fails when it is created"""
+    name = None
+
+    @abstractmethod
+    def check_database_health(self): ...
+
+    @abstractmethod
+    def find_plasmids(self, plasmid_collection=None, filters=None): ...
+
+    @abstractmethod
+    def get_all_plasmids(self): ...
+
+    @abstractmethod
+    def find_plasmids_by_bag(self, bag_name, filters=None): ...
+
+    @abstractmethod
+    def find_plasmids_by_search(self, search_query, filters=None): ...
+
+    @abstractmethod
+    def find_plasmid_fields_by_search(self, search_query, fields): ...
+
+    @abstractmethod
+    def count_plasmids_by_search(self, search_query): ...
+
+    @abstractmethod
+    def find_plasmids_lazy(self, plasmid_collection=None, filters=None, itersize=1000): ...
+
+    @abstractmethod
+    def list_plasmid_locations(self): ...
+
+    @abstractmethod
+    def get_inventory_version(self): ...
+
+    @abstractmethod
+    def get_max_bag_number(self): ...
+
+    @abstractmethod
+    def add_plasmid_record(self, plasmids): ...
+
+    @abstractmethod
+    def import_plasmid_records(self, plasmids): ...
+
+    @abstractmethod
+    def modify_plasmid_record(self, updated_plasmid, previous_plasmid=None): ...
+
+    @abstractmethod
+    def move_plasmids(self, target_bag, plasmid_collection=None, source_bag=None): ...
+
+    @abstractmethod
+    def delete_plasmid_record(self, plasmid): ...
+
+    @abstractmethod
+    def checkout_sample(self, plasmid, sample_index, checked_out_by, expected_version=None): ...
+
+    @abstractmethod
+    def checkin_sample(self, plasmid, sample_index, expected_version=None, volume=None): ...
+
+class PostgresBackend(PlasmidBackend):
+    """The Postgres repository functions, unchanged"""
+    name = 'postgres'
+
+    check_database_health = staticmethod(repository.check_database_health)
+    find_plasmids = staticmethod(repository.find_plasmids)
+    get_all_plasmids = staticmethod(repository.get_all_plasmids)
+    find_plasmids_by_bag = staticmethod(repository.find_plasmids_by_bag)
+    find_plasmids_by_search = staticmethod(repository.find_plasmids_by_search)
+    find_plasmid_fields_by_search = staticmethod(repository.find_plasmid_fields_by_search)
+    count_plasmids_by_search = staticmethod(repository.count_plasmids_by_search)
+    find_plasmids_lazy = staticmethod(repository.find_plasmids_lazy)
+    get_inventory_version = staticmethod(repository.get_inventory_version)
+    get_max_bag_number = staticmethod(repository.get_max_bag_number)
+    add_plasmid_record = staticmethod(repository.add_plasmid_record)
+    import_plasmid_records = staticmethod(repository.import_plasmid_records)
+    modify_plasmid_record = staticmethod(repository.modify_plasmid_record)
+    move_plasmids = staticmethod(repository.move_plasmids)
+    delete_plasmid_record = staticmethod(repository.delete_plasmid_record)
+    checkout_sample = staticmethod(repository.checkout_sample)
+    checkin_sample = staticmethod(repository.checkin_sample)
+
+    @staticmethod
+    def list_plasmid_locations():
+        # From the primary, so a reload never misses a write this process just made
+        return repository.execute_sql("SELECT lot, sublot, bag FROM plasmids")
+
+
+#----------------------------
+# SQLite Backend
+#----------------------------
+
+_SQLITE_SCHEMA = """
+    -- Single-row counter standing in for change_version_seq
+    CREATE TABLE IF NOT EXISTS change_version (value INTEGER NOT NULL);
+
+    CREATE TABLE IF NOT EXISTS plasmids (
+        id INTEGER PRIMARY KEY,
+        lot INTEGER NOT NULL,
+        sublot INTEGER NOT NULL,
+        bag TEXT NOT NULL,
+        notes TEXT,
+        date_added TIMESTAMP,
+        version INTEGER NOT NULL,
+        UNIQUE(lot, sublot, bag)
+    );
+
+    CREATE TABLE IF NOT EXISTS samples (
+        id INTEGER PRIMARY KEY,
+        plasmid_id INTEGER NOT NULL REFERENCES plasmids(id) ON DELETE CASCADE,
+        volume REAL NOT NULL,
+        date_created TIMESTAMP,
+        date_modified TIMESTAMP,
+        is_checked_out BOOLEAN NOT NULL DEFAULT FALSE,
+        checked_out_by TEXT,
+        checked_out_at TIMESTAMP,
+        checked_in_at TIMESTAMP,
+        version INTEGER NOT NULL
+    );
+
+    -- Same indexes as the Postgres schema
+    CREATE INDEX IF NOT EXISTS idx_plasmids_lot_sublot ON plasmids(lot, sublot);
+    CREATE INDEX IF NOT EXISTS idx_plasmids_bag ON plasmids(bag);
+    CREATE INDEX IF NOT EXISTS idx_plasmids_bag_number ON plasmids(CAST(SUBSTR(bag, 2) AS INTEGER));
+    CREATE INDEX IF NOT EXISTS idx_plasmids_version ON plasmids(version);
+    CREATE INDEX IF NOT EXISTS idx_samples_plasmid ON samples(plasmid_id);
+    CREATE INDEX IF NOT EXISTS idx_samples_checked_out ON samples(plasmid_id) WHERE is_checked_out = TRUE;
+"""
+
+# One row per plasmid with its samples aggregated as JSON, like _plasmids_select() in the repository
+_SQLITE_PLASMIDS_SELECT = """
+    SELECT p.lot, p.sublot, p.bag, p.notes, p.date_added, p.version,
+           (SELECT json_group_array(json_object(
+                       'volume', s.volume,
+                       'date_created', s.date_created,
+                       'date_modified', s.date_modified,
+                       'is_checked_out', json(CASE WHEN s.is_checked_out THEN 'true' ELSE 'false' END),
+                       'checked_out_by', s.checked_out_by,
+                       'checked_out_at', s.checked_out_at,
+                       'checked_in_at', s.checked_in_at,
+                       'version', s.version))
+            FROM (SELECT * FROM samples s WHERE s.plasmid_id = p.id ORDER BY s.id) s) AS samples
+    FROM plasmids p
+"""
+
+_SQLITE_SEARCH_ORDER = "LENGTH(p.bag), p.bag, p.lot, p.sublot"
+
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(' '))
+sqlite3.register_converter('TIMESTAMP', lambda value: datetime.fromisoformat(value.decode()))
+
+
+class SQLiteBackend(PlasmidBackend):
+    """Embedded single-file backend - each thread gets its own connection, writes are serialized"""
+    name = 'sqlite'
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._connection().executescript(_SQLITE_SCHEMA)
+        with self._transaction() as conn:
+            if conn.execute("SELECT COUNT(*) FROM change_version").fetchone()[0] == 0:
+                conn.execute("INSERT INTO change_version (value) VALUES (0)")
+        print(f"SUCCESS: Using SQLite database at {path}")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, detect_types=sqlite3.PARSE_DECLTYPES, isolation_level=None, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("PRAGMA journal_mode = WAL")
+        return conn
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction - BEGIN IMMEDIATE takes the write lock up front, so conditional updates can't race"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except sqlite3.IntegrityError as e:
+            conn.execute("ROLLBACK")
+            if "unique" in str(e).lower():
+                raise ValueError("Record already exists in this bag - duplicate entry. Please add new sample to existing record.")
+            raise ValueError(f"Data constraint error: {e}")
+        except sqlite3.Error as e:
+            conn.execute("ROLLBACK")
+            print(f"ERROR: Database error: {e}")
+            raise ValueError(f"Database operation failed: {e}")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _read(self, query, params=()):
+        try:
+            return self._connection().execute(query, params).fetchall()
+        except sqlite3.Error as e:
+            print(f"ERROR: Database error: {e}")
+            raise ValueError(f"Database operation failed: {e}")
+
+    def _next_versions(self, conn, count=1):
+        """Reserve count change versions - returns the first one"""
+        last = conn.execute("UPDATE change_version SET value = value + ? RETURNING value", (count,)).fetchone()[0]
+        return last - count + 1
+
+    ### FIND ###
+
+    def check_database_health(self):
+        try:
+            self._connection().execute("SELECT 1").fetchone()
+            return True, "Database connection healthy"
+        except sqlite3.Error as e:
+            return False, f"Database connection failed: {str(e)}"
+
+    def find_plasmids(self, plasmid_collection=None, filters=None):
+        where_clause, params = self._where(plasmid_collection, filters)
+        return PlasmidCollection(self._plasmids(where_clause, params, "p.bag, p.lot, p.sublot"))
+
+    def get_all_plasmids(self):
+        return self.find_plasmids()
+
+    def find_plasmids_by_bag(self, bag_name, filters=None):
+        where_clause, params = self._where(None, filters, ["UPPER(p.bag) = UPPER(?)"], [bag_name])
+        return PlasmidCollection(self._plasmids(where_clause, params, "p.lot, p.sublot"))
+
+    def find_plasmids_by_search(self, search_query, filters=None):
+        condition, condition_params = search_query.to_sql(SQLITE)
+        where_clause, params = self._where(None, filters, [condition], condition_params)
+        return PlasmidCollection(self._plasmids(where_clause, params, _SQLITE_SEARCH_ORDER))
+
+    def find_plasmid_fields_by_search(self, search_query, fields):
+        unknown = [field for field in fields if field not in PLASMID_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(unknown)}. Available fields: {', '.join(PLASMID_FIELDS)}")
+
+        if 'samples' in fields:
+            return [{field: record[field] for field in fields}
+                    for record in (plasmid.to_dict() for plasmid in self.find_plasmids_by_search(search_query))]
+
+        condition, params = search_query.to_sql(SQLITE)
+        columns = ", ".join(f"p.{field}" for field in fields)
+        rows = self._read(f"SELECT {columns} FROM plasmids p WHERE {condition} ORDER BY {_SQLITE_SEARCH_ORDER}", params)
+        return [dict(row) for row in rows]
+
+    def count_plasmids_by_search(self, search_query):
+        condition, params = search_query.to_sql(SQLITE)
+        rows = self._read(f"""
+            SELECT p.bag, COUNT(*) AS plasmid_count
+            FROM plasmids p
+            WHERE {condition}
+            GROUP BY p.bag
+            ORDER BY LENGTH(p.bag), p.bag
+        """, params)
+        return {row['bag']: row['plasmid_count'] for row in rows}
+
+    def find_plasmids_lazy(self, plasmid_collection=None, filters=None, itersize=1000):
+        where_clause, params = self._where(plasmid_collection, filters)
+        query = _SQLITE_PLASMIDS_SELECT + (f" WHERE {where_clause}" if where_clause else "") + f" ORDER BY {_SQLITE_SEARCH_ORDER}"
+
+        def open_plasmids():
+            # Its own connection, so a long download doesn't hold this thread's
+            conn = self._connect()
+            cursor = conn.execute(query, params)
+
+            def rows():
+                try:
+                    while True:
+                        batch = cursor.fetchmany(itersize)
+                        if not batch:
+                            return
+                        for row in batch:
+                            yield _plasmid_from_row(row)
+                finally:
+                    conn.close()
+
+            return rows()
+
+        return LazyPlasmidCollection(open_plasmids)
+
+    def list_plasmid_locations(self):
+        return [dict(row) for row in self._read("SELECT lot, sublot, bag FROM plasmids")]
+
+    def get_inventory_version(self):
+        row = self._read("SELECT COUNT(*) AS plasmid_count, MAX(version) AS max_version, SUM(version) AS version_sum FROM plasmids")[0]
+        return format_inventory_version(row['plasmid_count'], row['max_version'], row['version_sum'])
+
+    def get_max_bag_number(self):
+        rows = self._read("SELECT MAX(CAST(SUBSTR(bag, 2) AS INTEGER)) AS max_num FROM plasmids WHERE UPPER(bag) GLOB 'C[0-9]*' AND SUBSTR(bag, 2) NOT GLOB '*[^0-9]*'")
+        return rows[0]['max_num'] if rows else None
+
+    def _where(self, plasmid_collection, filters, conditions=None, params=None):
+        conditions, params = list(conditions or []), list(params or [])
+        if plasmid_collection:
+            if isinstance(plasmid_collection, Plasmid):
+                plasmid_collection = PlasmidCollection([plasmid_collection])
+            conditions.append(SQLITE.id_list_condition)
+            params.extend(SQLITE.id_list_params(sorted(plasmid_collection.get_lot_sublot_tuples())))
+
+        filter_conditions, filter_params = build_filter_conditions(filters, SQLITE)
+        conditions.extend(filter_conditions)
+        params.extend(filter_params)
+        return (" AND ".join(conditions) if conditions else None), params
+
+    def _plasmids(self, where_clause, params, order_by):
+        query = _SQLITE_PLASMIDS_SELECT + (f" WHERE {where_clause}" if where_clause else "") + f" ORDER BY {order_by}"
+        return [_plasmid_from_row(row) for row in self._read(query, params)]
+
+    ### ADD ###
+
+    def add_plasmid_record(self, plasmids):
+        if not isinstance(plasmids, list):
+            plasmids = [plasmids]
+        if not plasmids:
+            raise ValueError("No plasmids provided")
+
+        check_bag_numbers([plasmid.bag for plasmid in plasmids], self.get_max_bag_number())
+        with self._transaction() as conn:
+            self._insert(conn, plasmids)
+
+        records = [{'lot': p.lot, 'sublot': p.sublot, 'bag': p.bag} for p in plasmids]
+        notify_write_listeners('added', records)
+        print(f"SUCCESS: Created {len(plasmids)} record(s) in database")
+        return {"inserted_count": len(plasmids), "plasmids": records}
+
+    def import_plasmid_records(self, plasmids):
+        if not plasmids:
+            return set()
+
+        with self._transaction() as conn:
+            inserted = self._insert(conn, plasmids, skip_duplicates=True)
+
+        if inserted:
+            notify_write_listeners('added', [{'lot': lot, 'sublot': sublot, 'bag': bag} for lot, sublot, bag in inserted])
+        print(f"SUCCESS: Imported {len(inserted)}/{len(plasmids)} record(s), {len(plasmids) - len(inserted)} already existed")
+        return inserted
+
+    def _insert(self, conn, plasmids, skip_duplicates=False):
+        """Insert plasmids and their samples - returns the (lot, sublot, bag) tuples inserted"""
+        now = datetime.now()
+        version = self._next_versions(conn, len(plasmids) + sum(len(p.samples) for p in plasmids))
+        insert = "INSERT OR IGNORE INTO plasmids" if skip_duplicates else "INSERT INTO plasmids"
+        inserted = set()
+        for plasmid in plasmids:
+            cursor = conn.execute(f"{insert} (lot, sublot, bag, notes, date_added, version) VALUES (?, ?, ?, ?, ?, ?)",
+                                  (plasmid.lot, plasmid.sublot, plasmid.bag, plasmid.notes, now, version))
+            version += 1
+            if cursor.rowcount == 0:
+                continue  # already in this bag (skip_duplicates)
+            inserted.add((plasmid.lot, plasmid.sublot, plasmid.bag))
+            for volume in plasmid.samples.to_list():
+                conn.execute("INSERT INTO samples (plasmid_id, volume, date_created, date_modified, version) VALUES (?, ?, ?, ?, ?)",
+                             (cursor.lastrowid, float(volume), now, now, version))
+                version += 1
+        return inserted
+
+    ### MODIFY ###
+
+    def modify_plasmid_record(self, updated_plasmid, previous_plasmid=None):
+        if previous_plasmid is None:
+            previous_plasmid = updated_plasmid
+        check_bag_numbers([updated_plasmid.bag], self.get_max_bag_number())
+
+        expected_version = previous_plasmid.version
+        with self._transaction() as conn:
+            version = self._next_versions(conn, 1 + len(updated_plasmid.samples))
+            updated = conn.execute("""
+                UPDATE plasmids SET bag = ?, notes = ?, version = ?
+                WHERE lot = ? AND sublot = ? AND bag = ? AND (? IS NULL OR version = ?)
+                RETURNING id
+            """, (updated_plasmid.bag, updated_plasmid.notes, version,
+                  previous_plasmid.lot, previous_plasmid.sublot, previous_plasmid.bag, expected_version, expected_version)).fetchone()
+            if updated is None:
+                exists = conn.execute("SELECT 1 FROM plasmids WHERE lot = ? AND sublot = ? AND bag = ?",
+                                      (previous_plasmid.lot, previous_plasmid.sublot, previous_plasmid.bag)).fetchone()
+                if expected_version is not None and exists:
+                    raise ConflictError(f"Plasmid {previous_plasmid.lot}-{previous_plasmid.sublot} was changed by someone else. Reload and try again.")
+                raise ValueError(f"Plasmid {previous_plasmid.lot}-{previous_plasmid.sublot} not found")
+
+            # Replace the samples with the updated copy
+            conn.execute("DELETE FROM samples WHERE plasmid_id = ?", (updated['id'],))
+            updated_plasmid.version = version
+            for sample in updated_plasmid.samples:
+                version += 1
+                conn.execute("""
+                    INSERT INTO samples (plasmid_id, volume, date_created, date_modified, is_checked_out, checked_out_by, checked_out_at, checked_in_at, version)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (updated['id'], float(sample.volume), sample.date_created, sample.date_modified, sample.is_checked_out,
+                      sample.checked_out_by, sample.checked_out_at, sample.checked_in_at, version))
+                sample.version = version
+
+        notify_write_listeners('modified', [{
+            'lot': updated_plasmid.lot,
+            'sublot': updated_plasmid.sublot,
+            'bag': updated_plasmid.bag,
+            'previous_bag': previous_plasmid.bag
+        }])
+        print(f"SUCCESS: Updated record {previous_plasmid.lot}-{previous_plasmid.sublot}")
+        return {'lot': updated_plasmid.lot, 'sublot': updated_plasmid.sublot, 'bag': updated_plasmid.bag, 'version': updated_plasmid.version}
+
+    ### MOVE ###
+
+    def move_plasmids(self, target_bag, plasmid_collection=None, source_bag=None):
+        if plasmid_collection is None and source_bag is None:
+            raise ValueError("Give the ids to move or a bag to move everything from")
+
+        if plasmid_collection is None:
+            locations = self._read("""
+                SELECT p.lot, p.sublot, p.bag FROM plasmids p
+                WHERE (p.lot, p.sublot) IN (SELECT lot, sublot FROM plasmids WHERE bag = ?)
+            """, (source_bag,))
+            requested = None
+        else:
+            lots, sublots = plasmid_collection.get_lots_sublots()
+            requested = list(zip(lots, sublots))
+            locations = self._read(f"SELECT p.lot, p.sublot, p.bag FROM plasmids p WHERE {SQLITE.id_list_condition}", SQLITE.id_list_params(requested))
+
+        check_bag_numbers([target_bag], self.get_max_bag_number())
+        moves, unchanged = plan_move(locations, target_bag, requested, source_bag)
+        if not moves:
+            return {'moved_count': 0, 'plasmids': [], 'unchanged': unchanged}
+
+        # One UPDATE joined against the planned moves; row i of the plan gets version first + i
+        previous_bags = {(move['lot'], move['sublot']): move['previous_bag'] for move in moves}
+        with self._transaction() as conn:
+            first_version = self._next_versions(conn, len(moves))
+            rows = conn.execute("""
+                UPDATE plasmids SET bag = ?, version = ? + m.key
+                FROM json_each(?) AS m
+                WHERE plasmids.lot = json_extract(m.value, '$[0]') AND plasmids.sublot = json_extract(m.value, '$[1]')
+                  AND plasmids.bag = json_extract(m.value, '$[2]')
+                RETURNING lot, sublot, bag, version
+            """, (target_bag, first_version, json.dumps([[move['lot'], move['sublot'], move['previous_bag']] for move in moves]))).fetchall()
+            if len(rows) != len(moves):
+                raise ConflictError("Some of these plasmids were changed by someone else while moving - nothing was moved. Reload and try again.")
+
+        moved = sorted(({**dict(row), 'previous_bag': previous_bags[(row['lot'], row['sublot'])]} for row in rows), key=lambda row: row['version'])
+        notify_write_listeners('modified', [{key: row[key] for key in ('lot', 'sublot', 'bag', 'previous_bag')} for row in moved])
+        print(f"SUCCESS: Moved {len(moved)} record(s) to {target_bag}")
+        return {'moved_count': len(moved), 'plasmids': moved, 'unchanged': unchanged}
+
+    ### DELETE ###
+
+    def delete_plasmid_record(self, plasmid):
+        with self._transaction() as conn:
+            deleted = conn.execute("DELETE FROM plasmids WHERE lot = ? AND sublot = ? AND bag = ? RETURNING id",
+                                   (plasmid.lot, plasmid.sublot, plasmid.bag)).fetchone()
+            if deleted is None:
+                raise ValueError(f"Plasmid {plasmid.lot}-{plasmid.sublot} not found in database")
+
+        notify_write_listeners('deleted', [{'lot': plasmid.lot, 'sublot': plasmid.sublot, 'bag': plasmid.bag}])
+        print(f"SUCCESS: Deleted record {plasmid.lot}-{plasmid.sublot} from database")
+        return {'lot': plasmid.lot, 'sublot': plasmid.sublot}
+
+    ### CHECKOUT / CHECKIN ###
+
+    def checkout_sample(self, plasmid, sample_index, checked_out_by, expected_version=None):
+        return self._change_sample_state(plasmid, sample_index, expected_version, want_checked_out=True,
+                                         assignments="is_checked_out = TRUE, checked_out_by = :checked_out_by, checked_out_at = :now",
+                                         params={'checked_out_by': checked_out_by})
+
+    def checkin_sample(self, plasmid, sample_index, expected_version=None, volume=None):
+        assignments = """is_checked_out = FALSE, checked_in_at = :now,
+                         volume = COALESCE(:volume, volume),
+                         date_modified = CASE WHEN :volume <> volume THEN :now ELSE date_modified END"""
+        return self._change_sample_state(plasmid, sample_index, expected_version, want_checked_out=False,
+                                         assignments=assignments, params={'volume': float(volume) if volume is not None else None})
+
+    def _change_sample_state(self, plasmid, sample_index, expected_version, want_checked_out, assignments, params):
+        with self._transaction() as conn:
+            target = conn.execute("""
+                SELECT s.id, s.is_checked_out, s.checked_out_by, s.version
+                FROM samples s
+                         JOIN plasmids p ON p.id = s.plasmid_id
+                WHERE p.lot = ? AND p.sublot = ? AND p.bag = ?
+                ORDER BY s.id
+                LIMIT 1 OFFSET ?
+            """, (plasmid.lot, plasmid.sublot, plasmid.bag, sample_index)).fetchone()
+
+            changed = None
+            if target is not None:
+                version = self._next_versions(conn, 2)
+                changed = conn.execute(f"""
+                    UPDATE samples SET {assignments}, version = :version
+                    WHERE id = :id AND is_checked_out = :checked_out AND (:expected IS NULL OR version = :expected)
+                    RETURNING plasmid_id
+                """, {**params, 'now': datetime.now(), 'version': version, 'id': target['id'],
+                      'checked_out': not want_checked_out, 'expected': expected_version}).fetchone()
+            if changed is None:
+                # Nothing was updated - find out why so the client gets a useful answer
+                raise sample_state_error(plasmid, sample_index, target, expected_version, want_checked_out)
+            conn.execute("UPDATE plasmids SET version = ? WHERE id = ?", (version + 1, changed['plasmid_id']))
+
+        notify_write_listeners('modified', [{'lot': plasmid.lot, 'sublot': plasmid.sublot, 'bag': plasmid.bag, 'sample_index': sample_index}])
+        print(f"SUCCESS: Sample {sample_index} of {plasmid.lot}-{plasmid.sublot} {'checked out' if want_checked_out else 'checked in'}")
+        return {'lot': plasmid.lot, 'sublot': plasmid.sublot, 'bag': plasmid.bag,
+                'sample_version': version, 'version': version + 1}
+
+
+def _plasmid_from_row(row):
+    record = dict(row)
+    record['samples'] = json.loads(record['samples']) if record['samples'] else []
+    return Plasmid(**record)
+
+
+def backend_from_env():
+    backend_name = os.getenv('PLASMID_BACKEND', 'postgres').lower()
+    if backend_name == 'sqlite':
+        return SQLiteBackend(os.getenv('SQLITE_PATH', 'plasmids.db'))
+    if backend_name == 'postgres':
+        return PostgresBackend()
+    raise ValueError(f"Unknown PLASMID_BACKEND '{backend_name}' - expected 'postgres' or 'sqlite'")
+
+
+# Global backend instance
+backend = backend_from_env()
@@ -1,7 +1,16 @@
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
 import psycopg2
 from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
 
-from plasmid_records import Plasmid, PlasmidCollection
+from plasmid_records import Plasmid, PlasmidCollection, LazyPlasmidCollection
+from plasmid_storage import (ConflictError, PLASMID_FIELDS, POSTGRES, build_filter_conditions, check_bag_numbers,
+                            format_inventory_version, notify_write_listeners, plan_move, sample_state_error)
 
 
 # TODO: think about adding plasmids, letting user decide bag, or auto doing it, or both.
@@ -11,39 +20,217 @@ from plasmid_records import Plasmid, PlasmidCollection
 # Database Connection Layer
 #----------------------------
 
+class DatabaseUnavailableError(ValueError):
+    """The database cannot be reached (or the circuit breaker is open) - retry after retry_after seconds"""
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class DatabaseError(Exception):
+    """A query failed on the server side - not the client's fault, so not a ValueError (routes answer 500)"""
+
+
+class CircuitBreaker:
+    """Fails fast while the database is down instead of letting every request wait on it
+
+    After failure_threshold consecutive connection failures the circuit opens and calls
+    raise DatabaseUnavailableError immediately. Once the open period is over a single
+    trial call goes through: success closes the circuit, failure reopens it for twice as
+    long (exponential backoff up to max_backoff seconds).
+    """
+    def __init__(self, name, failure_threshold=2, base_backoff=1.0, max_backoff=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._backoff = base_backoff
+        self._open_until = None
+        self._trial_running = False
+
+    def before_call(self):
+        with self._lock:
+            if self._open_until is None:
+                return
+            remaining = self._open_until - time.monotonic()
+            if remaining > 0 or self._trial_running:
+                raise DatabaseUnavailableError(f"Database ({self.name}) is unavailable - retrying in {max(remaining, 0):.0f}s",
+                                               retry_after=max(1, round(remaining)))
+            # Half-open: let this one call find out whether the database is back
+            self._trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            if self._open_until is not None:
+                print(f"Database ({self.name}) is reachable again - closing circuit")
+            self._failures = 0
+            self._backoff = self.base_backoff
+            self._open_until = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                if self._trial_running:
+                    self._backoff = min(self._backoff * 2, self.max_backoff)
+                self._open_until = time.monotonic() + self._backoff
+                self._trial_running = False
+                print(f"WARNING: Database ({self.name}) unreachable - circuit open for {self._backoff:.0f}s")
+
+    def state(self):
+        with self._lock:
+            if self._open_until is None:
+                return 'closed'
+            return 'half-open' if time.monotonic() >= self._open_until else 'open'
+
+
+# SQLSTATEs for a server that is going away: admin shutdown, crash shutdown, still starting up
+_SERVER_GONE_CODES = ('57P01', '57P02', '57P03')
+# SQLSTATEs for a transaction the server aborted because of another one: serialization failure, deadlock
+_TRANSACTION_CONFLICT_CODES = ('40001', '40P01')
+
+def _is_connection_error(error, conn=None):
+    """Connection-level failures (server down, connection dropped) as opposed to errors the server answered with
+
+    Deadlocks, serialization failures, lock timeouts and a full disk are OperationalErrors too,
+    but the connection is fine - only a closed connection, an error without an SQLSTATE, a
+    connection exception (class 08) or a server shutdown counts as the database being gone.
+    """
+    if conn is not None and conn.closed:
+        return True
+    if not isinstance(error, (psycopg2.OperationalError, psycopg2.InterfaceError)):
+        return False
+    return error.pgcode is None or error.pgcode.startswith('08') or error.pgcode in _SERVER_GONE_CODES
+
+
 class PlasmidDatabase:
-    """Singleton database connection for desktop lab application"""
+    """Singleton database connection pool for desktop lab application
+
+    Each request thread borrows its own connection for the length of one transaction,
+    so concurrent requests never interleave statements inside a shared transaction.
+    If READ_DATABASE_URL is set, a second pool of read-only connections serves reads
+    from that server (e.g. a hot standby); writes always use the primary.
+    """
     _instance = None
-    _connection = None
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
+            cls._instance._pool_lock = threading.Lock()
+            cls._instance._pools = {}  # 'primary' / 'replica' -> (pool, slots semaphore)
+            cls._instance.breakers = {'primary': CircuitBreaker('primary'), 'replica': CircuitBreaker('replica')}
         return cls._instance
 
     # TODO: don't hard-code database, connection parameters, use environment variables or a config file
-    def connect(self):
-        """Get or create database connection"""
-        if self._connection is None or self._connection.closed:
-            import os
-            database_url = os.getenv('DATABASE_URL')
-            if database_url:
-                self._connection = psycopg2.connect(database_url)
+    @staticmethod
+    def connection_params(replica=False):
+        """Connection keyword arguments from DATABASE_URL (or READ_DATABASE_URL), or the local Docker defaults"""
+        # Give up on an unreachable server quickly instead of hanging the request
+        connect_timeout = int(os.getenv('DB_CONNECT_TIMEOUT', '5'))
+        if replica:
+            read_url = os.getenv('READ_DATABASE_URL')
+            return {'dsn': read_url, 'connect_timeout': connect_timeout} if read_url else None
+        database_url = os.getenv('DATABASE_URL')
+        if database_url:
+            return {'dsn': database_url, 'connect_timeout': connect_timeout}
+        # Fallback for local development
+        return {
+            'host': "database",  # Docker service name
+            'port': "5432",
+            'database': "lab_db",
+            'user': "lab_user",
+            'password': "lab_pass",
+            'connect_timeout': connect_timeout
+        }
+
+    def has_replica(self):
+        return self.connection_params(replica=True) is not None
+
+    @contextmanager
+    def connection(self, replica=False):
+        """Borrow a pooled connection for one transaction (from the read replica pool if replica=True)
+
+        Raises DatabaseUnavailableError right away while the circuit breaker is open.
+        """
+        name = 'replica' if replica else 'primary'
+        breaker = self.breakers[name]
+        breaker.before_call()
+
+        try:
+            pool, slots = self._get_pool(replica)
+        except psycopg2.OperationalError as e:
+            breaker.record_failure()
+            raise DatabaseUnavailableError(f"Database ({name}) is unavailable: {e}")
+
+        # The pool raises instead of waiting when exhausted, so queue for a free slot first
+        slots.acquire()
+        try:
+            try:
+                conn = pool.getconn()
+            except psycopg2.OperationalError as e:
+                breaker.record_failure()
+                raise DatabaseUnavailableError(f"Database ({name}) is unavailable: {e}")
+            lost = False
+            try:
+                if replica and not conn.readonly:
+                    conn.set_session(readonly=True)
+                yield conn
+            except DatabaseUnavailableError:
+                lost = True
+                breaker.record_failure()
+                raise
+            except Exception:
+                # An error in the SQL still means the server answered
+                breaker.record_success()
+                raise
             else:
-                # Fallback for local development
-                self._connection = psycopg2.connect(
-                    host="database",  # Docker service name
-                    port="5432",
-                    database="lab_db",
-                    user="lab_user",
-                    password="lab_pass"
-                )
-        return self._connection
+                breaker.record_success()
+            finally:
+                # Broken connections are closed instead of going back into the pool - other
+                # threads may be mid-transaction on the rest, which fail on their own if dead
+                if not pool.closed:
+                    pool.putconn(conn, close=lost or bool(conn.closed))
+        finally:
+            slots.release()
+
+    def _get_pool(self, replica=False):
+        name = 'replica' if replica else 'primary'
+        if name not in self._pools:
+            with self._pool_lock:
+                if name not in self._pools:
+                    params = self.connection_params(replica)
+                    if params is None:
+                        raise ValueError("No read replica configured - set READ_DATABASE_URL")
+                    pool_size = int(os.getenv('DB_POOL_SIZE', '10'))
+                    pool = ThreadedConnectionPool(1, pool_size, **params)
+                    self._pools[name] = (pool, threading.BoundedSemaphore(pool_size))
+        return self._pools[name]
+
+    def open_connection(self, replica=False):
+        """Open a new, unshared connection (for listeners and long-running streams)"""
+        name = 'replica' if replica else 'primary'
+        breaker = self.breakers[name]
+        breaker.before_call()
+        try:
+            conn = psycopg2.connect(**self.connection_params(replica))
+        except psycopg2.OperationalError as e:
+            breaker.record_failure()
+            raise DatabaseUnavailableError(f"Database ({name}) is unavailable: {e}")
+        breaker.record_success()
+        if replica:
+            conn.set_session(readonly=True)
+        return conn
 
     def close(self):
-        """Close database connection"""
-        if self._connection and not self._connection.closed:
-            self._connection.close()
+        """Close all pooled database connections"""
+        with self._pool_lock:
+            for pool, _ in self._pools.values():
+                if not pool.closed:
+                    pool.closeall()
+            self._pools = {}
 
 # Global database instance
 db = PlasmidDatabase()
@@ -51,17 +238,196 @@ db = PlasmidDatabase()
 def check_database_health():
     """Check if database connection is working"""
     try:
-        conn = db.connect()
-        with conn.cursor() as cursor:
-            # Simple query to test connection
-            cursor.execute("SELECT 1")
-            cursor.fetchone()
+        with db.connection() as conn:
+            with conn.cursor() as cursor:
+                # Simple query to test connection
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            conn.rollback()
         return True, "Database connection healthy"
     except Exception as e:
-        return False, f"Database connection failed: {str(e)}"
+        return False, f"Database connection failed: {str(e)} (circuit {db.breakers['primary'].state()})"
 
 
 
+#----------------------------
+# Read Routing
+#----------------------------
+
+# After a write, the writer's reads stay on the primary this long so it sees its own change
+READ_AFTER_WRITE_SECONDS = float(os.getenv('READ_AFTER_WRITE_SECONDS', '2'))
+# A replica further behind than this is skipped until it catches up
+MAX_REPLICA_LAG_SECONDS = float(os.getenv('MAX_REPLICA_LAG_SECONDS', '5'))
+
+class ReadRouter:
+    """Decides whether a read can go to the read replica
+
+    Reads use the replica unless there is none, the same client wrote within the last
+    READ_AFTER_WRITE_SECONDS, or the replica is unreachable or lagging. Replica lag is
+    checked at most every LAG_CHECK_SECONDS so routing costs nothing per query.
+
+    The last write is tracked per context, not per process: each write stamps the current
+    context with its wall-clock time, and the app hands that stamp to the client and restores
+    it on the client's next request (set_last_write), whichever worker process serves it.
+    """
+    LAG_CHECK_SECONDS = 5
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked_at = None
+        self._replica_ok = False
+
+    def note_write(self):
+        _last_write.set(time.time())
+
+    def mark_replica_down(self):
+        """Skip the replica until the next lag check"""
+        with self._lock:
+            self._replica_ok = False
+            self._checked_at = time.monotonic()
+
+    def use_replica(self):
+        if _primary_reads.get() or not db.has_replica():
+            return False
+        if time.time() - _last_write.get() < READ_AFTER_WRITE_SECONDS:
+            return False
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at >= self.LAG_CHECK_SECONDS:
+            with self._lock:
+                if self._checked_at is None or now - self._checked_at >= self.LAG_CHECK_SECONDS:
+                    self._replica_ok = self._replica_caught_up()
+                    self._checked_at = time.monotonic()
+        return self._replica_ok
+
+    def _replica_caught_up(self):
+        # Fully replayed standbys report 0 even when the primary has been idle for a while;
+        # a server that is not a standby at all (e.g. a second local Postgres) reports NULL
+        query = """
+            SELECT CASE
+                       WHEN NOT pg_is_in_recovery() THEN NULL
+                       WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                       ELSE EXTRACT(EPOCH FROM (NOW() - pg_last_xact_replay_timestamp()))
+                   END as lag_seconds
+        """
+        try:
+            with db.connection(replica=True) as conn:
+                with conn.cursor() as cur:
+                    cur.execute(query)
+                    lag = cur.fetchone()[0]
+                conn.rollback()
+        except Exception as e:
+            print(f"WARNING: Read replica unavailable, reading from primary: {e}")
+            return False
+
+        if lag is not None and lag > MAX_REPLICA_LAG_SECONDS:
+            print(f"WARNING: Read replica is {lag:.1f}s behind, reading from primary")
+            return False
+        return True
+
+# Global read router instance
+read_router = ReadRouter()
+
+_primary_reads = contextvars.ContextVar('primary_reads', default=False)
+# Wall-clock time (comparable across processes) of the current client's last write
+_last_write = contextvars.ContextVar('last_write', default=0.0)
+
+def set_last_write(timestamp):
+    """Restore the time.time() of the current client's last write (0 for none) - its reads
+    stay on the primary until READ_AFTER_WRITE_SECONDS after it"""
+    _last_write.set(min(timestamp, time.time()))
+
+def last_write():
+    """time.time() of the last write made or restored in this context, 0 for none"""
+    return _last_write.get()
+
+@contextmanager
+def read_from_primary():
+    """Send this thread's reads to the primary - for results that outlive the read-after-write
+    window (e.g. cache fills), which a replica lagging up to MAX_REPLICA_LAG_SECONDS could make stale"""
+    token = _primary_reads.set(True)
+    try:
+        yield
+    finally:
+        _primary_reads.reset(token)
+
+
+#----------------------------
+# Query Deadlines
+#----------------------------
+# A request can give its database work a deadline. Every transaction it runs then starts
+# with SET LOCAL statement_timeout for the time that is left, so Postgres itself cancels
+# a runaway query and the connection goes straight back to the pool.
+
+class QueryTimeoutError(ValueError):
+    """A query was cancelled because the request's deadline passed"""
+
+
+_query_deadline = contextvars.ContextVar('query_deadline', default=None)
+
+def set_query_deadline(seconds):
+    """Deadline for queries in the current context, seconds from now - None for no limit"""
+    _query_deadline.set(time.monotonic() + seconds if seconds else None)
+
+def _statement_timeout_ms():
+    deadline = _query_deadline.get()
+    if deadline is None:
+        return None
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise QueryTimeoutError("Request deadline passed before the query could start")
+    return max(1, int(remaining * 1000))
+
+
+#----------------------------
+# Change Notifications
+#----------------------------
+
+# Postgres NOTIFY channel that write paths publish to (see change_feed.py)
+CHANGE_CHANNEL = "inventory_changes"
+# NOTIFY payloads are capped at 8000 bytes, so large batches are split across notifications
+_NOTIFY_BATCH_SIZE = 50
+
+def _change_notifications(kind, records, version=None):
+    """Build pg_notify operations announcing changed plasmids
+
+    Runs inside the write transaction, so listeners only hear about committed changes.
+
+    Args:
+        kind: 'added', 'modified' or 'deleted'
+        records: list of dicts with 'lot', 'sublot', 'bag' (and 'previous_bag' for moves)
+        version: change version to announce - defaults to the last one this transaction stamped
+
+    Returns:
+        List of (query, params) tuples to append to a transaction
+    """
+    import json
+
+    # currval is this session's last stamp - the sequence's last_value may be another session's
+    query = """
+        SELECT pg_notify(%s, JSON_BUILD_OBJECT(
+            'kind', %s,
+            'version', COALESCE(%s, currval('change_version_seq')),
+            'records', %s::JSON
+        )::TEXT)
+    """
+    operations = []
+    for start in range(0, len(records), _NOTIFY_BATCH_SIZE):
+        batch = [{**record, 'id': f"{record['lot']}-{record['sublot']}"} for record in records[start:start + _NOTIFY_BATCH_SIZE]]
+        operations.append((query, (CHANGE_CHANNEL, kind, version, json.dumps(batch))))
+    return operations
+
+def _announce_committed_changes(kind, records, version):
+    """NOTIFY about a write that already committed, in a transaction of its own
+
+    The write stands either way, so a failure is logged rather than raised - change feed
+    clients that miss the notification catch up through /api/changes.
+    """
+    try:
+        execute_transaction(_change_notifications(kind, records, version=version))
+    except Exception as e:
+        print(f"WARNING: Committed {kind} change (version {version}) was not announced: {e}")
+
+
 #----------------------------
 # Repository
 #----------------------------
@@ -91,11 +457,11 @@ def find_plasmids(plasmid_collection=None, filters=None):
         if isinstance(plasmid_collection, Plasmid):
             plasmid_collection = PlasmidCollection([plasmid_collection])
         lots, sublots = plasmid_collection.get_lots_sublots()
-        base_where_conditions.append("(p.lot, p.sublot) IN (SELECT UNNEST(%s), UNNEST(%s))")
+        base_where_conditions.append(POSTGRES.id_list_condition)
         params.extend([lots, sublots])
 
     # Build additional filter conditions
-    filter_conditions, filter_params = _build_filter_conditions(filters)
+    filter_conditions, filter_params = build_filter_conditions(filters)
     base_where_conditions.extend(filter_conditions)
     params.extend(filter_params)
 
@@ -114,7 +480,7 @@ def find_plasmids_by_bag(bag_name, filters=None):
     params = [bag_name]
 
     # Add additional filter conditions
-    filter_conditions, filter_params = _build_filter_conditions(filters)
+    filter_conditions, filter_params = build_filter_conditions(filters)
     base_conditions.extend(filter_conditions)
     params.extend(filter_params)
 
@@ -128,116 +494,64 @@ def find_plasmids_by_lot(lot_collection, filters=None):
     params = [lot_collection]
 
     # Add additional filter conditions
-    filter_conditions, filter_params = _build_filter_conditions(filters)
+    filter_conditions, filter_params = build_filter_conditions(filters)
     base_conditions.extend(filter_conditions)
     params.extend(filter_params)
 
     where_clause = " AND ".join(base_conditions)
     return _unified_plasmids_query(where_clause, params, filters, "p.bag, p.sublot")
 
-def _build_filter_conditions(filters):
-    """Build WHERE clause conditions and parameters from filter dictionary
-
-    Args:
-        filters: Dict containing filter options
-
-    Returns:
-        tuple: (list of condition strings, list of parameters)
-    """
-    if not filters:
-        return [], []
-
-    conditions = []
-    params = []
-
-    # Checkout status filter
-    if 'checked_out' in filters:
-        if filters['checked_out']:
-            # Only plasmids with at least one checked out sample
-            conditions.append("EXISTS (SELECT 1 FROM samples s2 WHERE s2.plasmid_id = p.id AND s2.is_checked_out = true)")
-        else:
-            # Only plasmids with no checked out samples
-            conditions.append("NOT EXISTS (SELECT 1 FROM samples s2 WHERE s2.plasmid_id = p.id AND s2.is_checked_out = true)")
-
-    # Time-based filters
-    if 'time_filter' in filters and filters['time_filter'] != 'all':
-        time_condition, time_params = _build_time_filter(
-            filters['time_filter'],
-            filters.get('time_filter_type', 'added')
-        )
-        if time_condition:
-            conditions.append(time_condition)
-            params.extend(time_params)
-
-    # Custom date range filter
-    if 'date_range' in filters and filters['date_range']:
-        start_date, end_date = filters['date_range']
-        filter_type = filters.get('time_filter_type', 'added')
-
-        if filter_type == 'added':
-            conditions.append("p.date_added BETWEEN %s AND %s")
-            params.extend([start_date, end_date])
-        else:  # modified - check sample dates
-            conditions.append("EXISTS (SELECT 1 FROM samples s2 WHERE s2.plasmid_id = p.id AND s2.date_modified BETWEEN %s AND %s)")
-            params.extend([start_date, end_date])
-
-    # Specific bags filter
-    if 'bags' in filters and filters['bags']:
-        bag_placeholders = ",".join(["%s"] * len(filters['bags']))
-        conditions.append(f"UPPER(p.bag) IN ({bag_placeholders})")
-        params.extend([bag.upper() for bag in filters['bags']])
-
-    # Volume filter
-    if 'has_volume' in filters:
-        if filters['has_volume']:
-            # Only plasmids with samples that have volume > 0
-            conditions.append("EXISTS (SELECT 1 FROM samples s2 WHERE s2.plasmid_id = p.id AND s2.volume > 0)")
-        else:
-            # Only plasmids with no volume or volume = 0
-            conditions.append("NOT EXISTS (SELECT 1 FROM samples s2 WHERE s2.plasmid_id = p.id AND s2.volume > 0)")
+def find_plasmids_by_search(search_query, filters=None):
+    """Find all plasmids matching a parsed search_language.SearchQuery (bags, lots, ids and ranges of them)"""
+    where_clause, params = search_query.to_sql()
 
-    return conditions, params
+    # Add additional filter conditions
+    filter_conditions, filter_params = build_filter_conditions(filters)
+    where_clause = " AND ".join([where_clause] + filter_conditions)
+    params.extend(filter_params)
 
-def _build_time_filter(time_filter, filter_type='added'):
-    """Build time-based filter conditions
+    return _unified_plasmids_query(where_clause, params, filters, "LENGTH(p.bag), p.bag, p.lot, p.sublot")
 
-    Args:
-        time_filter: 'this_month', 'last_6_months', 'last_12_months'
-        filter_type: 'added' (date_added) or 'modified' (sample dates)
+def find_plasmid_fields_by_search(search_query, fields):
+    """Search results as dicts holding only the requested PLASMID_FIELDS, in search order
 
-    Returns:
-        tuple: (condition string, list of parameters)
+    Without 'samples' only those plasmid columns are selected - no samples join, no
+    aggregation and no Plasmid/Sample objects.
     """
-    import datetime
-
-    now = datetime.datetime.now()
-
-    if time_filter == 'this_month':
-        start_date = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    elif time_filter == 'last_6_months':
-        start_date = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        # Go back 6 months
-        for _ in range(6):
-            if start_date.month == 1:
-                start_date = start_date.replace(year=start_date.year - 1, month=12)
-            else:
-                start_date = start_date.replace(month=start_date.month - 1)
-    elif time_filter == 'last_12_months':
-        start_date = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        start_date = start_date.replace(year=start_date.year - 1)
-    else:
-        return None, []
-
-    if filter_type == 'added':
-        condition = "p.date_added >= %s"
-        return condition, [start_date]
-    else:  # modified - check sample modification dates
-        condition = "EXISTS (SELECT 1 FROM samples s2 WHERE s2.plasmid_id = p.id AND s2.date_modified >= %s)"
-        return condition, [start_date]
+    unknown = [field for field in fields if field not in PLASMID_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}. Available fields: {', '.join(PLASMID_FIELDS)}")
+
+    if 'samples' in fields:
+        return [{field: record[field] for field in fields}
+                for record in (plasmid.to_dict() for plasmid in find_plasmids_by_search(search_query))]
+
+    where_clause, params = search_query.to_sql()
+    columns = ", ".join(f"p.{field}" for field in fields)
+    results = execute_read(f"SELECT {columns} FROM plasmids p WHERE {where_clause} ORDER BY LENGTH(p.bag), p.bag, p.lot, p.sublot", params)
+    return [dict(result) for result in results]
+
+def count_plasmids_by_search(search_query):
+    """{bag: plasmid count} for a search, counted in the database"""
+    where_clause, params = search_query.to_sql()
+    results = execute_read(f"""
+        SELECT p.bag, COUNT(*) AS plasmid_count
+        FROM plasmids p
+        WHERE {where_clause}
+        GROUP BY p.bag
+        ORDER BY LENGTH(p.bag), p.bag
+    """, params)
+    return {result['bag']: result['plasmid_count'] for result in results}
 
 def _unified_plasmids_query(where_clause=None, params=None, filters=None, order_by="p.bag, p.lot, p.sublot"):
+    results = execute_read(_plasmids_select(where_clause, order_by), params)
+    plasmids = [Plasmid(**result) for result in results]
+    return PlasmidCollection(plasmids)
+
+def _plasmids_select(where_clause=None, order_by="p.bag, p.lot, p.sublot"):
+    """SELECT returning one row per plasmid with its samples aggregated as JSON"""
     base_query = """
-                 SELECT p.lot, p.sublot, p.bag, p.notes, p.date_added,
+                 SELECT p.lot, p.sublot, p.bag, p.notes, p.date_added, p.version,
                         COALESCE(
                                 JSON_AGG(
                                         JSON_BUILD_OBJECT(
@@ -247,7 +561,8 @@ def _unified_plasmids_query(where_clause=None, params=None, filters=None, order_
                                                 'is_checked_out', s.is_checked_out,
                                                 'checked_out_by', s.checked_out_by,
                                                 'checked_out_at', s.checked_out_at,
-                                                'checked_in_at', s.checked_in_at
+                                                'checked_in_at', s.checked_in_at,
+                                                'version', s.version
                                         ) ORDER BY s.id
                                 ) FILTER (WHERE s.volume IS NOT NULL),
                                 '[]'::JSON
@@ -259,11 +574,127 @@ def _unified_plasmids_query(where_clause=None, params=None, filters=None, order_
     if where_clause:
         base_query += f" WHERE {where_clause}"
 
-    base_query += f" GROUP BY p.id, p.lot, p.sublot, p.bag, p.notes, p.date_added ORDER BY {order_by}"
+    base_query += f" GROUP BY p.id, p.lot, p.sublot, p.bag, p.notes, p.date_added, p.version ORDER BY {order_by}"
+    return base_query
 
-    results = execute_sql(base_query, params)
-    plasmids = [Plasmid(**result) for result in results]
-    return PlasmidCollection(plasmids)
+def find_plasmids_lazy(plasmid_collection=None, filters=None, itersize=1000):
+    """Like find_plasmids, but returns a LazyPlasmidCollection backed by a server-side cursor
+
+    Nothing is loaded until the collection is iterated, and then Postgres hands rows over
+    itersize at a time, so memory stays constant no matter how big the result is. Each
+    iteration runs the query again on its own connection.
+
+    Args:
+        plasmid_collection: Single Plasmid or PlasmidCollection to search for specific records
+        filters: same filter dict as find_plasmids
+        itersize: rows fetched from the server per round trip
+
+    Returns:
+        LazyPlasmidCollection ordered by bag number, lot, sublot
+    """
+    where_conditions = []
+    params = []
+
+    if plasmid_collection:
+        if isinstance(plasmid_collection, Plasmid):
+            plasmid_collection = PlasmidCollection([plasmid_collection])
+        lots, sublots = plasmid_collection.get_lots_sublots()
+        where_conditions.append(POSTGRES.id_list_condition)
+        params.extend([lots, sublots])
+
+    filter_conditions, filter_params = build_filter_conditions(filters)
+    where_conditions.extend(filter_conditions)
+    params.extend(filter_params)
+
+    where_clause = " AND ".join(where_conditions) if where_conditions else None
+    query = _plasmids_select(where_clause, order_by="LENGTH(p.bag), p.bag, p.lot, p.sublot")
+
+    return LazyPlasmidCollection(lambda: _stream_plasmids_query(query, params, itersize))
+
+def _stream_plasmids_query(query, params=None, itersize=1000):
+    """Run a plasmid SELECT through a named cursor and return an iterator of Plasmid objects
+
+    The query runs before this returns, so connection and SQL errors are raised here
+    rather than halfway through iterating.
+    """
+    # A dedicated connection: the cursor can stay open for a whole download and must not pin a pooled one
+    conn = None
+    if read_router.use_replica():
+        try:
+            conn = db.open_connection(replica=True)
+        except (ValueError, psycopg2.Error) as e:
+            print(f"WARNING: Read replica unavailable, streaming from primary: {e}")
+            read_router.mark_replica_down()
+    if conn is None:
+        conn = db.open_connection()
+    try:
+        cur = conn.cursor(name=f"plasmid_stream_{id(conn)}", cursor_factory=RealDictCursor)
+        cur.itersize = itersize
+        cur.execute(query, params if params else None)
+    except psycopg2.Error as e:
+        lost = _is_connection_error(e, conn)
+        conn.close()
+        if lost:
+            print(f"ERROR: Database connection lost: {e}")
+            raise DatabaseUnavailableError(f"Database connection lost: {e}")
+        print(f"ERROR: Database error: {e}")
+        raise DatabaseError(f"Database operation failed: {e}")
+
+    def rows():
+        try:
+            for row in cur:
+                yield Plasmid(**row)
+        finally:
+            # Also runs when the consumer stops early (e.g. the client disconnects) and the generator is closed
+            conn.close()
+
+    return rows()
+
+def find_changes_since(since_version):
+    """Find everything that changed after a change version, for incremental client sync
+
+    Every write to a plasmid or its samples bumps plasmids.version, so one indexed range
+    scan per table finds the changed records. Deletes and moves come from tombstones.
+
+    Returns:
+        dict: {'version': current version, 'inserted': PlasmidCollection,
+               'updated': PlasmidCollection, 'deleted': list of tombstone dicts}
+    """
+    # Read the version first: anything committed after this point is picked up by the next sync
+    current_version = get_current_version()
+
+    inserted = _unified_plasmids_query("p.created_version > %s", [since_version], order_by="p.version")
+    updated = _unified_plasmids_query("p.version > %s AND p.created_version <= %s", [since_version, since_version], order_by="p.version")
+
+    tombstone_query = """
+        SELECT lot, sublot, bag, deleted_at, version
+        FROM plasmid_tombstones
+        WHERE version > %s
+        ORDER BY version
+    """
+    deleted = execute_sql(tombstone_query, (since_version,))
+
+    return {'version': current_version, 'inserted': inserted, 'updated': updated, 'deleted': deleted}
+
+def get_current_version():
+    """Highest change version below which every write has committed - the watermark for delta sync
+
+    The sequence's last_value alone is not safe: a transaction that drew a lower version may
+    still be in flight, and its rows would commit behind a client that already synced past
+    them. Write transactions hold _VERSION_STAMP_LOCK shared, so taking it exclusively waits
+    for those to finish before the sequence is read.
+    """
+    results = execute_transaction([
+        ("SELECT pg_advisory_xact_lock(hashtext(%s))", (_VERSION_STAMP_LOCK,)),
+        ("SELECT last_value, is_called FROM change_version_seq", None)
+    ])
+    result = results[1][0]
+    return result['last_value'] if result['is_called'] else 0
+
+def get_inventory_version():
+    """Version of the committed inventory, as inventory_version() would compute it from the loaded plasmids"""
+    result = execute_read("SELECT COUNT(*) AS plasmid_count, MAX(version) AS max_version, SUM(version) AS version_sum FROM plasmids")
+    return format_inventory_version(result[0]['plasmid_count'], result[0]['max_version'], result[0]['version_sum'])
 
 ### END FIND ##################################
 
@@ -273,13 +704,36 @@ def delete_plasmid_record(plasmid):
     print(f"Deleting record {plasmid.lot}-{plasmid.sublot} from database")
 
     # THIS DELETES SAMPLES/VOLUMES AS WELLL VIA SQL CASCADE
-    query = "DELETE FROM plasmids WHERE lot = %s AND sublot = %s AND bag = %s"
+    # The deleted location is recorded as a tombstone so delta sync clients can drop it
+    # Every deleted sample (read from the pre-delete snapshot) is written to the event ledger -
+    # a plasmid without samples logs nothing
+    query = """
+        WITH deleted AS (
+            DELETE FROM plasmids WHERE lot = %s AND sublot = %s AND bag = %s
+            RETURNING id, lot, sublot, bag
+        ), logged AS (
+            INSERT INTO sample_events (event_type, lot, sublot, bag, sample_index, volume)
+            SELECT 'delete', d.lot, d.sublot, d.bag, ROW_NUMBER() OVER (ORDER BY s.id) - 1, s.volume
+            FROM deleted d
+                     JOIN samples s ON s.plasmid_id = d.id
+        )
+        INSERT INTO plasmid_tombstones (lot, sublot, bag)
+        SELECT lot, sublot, bag FROM deleted
+        RETURNING version
+    """
     params = (plasmid.lot, plasmid.sublot, plasmid.bag)
+
+    _ensure_event_partitions()
+
+    records = [{'lot': plasmid.lot, 'sublot': plasmid.sublot, 'bag': plasmid.bag}]
+    operations = [(query, params)]
+    operations.extend(_change_notifications('deleted', records))
+
+    tombstone = execute_transaction(operations, stop_if_missing=True)[0]
     
-    affected_rows = execute_sql(query, params)
-    
-    if affected_rows == 0:
+    if tombstone is None:
         raise ValueError(f"Plasmid {plasmid.lot}-{plasmid.sublot} not found in database")
+    notify_write_listeners('deleted', records)
     
     print(f"SUCCESS: Deleted record {plasmid.lot}-{plasmid.sublot} from database")
     return {'lot': plasmid.lot, 'sublot': plasmid.sublot}
@@ -287,6 +741,50 @@ def delete_plasmid_record(plasmid):
 ### End Delete #############################
 
 ### ADD ####################################
+# Plasmids and their samples are inserted set-based: one statement per batch, with the rows
+# passed as arrays and unnested server-side, so a large batch costs one round trip.
+_BULK_INSERT_QUERY = """
+    WITH new_plasmids AS (
+        INSERT INTO plasmids (lot, sublot, bag, notes, date_added)
+        SELECT lot, sublot, bag, notes, NOW()
+        FROM UNNEST(%s::INTEGER[], %s::INTEGER[], %s::VARCHAR[], %s::TEXT[]) AS p(lot, sublot, bag, notes)
+        {on_conflict}
+        RETURNING id, lot, sublot, bag
+    ), new_samples AS (
+        INSERT INTO samples (plasmid_id, volume, date_created, date_modified)
+        SELECT np.id, s.volume, NOW(), NOW()
+        FROM UNNEST(%s::INTEGER[], %s::INTEGER[], %s::VARCHAR[], %s::DECIMAL[]) WITH ORDINALITY AS s(lot, sublot, bag, volume, position)
+                 JOIN new_plasmids np ON np.lot = s.lot AND np.sublot = s.sublot AND np.bag = s.bag
+        ORDER BY s.position
+    )
+    SELECT lot, sublot, bag FROM new_plasmids
+"""
+
+def _bulk_insert_operation(plasmids, skip_duplicates=False):
+    """Build the set-based insert for plasmids and their samples
+
+    Args:
+        plasmids: list of validated Plasmid objects
+        skip_duplicates: silently skip plasmids that already exist in their bag instead of failing
+
+    Returns:
+        (query, params, 'all') operation - its result is the list of inserted lot/sublot/bag rows
+    """
+    sample_lots, sample_sublots, sample_bags, sample_volumes = [], [], [], []
+    for plasmid in plasmids:
+        for volume in plasmid.samples.to_list():
+            sample_lots.append(plasmid.lot)
+            sample_sublots.append(plasmid.sublot)
+            sample_bags.append(plasmid.bag)
+            sample_volumes.append(volume)
+
+    query = _BULK_INSERT_QUERY.format(on_conflict="ON CONFLICT (lot, sublot, bag) DO NOTHING" if skip_duplicates else "")
+    params = (
+        [p.lot for p in plasmids], [p.sublot for p in plasmids], [p.bag for p in plasmids], [p.notes for p in plasmids],
+        sample_lots, sample_sublots, sample_bags, sample_volumes
+    )
+    return query, params, 'all'
+
 def add_plasmid_record(plasmids):
     """Insert record(s) into database - accepts single record or list of plasmids"""
     
@@ -301,42 +799,18 @@ def add_plasmid_record(plasmids):
         print(f"Inserting {len(plasmids)} record(s) into database")
         
         # Validate bag numbers for all plasmids before insertion
-        for plasmid in plasmids:
-            _bag_number_in_range(plasmid.bag)
+        _bag_numbers_in_range([plasmid.bag for plasmid in plasmids])
         
         # Use transaction to insert all plasmids and samples atomically
-        operations = []
-        
-        for i, plasmid in enumerate(plasmids):
-            print(f"Processing record {i+1}/{len(plasmids)}: {plasmid.lot}-{plasmid.sublot}")
-            print(f"DEBUG: record object: {plasmid}")
-            print(f"DEBUG: record.samples: {plasmid.samples}")
+        records = [{'lot': p.lot, 'sublot': p.sublot, 'bag': p.bag} for p in plasmids]
+        operations = [_bulk_insert_operation(plasmids)]
+        operations.extend(_change_notifications('added', records))
 
-            # Get list of volume numbers from SampleCollection
-            volumes = plasmid.samples.to_list()
-            print(f"DEBUG: volumes list: {volumes}")
-            
-            # Insert record first
-            plasmid_query = """
-                INSERT INTO plasmids (lot, sublot, bag, notes, date_added)
-                VALUES (%s, %s, %s, %s, NOW())
-                RETURNING id
-            """
-            params = (plasmid.lot, plasmid.sublot, plasmid.bag, plasmid.notes)
-            operations.append((plasmid_query, params))
-            
-            # Insert each sample for this record
-            for volume in volumes:
-                sample_query = """
-                    INSERT INTO samples (plasmid_id, volume, date_created, date_modified)
-                    VALUES ((SELECT currval(pg_get_serial_sequence('plasmids','id'))), %s, NOW(), NOW())
-                """
-                operations.append((sample_query, (volume,)))
-        
         # Execute all operations in a single transaction
         results = execute_transaction(operations)
+        notify_write_listeners('added', records)
         
-        success_msg = f"SUCCESS: Created {len(plasmids)} record(s) in database"
+        success_msg = f"SUCCESS: Created {len(results[0])} record(s) in database"
         for plasmid in plasmids:
             volumes = plasmid.samples.to_list()
             success_msg += f"\n  - {plasmid.lot}-{plasmid.sublot} in {plasmid.bag} with {len(volumes)} samples"
@@ -350,6 +824,30 @@ def add_plasmid_record(plasmids):
             error_msg += f"\nTransaction rolled back - no records were inserted"
         print(error_msg)
         raise
+
+def import_plasmid_records(plasmids):
+    """Insert one chunk of imported plasmids in its own transaction, skipping ones already in their bag
+
+    Returns:
+        set of (lot, sublot, bag) tuples that were inserted
+    """
+    if not plasmids:
+        return set()
+
+    results = execute_transaction([
+        _bulk_insert_operation(plasmids, skip_duplicates=True),
+        # Defined even if every row was a duplicate - ON CONFLICT skips rows after their defaults are stamped
+        ("SELECT currval('change_version_seq') AS version", None)
+    ])
+    inserted = [{'lot': row['lot'], 'sublot': row['sublot'], 'bag': row['bag']} for row in results[0]]
+
+    # Notify after commit - only about the rows that were actually new
+    if inserted:
+        notify_write_listeners('added', inserted)
+        _announce_committed_changes('added', inserted, results[1][0]['version'])
+
+    print(f"SUCCESS: Imported {len(inserted)}/{len(plasmids)} record(s), {len(plasmids) - len(inserted)} already existed")
+    return {(row['lot'], row['sublot'], row['bag']) for row in inserted}
 ### END ADD ###################################
 
 ### MODIFY ###################################
@@ -373,16 +871,36 @@ def modify_plasmid_record(updated_plasmid, previous_plasmid=None):
         operations = []
         
         # Update record table first (main record) - MUST include bag in WHERE clause for unique identification
+        # If the client sent the version it loaded, only update when nobody else changed the record since
         update_query = """
             UPDATE plasmids 
-            SET bag = %s, notes = %s 
+            SET bag = %s, notes = %s, version = nextval('change_version_seq')
             WHERE lot = %s AND sublot = %s AND bag = %s
-            RETURNING id
+              AND (%s::BIGINT IS NULL OR version = %s::BIGINT)
+            RETURNING id, version
         """
           
-        params = (updated_plasmid.bag, updated_plasmid.notes, previous_plasmid.lot, previous_plasmid.sublot, previous_plasmid.bag)
+        expected_version = previous_plasmid.version
+        params = (updated_plasmid.bag, updated_plasmid.notes, previous_plasmid.lot, previous_plasmid.sublot, previous_plasmid.bag, expected_version, expected_version)
         operations.append((update_query, params))
 
+        # A move leaves a tombstone at the old location for delta sync clients
+        if updated_plasmid.bag != previous_plasmid.bag:
+            tombstone_query = "INSERT INTO plasmid_tombstones (lot, sublot, bag) VALUES (%s, %s, %s)"
+            operations.append((tombstone_query, (previous_plasmid.lot, previous_plasmid.sublot, previous_plasmid.bag)))
+            move_event_query = """
+                INSERT INTO sample_events (event_type, lot, sublot, bag, previous_bag)
+                VALUES ('move', %s, %s, %s, %s)
+            """
+            operations.append((move_event_query, (previous_plasmid.lot, previous_plasmid.sublot, updated_plasmid.bag, previous_plasmid.bag)))
+
+        # Log volume changes before the samples are replaced (a removed sample logs volume NULL, an added one previous_volume NULL)
+        operations.append((_VOLUME_CHANGE_EVENTS, (
+            previous_plasmid.lot, previous_plasmid.sublot, updated_plasmid.bag,
+            previous_plasmid.lot, previous_plasmid.sublot, updated_plasmid.bag,
+            volumes
+        )))
+
         # Once updated, delete the samples for this record (will re-insert the updated copy)
         delete_query = """
             DELETE FROM samples
@@ -391,11 +909,13 @@ def modify_plasmid_record(updated_plasmid, previous_plasmid=None):
         operations.append((delete_query, (previous_plasmid.lot, previous_plasmid.sublot, updated_plasmid.bag)))
         
         # Insert new samples
+        first_sample_operation = len(operations)
         for i, volume in enumerate(volumes):
             sample = updated_plasmid.samples[i]
             sample_query = """
                 INSERT INTO samples (plasmid_id, volume, date_created, date_modified, is_checked_out, checked_out_by, checked_out_at, checked_in_at)
                 VALUES ((SELECT id FROM plasmids WHERE lot = %s AND sublot = %s AND bag = %s), %s, %s, %s, %s, %s, %s, %s)
+                RETURNING version
             """
             params = (
                 previous_plasmid.lot,
@@ -410,26 +930,332 @@ def modify_plasmid_record(updated_plasmid, previous_plasmid=None):
                 sample.checked_in_at
             )
             operations.append((sample_query, params))
-        
-        results = execute_transaction(operations)
+
+        records = [{
+            'lot': updated_plasmid.lot,
+            'sublot': updated_plasmid.sublot,
+            'bag': updated_plasmid.bag,
+            'previous_bag': previous_plasmid.bag
+        }]
+        operations.extend(_change_notifications('modified', records))
+
+        # Stop before touching samples if the record is gone or was changed by someone else
+        _ensure_event_partitions()
+        results = execute_transaction(operations, stop_if_missing=True)
         
         # Check if record was found (first operation should return a result with RETURNING)
         if not results[0]:
+            if expected_version is not None and _plasmid_exists(previous_plasmid):
+                raise ConflictError(f"Plasmid {previous_plasmid.lot}-{previous_plasmid.sublot} was changed by someone else. Reload and try again.")
             raise ValueError(f"Plasmid {previous_plasmid.lot}-{previous_plasmid.sublot} not found")
+        notify_write_listeners('modified', records)
         
+        # Hand the new versions back so the client can keep editing without reloading
+        updated_plasmid.version = results[0]['version']
+        sample_results = results[first_sample_operation:first_sample_operation + len(volumes)]
+        for sample, sample_result in zip(updated_plasmid.samples, sample_results):
+            sample.version = sample_result['version']
+
         print(f"SUCCESS: Updated record {previous_plasmid.lot}-{previous_plasmid.sublot}")
-        return {'lot': updated_plasmid.lot, 'sublot': updated_plasmid.sublot, 'bag': updated_plasmid.bag}
+        return {'lot': updated_plasmid.lot, 'sublot': updated_plasmid.sublot, 'bag': updated_plasmid.bag, 'version': updated_plasmid.version}
 
     except Exception as e:
         print(f"ERROR: Failed to modify record {previous_plasmid.lot}-{previous_plasmid.sublot}: {e}")
         raise
 
+_VOLUME_CHANGE_EVENTS = """
+    INSERT INTO sample_events (event_type, lot, sublot, bag, sample_index, volume, previous_volume)
+    SELECT 'volume_change', %s, %s, %s, COALESCE(new.position, old.position) - 1, new.volume, old.volume
+    FROM (SELECT ROW_NUMBER() OVER (ORDER BY s.id) AS position, s.volume
+          FROM samples s
+                   JOIN plasmids p ON p.id = s.plasmid_id
+          WHERE p.lot = %s AND p.sublot = %s AND p.bag = %s) old
+             FULL JOIN UNNEST(%s::DECIMAL[]) WITH ORDINALITY AS new(volume, position) ON new.position = old.position
+    WHERE new.volume IS DISTINCT FROM old.volume
+"""
+
 ### END MODIFY #####################################
 
+### MOVE ###########################################
+# Bulk moves (consolidating duplicates, reorganizing a freezer) relocate plasmids with one
+# set-based UPDATE. Samples hang off plasmids.id, so they move along without being rewritten.
+
+_MOVE_QUERY = """
+    WITH moving AS (
+        SELECT lot, sublot, bag
+        FROM UNNEST(%s::INTEGER[], %s::INTEGER[], %s::VARCHAR[]) AS m(lot, sublot, bag)
+    ), moved AS (
+        UPDATE plasmids p
+        SET bag = %s, version = nextval('change_version_seq')
+        FROM moving
+        WHERE p.lot = moving.lot AND p.sublot = moving.sublot AND p.bag = moving.bag
+        RETURNING p.lot, p.sublot, p.bag, moving.bag AS previous_bag, p.version
+    ), tombstones AS (
+        INSERT INTO plasmid_tombstones (lot, sublot, bag)
+        SELECT lot, sublot, previous_bag FROM moved
+    ), logged AS (
+        INSERT INTO sample_events (event_type, lot, sublot, bag, previous_bag)
+        SELECT 'move', lot, sublot, bag, previous_bag FROM moved
+    )
+    -- No row unless every planned plasmid moved, so a partial move is rolled back (stop_if_missing)
+    SELECT JSON_AGG(JSON_BUILD_OBJECT('lot', lot, 'sublot', sublot, 'bag', bag, 'previous_bag', previous_bag, 'version', version)
+                    ORDER BY version) AS moved
+    FROM moved
+    HAVING COUNT(*) = %s
+"""
+
+def move_plasmids(target_bag, plasmid_collection=None, source_bag=None):
+    """Move plasmids to target_bag in a single transaction
+
+    Args:
+        target_bag: bag to move into
+        plasmid_collection: PlasmidCollection of the lot-sublot ids to move, or None to move all of source_bag
+        source_bag: bag to move from - required without plasmid_collection, and picks the copy
+            to move when an id is in several bags
+
+    The whole batch is checked up front (bag range, ids not found, ids in several bags, ids
+    already in target_bag) and rejected as a unit if anything is wrong. If any of the plasmids
+    changed before the update reached them, nothing is moved and ConflictError is raised.
+
+    Returns:
+        dict with moved_count, plasmids (lot, sublot, bag, previous_bag, version) and
+        unchanged (ids that were already in target_bag)
+    """
+    if plasmid_collection is None and source_bag is None:
+        raise ValueError("Give the ids to move or a bag to move everything from")
+
+    # Every location of the candidate ids, from the primary - the plan must not be built on a stale read
+    if plasmid_collection is None:
+        locations = execute_sql("""
+            SELECT p.lot, p.sublot, p.bag FROM plasmids p
+            WHERE (p.lot, p.sublot) IN (SELECT lot, sublot FROM plasmids WHERE bag = %s)
+        """, (source_bag,))
+        requested = None
+    else:
+        lots, sublots = plasmid_collection.get_lots_sublots()
+        locations = execute_sql(f"SELECT p.lot, p.sublot, p.bag FROM plasmids p WHERE {POSTGRES.id_list_condition}", (lots, sublots))
+        requested = list(zip(lots, sublots))
+
+    _bag_number_in_range(target_bag)
+    moves, unchanged = plan_move(locations, target_bag, requested, source_bag)
+    if not moves:
+        return {'moved_count': 0, 'plasmids': [], 'unchanged': unchanged}
+
+    params = ([move['lot'] for move in moves], [move['sublot'] for move in moves], [move['previous_bag'] for move in moves], target_bag, len(moves))
+    operations = [
+        (_MOVE_QUERY, params),
+        ("SELECT currval('change_version_seq') AS version", None)
+    ]
+
+    _ensure_event_partitions()
+    results = execute_transaction(operations, stop_if_missing=True)
+    if results[0] is None:
+        raise ConflictError("Some of these plasmids were changed by someone else while moving - nothing was moved. Reload and try again.")
+    moved = results[0]['moved']
+
+    # Notify after commit, about the rows that actually moved
+    records = [{key: row[key] for key in ('lot', 'sublot', 'bag', 'previous_bag')} for row in moved]
+    notify_write_listeners('modified', records)
+    _announce_committed_changes('modified', records, results[1][0]['version'])
+
+    print(f"SUCCESS: Moved {len(moved)} record(s) to {target_bag}")
+    return {'moved_count': len(moved), 'plasmids': moved, 'unchanged': unchanged}
+
+### END MOVE #######################################
+
+### CHECKOUT / CHECKIN ###############################
+# Checkout and checkin update a single sample row with a conditional UPDATE, so two people
+# taking tubes at the same time never overwrite each other - Postgres re-checks the condition
+# after waiting on the row lock, and only the losing request gets a ConflictError.
+
+_SAMPLE_STATE_UPDATE = """
+    WITH target AS (
+        SELECT s.id, s.volume AS previous_volume
+        FROM samples s
+                 JOIN plasmids p ON p.id = s.plasmid_id
+        WHERE p.lot = %s AND p.sublot = %s AND p.bag = %s
+        ORDER BY s.id
+        OFFSET %s LIMIT 1
+    ), changed AS (
+        UPDATE samples s
+        SET {assignments}, version = nextval('change_version_seq')
+        FROM target
+        WHERE s.id = target.id
+          AND s.is_checked_out = %s
+          AND (%s::BIGINT IS NULL OR s.version = %s::BIGINT)
+        RETURNING s.plasmid_id, s.version, s.volume, s.checked_out_by, target.previous_volume
+    ), bumped AS (
+        UPDATE plasmids p
+        SET version = nextval('change_version_seq')
+        FROM changed
+        WHERE p.id = changed.plasmid_id
+        RETURNING p.version
+    ), logged AS (
+        INSERT INTO sample_events (event_type, lot, sublot, bag, sample_index, actor, volume, previous_volume)
+        SELECT %s, %s, %s, %s, %s, changed.checked_out_by, changed.volume, changed.previous_volume
+        FROM changed
+    )
+    SELECT changed.version AS sample_version, bumped.version AS plasmid_version
+    FROM changed, bumped
+"""
+
+def checkout_sample(plasmid, sample_index, checked_out_by, expected_version=None):
+    """Atomically check out one sample - only succeeds if it is still in the freezer
+
+    Args:
+        plasmid: Plasmid identifying the record (lot, sublot, bag)
+        sample_index: index of the sample within the record (samples ordered as returned by find)
+        checked_out_by: name of the person taking the sample
+        expected_version: sample version the client loaded; if given, the checkout fails when it changed
+
+    Raises:
+        ConflictError: sample was already checked out or changed by someone else
+        ValueError: sample does not exist
+    """
+    query = _SAMPLE_STATE_UPDATE.format(assignments="is_checked_out = true, checked_out_by = %s, checked_out_at = NOW()")
+    params = (plasmid.lot, plasmid.sublot, plasmid.bag, sample_index, checked_out_by, False, expected_version, expected_version,
+              'checkout', plasmid.lot, plasmid.sublot, plasmid.bag, sample_index)
+    return _change_sample_state(plasmid, sample_index, query, params, expected_version, want_checked_out=True)
+
+def checkin_sample(plasmid, sample_index, expected_version=None, volume=None):
+    """Atomically check in one sample - only succeeds if it is currently checked out
+
+    checked_out_by and checked_out_at are kept for history. If a volume is given (what is
+    left in the tube), it is saved with the checkin.
+    """
+    assignments = """is_checked_out = false, checked_in_at = NOW(),
+                     volume = COALESCE(%s::DECIMAL, s.volume),
+                     date_modified = CASE WHEN %s::DECIMAL <> s.volume THEN NOW() ELSE s.date_modified END"""
+    query = _SAMPLE_STATE_UPDATE.format(assignments=assignments)
+    params = (plasmid.lot, plasmid.sublot, plasmid.bag, sample_index, volume, volume, True, expected_version, expected_version,
+              'checkin', plasmid.lot, plasmid.sublot, plasmid.bag, sample_index)
+    return _change_sample_state(plasmid, sample_index, query, params, expected_version, want_checked_out=False)
+
+def _change_sample_state(plasmid, sample_index, query, params, expected_version, want_checked_out):
+    """Run a conditional sample update and turn a miss into a clear error"""
+    records = [{
+        'lot': plasmid.lot,
+        'sublot': plasmid.sublot,
+        'bag': plasmid.bag,
+        'sample_index': sample_index
+    }]
+    operations = [(query, params)]
+    operations.extend(_change_notifications('modified', records))
+    _ensure_event_partitions()
+    result = execute_transaction(operations, stop_if_missing=True)[0]
+
+    if result is None:
+        # Nothing was updated - find out why so the client gets a useful answer
+        raise sample_state_error(plasmid, sample_index, _sample_state(plasmid, sample_index), expected_version, want_checked_out)
+    notify_write_listeners('modified', records)
+
+    print(f"SUCCESS: Sample {sample_index} of {plasmid.lot}-{plasmid.sublot} {'checked out' if want_checked_out else 'checked in'}")
+    return {'lot': plasmid.lot, 'sublot': plasmid.sublot, 'bag': plasmid.bag,
+            'sample_version': result['sample_version'], 'version': result['plasmid_version']}
+
+def _sample_state(plasmid, sample_index):
+    query = """
+        SELECT s.is_checked_out, s.checked_out_by, s.version
+        FROM samples s
+                 JOIN plasmids p ON p.id = s.plasmid_id
+        WHERE p.lot = %s AND p.sublot = %s AND p.bag = %s
+        ORDER BY s.id
+        OFFSET %s LIMIT 1
+    """
+    return execute_sql(query, (plasmid.lot, plasmid.sublot, plasmid.bag, sample_index), fetch_one=True)
+
+def _plasmid_exists(plasmid):
+    query = "SELECT 1 AS found FROM plasmids WHERE lot = %s AND sublot = %s AND bag = %s"
+    return execute_sql(query, (plasmid.lot, plasmid.sublot, plasmid.bag), fetch_one=True) is not None
+
+### END CHECKOUT / CHECKIN ###########################
+
+### SAMPLE HISTORY ###################################
+# sample_events is an append-only ledger (checkout, checkin, volume_change, move, delete),
+# range-partitioned by month on occurred_at. Partitions for this month and next are created
+# on demand by the write paths; anything outside them lands in sample_events_default.
+
+SAMPLE_EVENT_TYPES = ('checkout', 'checkin', 'volume_change', 'move', 'delete')
+
+_event_partitions_ready = set()
+
+def _ensure_event_partitions():
+    """Make sure the sample_events partitions for the current and next month exist (once per process per month)"""
+    from datetime import date
+
+    today = date.today()
+    this_month = date(today.year, today.month, 1)
+    next_month = date(this_month.year + this_month.month // 12, this_month.month % 12 + 1, 1)
+    month_after = date(next_month.year + next_month.month // 12, next_month.month % 12 + 1, 1)
+
+    for start, end in ((this_month, next_month), (next_month, month_after)):
+        if start in _event_partitions_ready:
+            continue
+        query = f"""
+            CREATE TABLE IF NOT EXISTS sample_events_{start:%Y_%m}
+            PARTITION OF sample_events FOR VALUES FROM ('{start}') TO ('{end}')
+        """
+        try:
+            execute_sql(query)
+            _event_partitions_ready.add(start)
+        except ValueError as e:
+            # e.g. another process created it first, or the default partition already holds rows for that month
+            print(f"WARNING: Could not create sample_events partition for {start:%Y-%m}: {e}")
+
+def find_sample_history(plasmid=None, since=None, until=None, event_types=None, actor=None, limit=500):
+    """Sample events, newest first
+
+    Args:
+        plasmid: Plasmid (lot/sublot, optionally bag) to restrict to
+        since / until: datetimes bounding occurred_at - these prune partitions, so pass them for long histories
+        event_types: list of SAMPLE_EVENT_TYPES to include
+        actor: only events by this person (checkout/checkin)
+        limit: maximum number of events
+    """
+    conditions, params = [], []
+
+    if plasmid is not None:
+        conditions.append("lot = %s AND sublot = %s")
+        params.extend([plasmid.lot, plasmid.sublot])
+        if plasmid.bag:
+            conditions.append("(bag = %s OR previous_bag = %s)")
+            params.extend([plasmid.bag, plasmid.bag])
+    if since is not None:
+        conditions.append("occurred_at >= %s")
+        params.append(since)
+    if until is not None:
+        conditions.append("occurred_at < %s")
+        params.append(until)
+    if event_types:
+        conditions.append("event_type = ANY(%s)")
+        params.append(list(event_types))
+    if actor:
+        conditions.append("LOWER(actor) = LOWER(%s)")
+        params.append(actor)
+
+    query = """
+        SELECT occurred_at, event_type, lot, sublot, bag, sample_index, actor, volume, previous_volume, previous_bag
+        FROM sample_events
+    """
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY occurred_at DESC, id DESC LIMIT %s"
+    params.append(limit)
+
+    return execute_read(query, params)
+
+### END SAMPLE HISTORY ###############################
+
 def _bag_number_in_range(bag_name):
     """Validate that bag number is not more than +1 of the highest existing bag"""
-    requested_num = int(bag_name[1:])
-    
+    return _bag_numbers_in_range([bag_name])
+
+def _bag_numbers_in_range(bag_names):
+    """Validate a batch of bags against the highest existing bag with a single query"""
+    return check_bag_numbers(bag_names, get_max_bag_number())
+
+def get_max_bag_number():
+    """Highest existing bag number, or None for an empty inventory"""
     query = """
             SELECT MAX(CAST(SUBSTRING(bag FROM 2) AS INTEGER)) as max_num
             FROM plasmids 
@@ -437,12 +1263,7 @@ def _bag_number_in_range(bag_name):
         """
     
     result = execute_sql(query)
-    if result and result[0]['max_num'] is not None:
-        max_existing = result[0]['max_num']
-        if requested_num > max_existing + 1:
-            raise ValueError(f"Bag number C{requested_num} is not allowed. Please increment bags. Most recent bag number is: C{max_existing}")
-    
-    return True
+    return result[0]['max_num'] if result else None
 
 ##todo: not used - delete
 def _generate_bag_number():
@@ -471,31 +1292,78 @@ def execute_sql(query, params=None, fetch_one=False):
     """Execute single SQL query with centralized error handling"""
     return execute_transaction([(query, params)])[0] if not fetch_one else execute_transaction([(query, params)], fetch_one=True)[0]
 
-def execute_transaction(operations, fetch_one=False):
+def execute_read(query, params=None):
+    """Execute a read-only SELECT on the read replica when routing allows, otherwise on the primary"""
+    if read_router.use_replica():
+        try:
+            with db.connection(replica=True) as conn:
+                return _run_transaction(conn, [(query, params)])[0]
+        except QueryTimeoutError:
+            raise  # the primary would not be any faster
+        except (ValueError, psycopg2.Error) as e:
+            # e.g. the standby went away or cancelled the query for a recovery conflict
+            print(f"WARNING: Read replica query failed, retrying on primary: {e}")
+            read_router.mark_replica_down()
+    try:
+        return execute_sql(query, params)
+    except DatabaseUnavailableError:
+        # Most likely a pooled connection that died with a server restart - the retry gets a fresh one
+        # (reads only; a write may have committed before the connection dropped)
+        return execute_sql(query, params)
+
+# Advisory lock held shared by every write transaction while it stamps change versions (see
+# get_current_version). Named after the sequence it guards; Postgres derives the lock key with
+# hashtext(), so the key is the same in every session and no magic number has to stay unique.
+_VERSION_STAMP_LOCK = 'change_version_seq'
+
+def execute_transaction(operations, fetch_one=False, stop_if_missing=False):
     """
     Execute multiple SQL operations in a single transaction with centralized error handling
     
     Args:
-        operations: List of (query, params) tuples
+        operations: List of (query, params) tuples, or (query, params, 'all') to fetch all returned rows
         fetch_one: Return single row for SELECT queries
+        stop_if_missing: Roll back and stop as soon as a RETURNING operation matches no row
+            (the results so far are returned, ending with None) - for conditional writes
     
     Returns:
         List of results for each operation
     """
-    conn = db.connect()
+    writes = any(not operation[0].strip().upper().startswith('SELECT') for operation in operations)
+    with db.connection() as conn:
+        try:
+            return _run_transaction(conn, operations, fetch_one, stop_if_missing, stamps_versions=writes)
+        finally:
+            if writes:
+                read_router.note_write()
+
+def _run_transaction(conn, operations, fetch_one=False, stop_if_missing=False, stamps_versions=False):
     try:
         with conn.cursor(cursor_factory=RealDictCursor) as cur:
             results = []
+
+            timeout_ms = _statement_timeout_ms()
+            if timeout_ms is not None:
+                cur.execute("SET LOCAL statement_timeout = %s", (timeout_ms,))
+            if stamps_versions:
+                cur.execute("SELECT pg_advisory_xact_lock_shared(hashtext(%s))", (_VERSION_STAMP_LOCK,))
             
-            for query, params in operations:
+            for operation in operations:
+                query, params = operation[0], operation[1]
                 cur.execute(query, params)
                 
-                # Handle different return types
-                if query.strip().upper().startswith('SELECT'):
+                # Handle different return types ('all' as a third element fetches every row, e.g. for CTEs)
+                if len(operation) > 2 and operation[2] == 'all':
+                    results.append(cur.fetchall())
+                elif query.strip().upper().startswith('SELECT'):
                     result = cur.fetchone() if fetch_one else cur.fetchall()
                     results.append(result)
                 elif 'RETURNING' in query.upper():
-                    results.append(cur.fetchone())
+                    result = cur.fetchone()
+                    results.append(result)
+                    if result is None and stop_if_missing:
+                        conn.rollback()
+                        return results
                 elif query.strip().upper().startswith(('INSERT', 'UPDATE', 'DELETE')):
                     results.append(cur.rowcount)
                 else:
@@ -510,16 +1378,27 @@ def execute_transaction(operations, fetch_one=False):
             raise ValueError("Record already exists in this bag - duplicate entry. Please add new sample to existing record.")
         else:
             raise ValueError(f"Data constraint error: {e}")
+    except psycopg2.extensions.QueryCanceledError as e:
+        conn.rollback()
+        print(f"WARNING: Query cancelled at the request deadline: {e}")
+        raise QueryTimeoutError("Query took too long and was cancelled - try a narrower request")
     except psycopg2.Error as e:
+        if _is_connection_error(e, conn):
+            # Nothing to roll back on a dead connection - the pool discards it
+            print(f"ERROR: Database connection lost: {e}")
+            raise DatabaseUnavailableError(f"Database connection lost: {e}")
         conn.rollback()
+        if e.pgcode in _TRANSACTION_CONFLICT_CODES:
+            print(f"WARNING: Transaction aborted by a concurrent one: {e}")
+            raise ConflictError("This change collided with another one at the same moment and was not saved. Try again.")
         print(f"ERROR: Database error: {e}")
         raise ValueError(f"Database operation failed: {e}")
     except Exception as e:
-        conn.rollback()
+        if not conn.closed:
+            conn.rollback()
         print(f"ERROR: Unexpected error: {e}")
         raise
 
-
 #----------------------------
 # Testing
 #----------------------------
@@ -4,12 +4,13 @@ import re
 
 class Plasmid:
     # empties for records that exist (samples/volumes and notes), None for temp objects
-    def __init__(self, lot, sublot, bag, samples, notes=None, date_added=None):
+    def __init__(self, lot, sublot, bag, samples, notes=None, date_added=None, version=None):
         self._lot, self._sublot = self.validate_plasmid_format(lot=lot, sublot=sublot) #must exist and be valid
         self._bag = self.validate_bag(bag) #must exist and be valid
         self._samples = SampleCollection(samples) #turns into empty plasmid_collection if None/empty. None means uninitialized, empty means no samples (for old database records)
         self.notes = self._normalize_notes(notes) #no none, just empty if record exists
         self.date_added = date_added
+        self.version = version #change version from database, None for records not yet saved
 
     @classmethod
     def from_id(cls, full_plasmid, bag, samples, notes=None):
@@ -48,6 +49,8 @@ class Plasmid:
         instance._bag = cls.validate_bag(bag) if bag is not None else None
         instance._samples = SampleCollection(samples) if samples is not None else None
         instance.notes = cls._normalize_notes(notes) if notes is not None else None
+        instance.date_added = None
+        instance.version = None
         return instance
 
     def __str__(self):
@@ -64,7 +67,8 @@ class Plasmid:
             'bag': self.bag,
             'samples': self._samples.to_dict() if self._samples else [],
             'notes': self.notes,
-            'date_added': self.date_added
+            'date_added': self.date_added,
+            'version': self.version
         }
 
     def __eq__(self, other):
@@ -255,23 +259,11 @@ class PlasmidCollection:
 
     def find_missing(self, found_collection):
         """Find which plasmids weren't found in database"""
-        requested_set = self.get_lot_sublot_tuples()
-        found_set = found_collection.get_lot_sublot_tuples()
-        missing_tuples = requested_set - found_set
-        return [f"{lot}-{sublot}" for lot, sublot in missing_tuples]
+        return _find_missing(self.get_lot_sublot_tuples(), found_collection)
 
     def group_by_bags(self):
         """Group plasmids by their bag numbers"""
-        from collections import defaultdict
-        bag_groups = defaultdict(list)
-
-        for plasmid in self.plasmids:
-            if plasmid.bag:  # Only group if record has bag (from database)
-                bag_groups[plasmid.bag].append(plasmid.to_dict())
-            else:
-                raise ValueError("seems something doesnt have a bag! fix this")
-
-        return dict(bag_groups)
+        return _group_by_bags(self.plasmids)
 
 
 
@@ -309,10 +301,70 @@ class PlasmidCollection:
         self.plasmids.extend(other_collection.plasmids)
 
 
+class LazyPlasmidCollection:
+    """Read-only plasmid collection that streams its records instead of holding them
+
+    Backed by a function that opens a fresh iterator of Plasmid objects (e.g. a server-side
+    database cursor) each time the collection is iterated, so huge result sets are processed
+    one record at a time. Supports iteration, group_by_bags, find_missing and the lot/sublot
+    helpers; there is no len() or indexing since that would mean materializing everything.
+    """
+    def __init__(self, open_plasmids):
+        self._open_plasmids = open_plasmids
+
+    def __iter__(self):
+        return iter(self._open_plasmids())
+
+    def get_lots_sublots(self):
+        """Extract lot/sublot pairs for database queries"""
+        lots, sublots = [], []
+        for plasmid in self:
+            lots.append(plasmid.lot)
+            sublots.append(plasmid.sublot)
+        return lots, sublots
+
+    def get_lot_sublot_tuples(self):
+        """Get as tuples for set operations"""
+        return {(p.lot, p.sublot) for p in self}
+
+    def find_missing(self, found_collection):
+        """Find which plasmids weren't found in database"""
+        return _find_missing(self.get_lot_sublot_tuples(), found_collection)
+
+    def group_by_bags(self):
+        """Group plasmids by their bag numbers"""
+        return _group_by_bags(self)
+
+    def to_collection(self):
+        """Materialize into a regular PlasmidCollection"""
+        return PlasmidCollection(list(self))
+
+
+def _find_missing(requested_set, found_plasmids):
+    """Lot-sublot ids in requested_set that never show up while iterating found_plasmids"""
+    missing_tuples = set(requested_set)
+    for plasmid in found_plasmids:
+        missing_tuples.discard((plasmid.lot, plasmid.sublot))
+    return [f"{lot}-{sublot}" for lot, sublot in missing_tuples]
+
+def _group_by_bags(plasmids):
+    """Group an iterable of plasmids by bag in a single pass"""
+    from collections import defaultdict
+    bag_groups = defaultdict(list)
+
+    for plasmid in plasmids:
+        if plasmid.bag:  # Only group if record has bag (from database)
+            bag_groups[plasmid.bag].append(plasmid.to_dict())
+        else:
+            raise ValueError("seems something doesnt have a bag! fix this")
+
+    return dict(bag_groups)
+
+
 
 
 class Sample:
-    def __init__(self, volume, date_created=None, date_modified=None, is_checked_out=False, checked_out_by=None, checked_out_at=None, checked_in_at=None):
+    def __init__(self, volume, date_created=None, date_modified=None, is_checked_out=False, checked_out_by=None, checked_out_at=None, checked_in_at=None, version=None):
         self.volume = self.validate_volume(volume)
         ## metadata for sample volume tracking
         self.date_created = self._parse_date(date_created) if date_created else datetime.datetime.now()
@@ -322,6 +374,7 @@ class Sample:
         self.checked_out_by = checked_out_by
         self.checked_out_at = self._parse_date(checked_out_at) if checked_out_at else None
         self.checked_in_at = self._parse_date(checked_in_at) if checked_in_at else None
+        self.version = version #change version from database, None for samples not yet saved
 
     @staticmethod
     def validate_volume(volume):
@@ -430,7 +483,8 @@ class SampleCollection:
             checked_out_by = item.get('checked_out_by')
             checked_out_at = item.get('checked_out_at')
             checked_in_at = item.get('checked_in_at')
-            return Sample(volume, date_created, date_modified, is_checked_out, checked_out_by, checked_out_at, checked_in_at)
+            version = item.get('version')
+            return Sample(volume, date_created, date_modified, is_checked_out, checked_out_by, checked_out_at, checked_in_at, version)
         else:
             # Handle simple volume value (backward compatibility)
             return Sample(item)
@@ -483,7 +537,8 @@ class SampleCollection:
                  'is_checked_out': sample.is_checked_out,
                  'checked_out_by': sample.checked_out_by,
                  'checked_out_at': sample.checked_out_at.isoformat() if sample.checked_out_at else None,
-                 'checked_in_at': sample.checked_in_at.isoformat() if sample.checked_in_at else None} for sample in self._samples]
+                 'checked_in_at': sample.checked_in_at.isoformat() if sample.checked_in_at else None,
+                 'version': sample.version} for sample in self._samples]
 
 
     def sum_sample_volumes(self):
@@ -0,0 +1,276 @@
+import datetime
+import json
+
+
+#----------------------------
+# Shared Storage Logic
+#----------------------------
+# What every storage backend has in common, whatever database it runs on: the SQL that
+# differs between them (SqlDialect), the filter SQL built on top of it, the inventory rules
+# (bag numbering, move planning, checkout errors), inventory versions and the in-process
+# write listeners. plasmid_record_repository.py (Postgres) and plasmid_backends.py (SQLite)
+# both build on it, so a rule or a filter is written once.
+
+class ConflictError(ValueError):
+    """A write lost a race - the record changed since the client loaded it"""
+
+
+# Record fields a search can be narrowed to (see find_plasmid_fields_by_search)
+PLASMID_FIELDS = ('lot', 'sublot', 'bag', 'notes', 'date_added', 'version', 'samples')
+
+
+### SQL DIALECTS ###
+
+class SqlDialect:
+    """The pieces of SQL that differ between backends, for conditions over plasmids aliased as p"""
+    name = None
+    placeholder = None
+    # The bag number of p.bag ("C25" -> 25) - written to match the backend's expression index
+    bag_number = None
+    # Matches (p.lot, p.sublot) against a list of ids passed as id_list_params(ids)
+    id_list_condition = None
+
+    def id_list_params(self, ids):
+        raise NotImplementedError
+
+    def in_list(self, column, values):
+        """column IN values - (condition, params)"""
+        raise NotImplementedError
+
+
+class PostgresDialect(SqlDialect):
+    name = 'postgres'
+    placeholder = '%s'
+    bag_number = "CAST(SUBSTRING(p.bag FROM 2) AS INTEGER)"
+    # Lot and sublot arrays unnested together in FROM give the planner a real relation to
+    # semi-join on idx_plasmids_lot_sublot, which stays fast for thousands of ids
+    # (SELECT UNNEST(a), UNNEST(b) in a select list is estimated badly)
+    id_list_condition = "(p.lot, p.sublot) IN (SELECT lot, sublot FROM UNNEST(%s::INTEGER[], %s::INTEGER[]) AS ids(lot, sublot))"
+
+    def id_list_params(self, ids):
+        return [[lot for lot, _ in ids], [sublot for _, sublot in ids]]
+
+    def in_list(self, column, values):
+        return f"{column} = ANY(%s)", [list(values)]
+
+
+class SQLiteDialect(SqlDialect):
+    name = 'sqlite'
+    placeholder = '?'
+    bag_number = "CAST(SUBSTR(p.bag, 2) AS INTEGER)"
+    # Lot-sublot pairs passed as one JSON array parameter - SQLite has no array type
+    id_list_condition = "(p.lot, p.sublot) IN (SELECT json_extract(value, '$[0]'), json_extract(value, '$[1]') FROM json_each(?))"
+
+    def id_list_params(self, ids):
+        return [json.dumps([[lot, sublot] for lot, sublot in ids])]
+
+    def in_list(self, column, values):
+        return f"{column} IN ({', '.join('?' * len(values))})", list(values)
+
+
+POSTGRES = PostgresDialect()
+SQLITE = SQLiteDialect()
+
+
+### FILTERS ###
+
+def build_filter_conditions(filters, dialect=POSTGRES):
+    """Build WHERE clause conditions and parameters from filter dictionary
+
+    Args:
+        filters: Dict containing filter options
+        dialect: SqlDialect the conditions are written for
+
+    Returns:
+        tuple: (list of condition strings, list of parameters)
+    """
+    if not filters:
+        return [], []
+
+    conditions = []
+    params = []
+    p = dialect.placeholder
+
+    # Checkout status filter
+    if 'checked_out' in filters:
+        if filters['checked_out']:
+            # Only plasmids with at least one checked out sample
+            conditions.append("EXISTS (SELECT 1 FROM samples s2 WHERE s2.plasmid_id = p.id AND s2.is_checked_out = true)")
+        else:
+            # Only plasmids with no checked out samples
+            conditions.append("NOT EXISTS (SELECT 1 FROM samples s2 WHERE s2.plasmid_id = p.id AND s2.is_checked_out = true)")
+
+    # Time-based filters
+    if 'time_filter' in filters and filters['time_filter'] != 'all':
+        time_condition, time_params = _build_time_filter(
+            filters['time_filter'],
+            filters.get('time_filter_type', 'added'),
+            dialect
+        )
+        if time_condition:
+            conditions.append(time_condition)
+            params.extend(time_params)
+
+    # Custom date range filter
+    if 'date_range' in filters and filters['date_range']:
+        start_date, end_date = filters['date_range']
+        filter_type = filters.get('time_filter_type', 'added')
+
+        if filter_type == 'added':
+            conditions.append(f"p.date_added BETWEEN {p} AND {p}")
+            params.extend([start_date, end_date])
+        else:  # modified - check sample dates
+            conditions.append(f"EXISTS (SELECT 1 FROM samples s2 WHERE s2.plasmid_id = p.id AND s2.date_modified BETWEEN {p} AND {p})")
+            params.extend([start_date, end_date])
+
+    # Specific bags filter
+    if 'bags' in filters and filters['bags']:
+        bag_placeholders = ",".join([p] * len(filters['bags']))
+        conditions.append(f"UPPER(p.bag) IN ({bag_placeholders})")
+        params.extend([bag.upper() for bag in filters['bags']])
+
+    # Volume filter
+    if 'has_volume' in filters:
+        if filters['has_volume']:
+            # Only plasmids with samples that have volume > 0
+            conditions.append("EXISTS (SELECT 1 FROM samples s2 WHERE s2.plasmid_id = p.id AND s2.volume > 0)")
+        else:
+            # Only plasmids with no volume or volume = 0
+            conditions.append("NOT EXISTS (SELECT 1 FROM samples s2 WHERE s2.plasmid_id = p.id AND s2.volume > 0)")
+
+    return conditions, params
+
+def _build_time_filter(time_filter, filter_type='added', dialect=POSTGRES):
+    """Build time-based filter conditions
+
+    Args:
+        time_filter: 'this_month', 'last_6_months', 'last_12_months'
+        filter_type: 'added' (date_added) or 'modified' (sample dates)
+        dialect: SqlDialect the condition is written for
+
+    Returns:
+        tuple: (condition string, list of parameters)
+    """
+    now = datetime.datetime.now()
+
+    if time_filter == 'this_month':
+        start_date = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    elif time_filter == 'last_6_months':
+        start_date = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        # Go back 6 months
+        for _ in range(6):
+            if start_date.month == 1:
+                start_date = start_date.replace(year=start_date.year - 1, month=12)
+            else:
+                start_date = start_date.replace(month=start_date.month - 1)
+    elif time_filter == 'last_12_months':
+        start_date = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        start_date = start_date.replace(year=start_date.year - 1)
+    else:
+        return None, []
+
+    if filter_type == 'added':
+        condition = f"p.date_added >= {dialect.placeholder}"
+        return condition, [start_date]
+    else:  # modified - check sample modification dates
+        condition = f"EXISTS (SELECT 1 FROM samples s2 WHERE s2.plasmid_id = p.id AND s2.date_modified >= {dialect.placeholder})"
+        return condition, [start_date]
+
+
+### INVENTORY VERSION ###
+
+def inventory_version(plasmids):
+    """Version of a loaded inventory - every write stamps its plasmid with a new, higher version,
+    and deletes change the count, so any committed change yields a different value"""
+    versions = [plasmid.version for plasmid in plasmids]
+    return format_inventory_version(len(versions), max(versions, default=None), sum(versions))
+
+def format_inventory_version(plasmid_count, max_version, version_sum):
+    """The inventory version from the plasmid count, highest and summed plasmid version"""
+    return f"{plasmid_count}-{int(max_version or 0)}-{int(version_sum or 0)}"
+
+
+### INVENTORY RULES ###
+
+def check_bag_numbers(bag_names, max_existing):
+    """Bags may be at most one past the highest existing bag number (max_existing, None for an empty inventory)"""
+    if max_existing is None:
+        return True
+
+    for bag_name in bag_names:
+        requested_num = int(bag_name[1:])
+        if requested_num > max_existing + 1:
+            raise ValueError(f"Bag number C{requested_num} is not allowed. Please increment bags. Most recent bag number is: C{max_existing}")
+
+    return True
+
+def plan_move(locations, target_bag, requested=None, source_bag=None):
+    """Work out a bulk move from every location of the candidate ids - (moves, unchanged ids)
+
+    Raises ValueError naming every id that cannot be moved, so one bad id rejects the batch
+    with the full list of problems instead of the first one.
+    """
+    if source_bag == target_bag:
+        raise ValueError(f"Source and target bag are both {target_bag}")
+
+    bags_by_id = {}
+    for location in locations:
+        bags_by_id.setdefault((location['lot'], location['sublot']), set()).add(location['bag'])
+
+    moves, unchanged, missing, ambiguous, duplicates = [], [], [], [], []
+    for lot, sublot in (requested if requested is not None else sorted(bags_by_id)):
+        plasmid_id = f"{lot}-{sublot}"
+        bags = bags_by_id.get((lot, sublot), set())
+        sources = bags & {source_bag} if source_bag else bags - {target_bag}
+        if not sources:
+            if target_bag in bags:
+                unchanged.append(plasmid_id)
+            else:
+                missing.append(plasmid_id + (f" in {source_bag}" if source_bag else ""))
+        elif len(sources) > 1:
+            ambiguous.append(f"{plasmid_id} ({', '.join(sorted(sources))})")
+        elif target_bag in bags:
+            duplicates.append(plasmid_id)
+        else:
+            moves.append({'lot': lot, 'sublot': sublot, 'bag': target_bag, 'previous_bag': sources.pop()})
+
+    problems = []
+    if missing:
+        problems.append(f"not found: {', '.join(missing)}")
+    if ambiguous:
+        problems.append(f"in several bags, give the bag to move from: {', '.join(ambiguous)}")
+    if duplicates:
+        problems.append(f"already in {target_bag} - duplicate entry: {', '.join(duplicates)}")
+    if problems:
+        raise ValueError("Nothing was moved - " + "; ".join(problems))
+    return moves, unchanged
+
+def sample_state_error(plasmid, sample_index, current, expected_version, want_checked_out):
+    """The error for a checkout/checkin that updated nothing, given the sample's current state (None if missing)"""
+    if current is None:
+        return ValueError(f"Sample {sample_index} of plasmid {plasmid.lot}-{plasmid.sublot} not found in {plasmid.bag}")
+    if bool(current['is_checked_out']) == want_checked_out:
+        if want_checked_out:
+            return ConflictError(f"Sample {sample_index} of plasmid {plasmid.lot}-{plasmid.sublot} is already checked out by {current['checked_out_by']}")
+        return ConflictError(f"Sample {sample_index} of plasmid {plasmid.lot}-{plasmid.sublot} is not checked out")
+    if expected_version is not None and current['version'] != expected_version:
+        return ConflictError(f"Sample {sample_index} of plasmid {plasmid.lot}-{plasmid.sublot} was changed by someone else. Reload and try again.")
+    return ConflictError(f"Sample {sample_index} of plasmid {plasmid.lot}-{plasmid.sublot} changed while updating. Try again.")
+
+
+### WRITE LISTENERS ###
+
+# In-process callbacks run right after a write commits (e.g. cache invalidation) - unlike
+# NOTIFY they run before the write call returns, so the writer's next read sees fresh data
+_write_listeners = []
+
+def register_write_listener(listener):
+    """Call listener(kind, records) after every committed write, with the same records as the NOTIFY payload"""
+    _write_listeners.append(listener)
+
+def notify_write_listeners(kind, records):
+    for listener in list(_write_listeners):
+        try:
+            listener(kind, records)
+        except Exception as e:
+            print(f"WARNING: Write listener {listener} failed: {e}")
@@ -0,0 +1,148 @@
+import cProfile
+import hmac
+import io
+import itertools
+import os
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+from collections import deque
+from datetime import datetime
+
+
+#----------------------------
+# Request Profiling
+#----------------------------
+# Off unless PROFILE_ADMIN_TOKEN or PROFILE_SAMPLE_RATE is set - app.py only installs the
+# request hooks when it is on, so a normal deployment pays nothing for it. A request is
+# profiled when it carries "X-Profile-Token: <PROFILE_ADMIN_TOKEN>", or at random at
+# PROFILE_SAMPLE_RATE (0.01 = 1% of requests). It then runs under cProfile (its own
+# thread only) and tracemalloc, and the result is kept in memory for /api/admin/profiles.
+#
+# tracemalloc is process-wide: allocation sites of a profiled request also include
+# whatever requests ran alongside it.
+
+PROFILE_HEADER = 'X-Profile-Token'
+
+
+class RequestProfiler:
+    """Profiles selected requests and keeps the last max_profiles results"""
+
+    def __init__(self, admin_token=None, sample_rate=0.0, max_profiles=50, top_functions=40, top_allocations=20):
+        self.admin_token = admin_token
+        self.sample_rate = sample_rate
+        self.top_functions = top_functions
+        self.top_allocations = top_allocations
+        self._profiles = deque(maxlen=max_profiles)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._tracing = 0  # profiled requests in flight - tracemalloc runs while any are
+
+    @property
+    def enabled(self):
+        return bool(self.admin_token) or self.sample_rate > 0
+
+    def is_admin(self, headers):
+        token = headers.get(PROFILE_HEADER)
+        return bool(self.admin_token) and token is not None and hmac.compare_digest(token, self.admin_token)
+
+    def should_profile(self, headers):
+        return self.is_admin(headers) or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    def start(self):
+        """Begin profiling the current request - pass the result to finish()"""
+        with self._lock:
+            if self._tracing == 0:
+                tracemalloc.start(10)
+            self._tracing += 1
+        allocations_before = tracemalloc.take_snapshot()
+        profile = cProfile.Profile()
+        started = time.perf_counter()
+        profile.enable()
+        return profile, started, allocations_before
+
+    def finish(self, session, method, path, endpoint, status_code):
+        profile, started, allocations_before = session
+        profile.disable()
+        duration = time.perf_counter() - started
+        try:
+            allocations_after = tracemalloc.take_snapshot()
+        finally:
+            with self._lock:
+                self._tracing -= 1
+                if self._tracing == 0:
+                    tracemalloc.stop()
+
+        stats = pstats.Stats(profile)
+        record = {
+            'id': next(self._ids),
+            'method': method,
+            'path': path,
+            'endpoint': endpoint,
+            'status': status_code,
+            'duration_ms': round(duration * 1000, 2),
+            'profiled_at': datetime.now().isoformat(),
+            'functions': _top_functions(stats, self.top_functions),
+            'allocations': _top_allocations(allocations_after, allocations_before, self.top_allocations),
+            'stats_text': _stats_text(stats, self.top_functions),
+        }
+        with self._lock:
+            self._profiles.append(record)
+        return record
+
+    def list_profiles(self):
+        """Summaries of the kept profiles, newest first"""
+        with self._lock:
+            profiles = list(self._profiles)
+        return [{key: profile[key] for key in ('id', 'method', 'path', 'endpoint', 'status', 'duration_ms', 'profiled_at')}
+                for profile in reversed(profiles)]
+
+    def get_profile(self, profile_id):
+        with self._lock:
+            for profile in self._profiles:
+                if profile['id'] == profile_id:
+                    return profile
+        return None
+
+    def clear(self):
+        with self._lock:
+            self._profiles.clear()
+
+
+def _top_functions(stats, limit):
+    """Functions by cumulative time - where the request's time went"""
+    rows = []
+    for (filename, line, name), (calls, primitive_calls, total_time, cumulative_time, _) in stats.stats.items():
+        rows.append({
+            'function': f"{os.path.basename(filename)}:{line}({name})",
+            'calls': calls,
+            'total_ms': round(total_time * 1000, 3),
+            'cumulative_ms': round(cumulative_time * 1000, 3),
+        })
+    rows.sort(key=lambda row: row['cumulative_ms'], reverse=True)
+    return rows[:limit]
+
+def _top_allocations(after, before, limit):
+    """Source lines that allocated the most memory while the request ran"""
+    differences = after.compare_to(before, 'lineno')
+    return [{
+        'site': f"{difference.traceback[0].filename}:{difference.traceback[0].lineno}",
+        'size_kb': round(difference.size_diff / 1024, 1),
+        'count': difference.count_diff,
+    } for difference in differences[:limit] if difference.size_diff > 0]
+
+def _stats_text(stats, limit):
+    output = io.StringIO()
+    stats.stream = output
+    stats.sort_stats('cumulative').print_stats(limit)
+    return output.getvalue()
+
+
+# Global profiler instance
+profiler = RequestProfiler(
+    admin_token=os.getenv('PROFILE_ADMIN_TOKEN') or None,
+    sample_rate=float(os.getenv('PROFILE_SAMPLE_RATE', '0')),
+    max_profiles=int(os.getenv('PROFILE_KEEP', '50'))
+)
@@ -0,0 +1,191 @@
+"""
+Replay a traffic capture (see traffic_capture.py) against a running stack and report how it held up
+
+    python replay_traffic.py capture.jsonl --base-url http://localhost:5000 --concurrency 16 --speedup 4
+
+Requests are sent at their captured spacing divided by --speedup (0 sends them as fast as
+the workers allow), from --concurrency worker threads. Point it at a test stack only -
+captured writes (checkouts, adds, deletes) are replayed too.
+"""
+import argparse
+import base64
+import json
+import queue
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+
+
+#----------------------------
+# Loading
+#----------------------------
+
+def load_capture(path, limit=None):
+    """Captured requests in time order, without those that cannot be replayed"""
+    entries = []
+    with open(path, encoding='utf-8') as capture:
+        for line in capture:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if entry.get('body_omitted'):
+                continue
+            entries.append(entry)
+    entries.sort(key=lambda entry: entry['at'])
+    return entries[:limit] if limit else entries
+
+
+#----------------------------
+# Replay
+#----------------------------
+
+class Replayer:
+    def __init__(self, base_url, username, password, concurrency=8, speedup=1.0, timeout=60):
+        self.base_url = base_url.rstrip('/')
+        self.concurrency = concurrency
+        self.speedup = speedup
+        self.timeout = timeout
+        credentials = base64.b64encode(f"{username}:{password}".encode()).decode()
+        self.headers = {'Authorization': f"Basic {credentials}", 'Accept-Encoding': 'gzip'}
+        self._results = []
+        self._lock = threading.Lock()
+
+    def run(self, entries):
+        """Replay entries and return (results, elapsed seconds) - one result dict per request"""
+        work = queue.Queue()
+        workers = [threading.Thread(target=self._worker, args=(work,), daemon=True) for _ in range(self.concurrency)]
+        for worker in workers:
+            worker.start()
+
+        started = time.monotonic()
+        first_at = entries[0]['at'] if entries else 0
+        for entry in entries:
+            if self.speedup > 0:
+                # Keep the captured spacing (scaled) - workers that fall behind just queue up
+                delay = (entry['at'] - first_at) / self.speedup - (time.monotonic() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            work.put(entry)
+
+        for _ in workers:
+            work.put(None)
+        for worker in workers:
+            worker.join()
+        return self._results, time.monotonic() - started
+
+    def _worker(self, work):
+        while True:
+            entry = work.get()
+            if entry is None:
+                return
+            result = self._send(entry)
+            with self._lock:
+                self._results.append(result)
+
+    def _send(self, entry):
+        url = self.base_url + entry['path']
+        if entry.get('query'):
+            url += '?' + urllib.parse.urlencode(entry['query'])
+        headers = dict(self.headers)
+        data = None
+        if 'body' in entry:
+            data = json.dumps(entry['body']).encode()
+            headers['Content-Type'] = 'application/json'
+
+        request = urllib.request.Request(url, data=data, headers=headers, method=entry['method'])
+        sent = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            status = e.code
+        except (urllib.error.URLError, OSError) as e:
+            status = None
+            print(f"ERROR: {entry['method']} {entry['path']} failed: {e}")
+        return {
+            'endpoint': entry.get('endpoint') or entry['path'],
+            'status': status,
+            'captured_status': entry.get('status'),
+            'latency_ms': (time.perf_counter() - sent) * 1000,
+        }
+
+
+#----------------------------
+# Report
+#----------------------------
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def summarize(results, elapsed):
+    """Per-endpoint counts, error rates and latency percentiles, plus overall throughput"""
+    by_endpoint = defaultdict(list)
+    for result in results:
+        by_endpoint[result['endpoint']].append(result)
+
+    endpoints = {}
+    for endpoint, endpoint_results in sorted(by_endpoint.items()):
+        latencies = [result['latency_ms'] for result in endpoint_results]
+        errors = sum(1 for result in endpoint_results if result['status'] is None or result['status'] >= 500)
+        endpoints[endpoint] = {
+            'requests': len(endpoint_results),
+            'errors': errors,
+            'error_rate': round(errors / len(endpoint_results), 4),
+            'status_changed': sum(1 for result in endpoint_results if result['status'] != result['captured_status']),
+            'p50_ms': round(percentile(latencies, 0.50), 1),
+            'p95_ms': round(percentile(latencies, 0.95), 1),
+            'p99_ms': round(percentile(latencies, 0.99), 1),
+            'max_ms': round(max(latencies), 1),
+        }
+    return {
+        'requests': len(results),
+        'elapsed_seconds': round(elapsed, 2),
+        'throughput_rps': round(len(results) / elapsed, 1) if elapsed > 0 else 0.0,
+        'errors': sum(endpoint['errors'] for endpoint in endpoints.values()),
+        'endpoints': endpoints,
+    }
+
+def print_report(summary):
+    print(f"{summary['requests']} requests in {summary['elapsed_seconds']}s "
+          f"({summary['throughput_rps']} req/s), {summary['errors']} errors")
+    print(f"{'endpoint':<28}{'requests':>9}{'errors':>8}{'changed':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for endpoint, stats in summary['endpoints'].items():
+        print(f"{endpoint:<28}{stats['requests']:>9}{stats['errors']:>8}{stats['status_changed']:>9}"
+              f"{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['p99_ms']:>9}{stats['max_ms']:>9}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay captured API traffic against a test stack")
+    parser.add_argument('capture', help="JSONL file written with CAPTURE_TRAFFIC_PATH")
+    parser.add_argument('--base-url', default='http://localhost:5000')
+    parser.add_argument('--username', default='lab')
+    parser.add_argument('--password', default='lab2024')
+    parser.add_argument('--concurrency', type=int, default=8, help="worker threads sending requests")
+    parser.add_argument('--speedup', type=float, default=1.0, help="replay N times faster than captured, 0 for no pacing")
+    parser.add_argument('--limit', type=int, help="replay only the first N requests")
+    parser.add_argument('--timeout', type=float, default=60, help="per-request timeout in seconds")
+    parser.add_argument('--json', action='store_true', help="print the summary as JSON")
+    args = parser.parse_args()
+
+    entries = load_capture(args.capture, args.limit)
+    if not entries:
+        print("ERROR: No replayable requests in the capture")
+        exit(1)
+
+    print(f"Replaying {len(entries)} requests against {args.base_url} "
+          f"(concurrency {args.concurrency}, speedup {args.speedup:g})...")
+    replayer = Replayer(args.base_url, args.username, args.password, args.concurrency, args.speedup, args.timeout)
+    results, elapsed = replayer.run(entries)
+    summary = summarize(results, elapsed)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_report(summary)
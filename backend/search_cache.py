@@ -0,0 +1,97 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+#----------------------------
+# Search Result Cache
+#----------------------------
+
+class SearchCache:
+    """LRU + TTL cache of search responses keyed on the canonical parsed query
+
+    Every entry remembers the bags and lots of the plasmids it returned plus a matches
+    predicate for plasmids it would newly find, and writes drop the entries they could
+    have changed. A generation counter keeps a search that raced with a write from
+    caching stale results.
+    """
+
+    def __init__(self, max_entries=256, ttl_seconds=60):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (expires_at, bags, lots, matches, value)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def generation(self):
+        """Take before running the query; pass to put() so results older than a write are not cached"""
+        return self._generation
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[4]
+
+    def put(self, key, value, bags, lots, generation, matches=None):
+        """Cache value; matches(lot, sublot, bag) says whether a plasmid written there would join the result"""
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, frozenset(bags), frozenset(lots), matches, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, records):
+        """Drop every entry a write to these plasmids (dicts with lot, sublot, bag, optional previous_bag) could change"""
+        with self._lock:
+            self._generation += 1
+            stale = [key for key, entry in self._entries.items() if any(_affects(entry, record) for record in records)]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+    def on_write(self, kind, records):
+        """Repository write listener - invalidate what a committed write touched"""
+        self.invalidate(records)
+
+
+def _affects(entry, record):
+    _, bags, lots, matches, _ = entry
+    locations = [record['bag']] + ([record['previous_bag']] if record.get('previous_bag') else [])
+    if record['lot'] in lots or any(bag in bags for bag in locations):
+        return True
+    return matches is not None and any(matches(record['lot'], record['sublot'], bag) for bag in locations)
+
+
+# Global search cache instance
+search_cache = SearchCache(
+    max_entries=int(os.getenv('SEARCH_CACHE_SIZE', '256')),
+    ttl_seconds=float(os.getenv('SEARCH_CACHE_TTL', '60'))
+)
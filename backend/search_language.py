@@ -0,0 +1,172 @@
+import re
+
+from plasmid_records import Plasmid
+from plasmid_storage import POSTGRES
+
+
+#----------------------------
+# Search Language
+#----------------------------
+# Terms are separated by commas, semicolons or whitespace, and any mix of them is allowed:
+#   C25               bag
+#   C10-C25, C10..25  bag range
+#   5317              lot (all sublots)
+#   5300..5399        lot range
+#   5317-1            lot-sublot id
+#   5317-1..5317-40   id range (also 5317-1..40, or across lots: 5317-30..5318-5)
+# A query matches a plasmid if any of its terms does. Ranges compile to BETWEEN predicates
+# on indexed columns, so "5300..5399" is one index range scan rather than a 100-item IN list.
+
+_TERM = re.compile(r"""
+    (?P<bag_range> C(?P<bag_lo>\d+) \s*(?:-|\.\.)\s* C?(?P<bag_hi>\d+) )
+  | (?P<bag>       C(?P<bag_no>\d+) )
+  | (?P<id_range>  (?P<range_lot_lo>\d+)-(?P<range_sub_lo>\d+) \s*\.\.\s* (?:(?P<range_lot_hi>\d+)-)?(?P<range_sub_hi>\d+) )
+  | (?P<lot_range> (?P<lot_lo>\d+) \s*\.\.\s* (?P<lot_hi>\d+) )
+  | (?P<id>        (?P<id_lot>\d+)-(?P<id_sub>\d+) )
+  | (?P<lot>       (?P<lot_no>\d+) )-?    # a dangling dash ("3333-") is just the lot
+""", re.IGNORECASE | re.VERBOSE)
+
+_SEPARATOR = re.compile(r"[\s,;]+")
+_TERM_END = re.compile(r"[\s,;]+|$")
+_BAD_TERM = re.compile(r"[^\s,;]+")
+
+SEARCH_HELP = "Expected formats: '5317', '5317-1', '5317-1, 5317-2', '5300..5399', '5317-1..40', 'C25' or 'C10-C25'"
+
+
+class SearchQuery:
+    """A parsed, canonical search - hashable, so equal queries share a cache entry
+
+    Terms are validated, sorted and de-duplicated, and single values already covered by a
+    range are dropped, so "5317, 5300..5399" and "5300..5399" are the same query.
+    """
+
+    def __init__(self, bags=(), bag_ranges=(), lots=(), lot_ranges=(), ids=(), id_ranges=()):
+        self.bag_ranges = _merge_ranges(bag_ranges)
+        self.lot_ranges = _merge_ranges(lot_ranges)
+        self.id_ranges = _merge_ranges(id_ranges)
+        self.bags = tuple(sorted({b for b in bags if not _in_ranges(b, self.bag_ranges)}))
+        self.lots = tuple(sorted({l for l in lots if not _in_ranges(l, self.lot_ranges)}))
+        self.ids = tuple(sorted({i for i in ids if i[0] not in self.lots and not _in_ranges(i[0], self.lot_ranges)
+                                 and not _in_ranges(i, self.id_ranges)}))
+
+    @classmethod
+    def parse(cls, text):
+        """Parse search input, raising ValueError with the offending term"""
+        if not text or not text.strip():
+            raise ValueError("Search input cannot be empty")
+
+        terms = {'bags': [], 'bag_ranges': [], 'lots': [], 'lot_ranges': [], 'ids': [], 'id_ranges': []}
+        leading = _SEPARATOR.match(text)
+        position = leading.end() if leading else 0
+        while position < len(text):
+            match = _TERM.match(text, position)
+            end = match and _TERM_END.match(text, match.end())
+            if not end:
+                bad_term = _BAD_TERM.match(text, position)
+                raise ValueError(f"Invalid format: '{bad_term.group() if bad_term else text[position:]}'. {SEARCH_HELP}")
+            _add_term(terms, match)
+            position = end.end()
+
+        # Only separators (",,,") - an empty OR would compile to "WHERE ()"
+        if not any(terms.values()):
+            raise ValueError("Search input cannot be empty")
+        return cls(**terms)
+
+    def _key(self):
+        return (self.bags, self.bag_ranges, self.lots, self.lot_ranges, self.ids, self.id_ranges)
+
+    def __eq__(self, other):
+        return isinstance(other, SearchQuery) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __str__(self):
+        terms = [f"C{bag}" for bag in self.bags]
+        terms += [f"C{lo}-C{hi}" for lo, hi in self.bag_ranges]
+        terms += [str(lot) for lot in self.lots]
+        terms += [f"{lo}..{hi}" for lo, hi in self.lot_ranges]
+        terms += [f"{lot}-{sublot}" for lot, sublot in self.ids]
+        terms += [f"{lo[0]}-{lo[1]}..{hi[0]}-{hi[1]}" for lo, hi in self.id_ranges]
+        return ", ".join(terms)
+
+    def to_sql(self, dialect=POSTGRES):
+        """Compile to a WHERE clause over plasmids aliased as p - (clause, params) in the
+        placeholder style of dialect (a plasmid_storage.SqlDialect)"""
+        conditions, params = [], []
+        p = dialect.placeholder
+
+        if self.bags:
+            condition, values = dialect.in_list("p.bag", [f"C{bag}" for bag in self.bags])
+            conditions.append(condition)
+            params.extend(values)
+        for lo, hi in self.bag_ranges:
+            # Matches the idx_plasmids_bag_number expression index
+            conditions.append(f"{dialect.bag_number} BETWEEN {p} AND {p}")
+            params.extend([lo, hi])
+        if self.lots:
+            condition, values = dialect.in_list("p.lot", self.lots)
+            conditions.append(condition)
+            params.extend(values)
+        for lo, hi in self.lot_ranges:
+            conditions.append(f"p.lot BETWEEN {p} AND {p}")
+            params.extend([lo, hi])
+        if self.ids:
+            conditions.append(dialect.id_list_condition)
+            params.extend(dialect.id_list_params(self.ids))
+        for lo, hi in self.id_ranges:
+            # Row comparison - an index range scan on idx_plasmids_lot_sublot
+            conditions.append(f"(p.lot, p.sublot) BETWEEN ({p}, {p}) AND ({p}, {p})")
+            params.extend([lo[0], lo[1], hi[0], hi[1]])
+
+        return "(" + " OR ".join(conditions) + ")", params
+
+    def matches(self, lot, sublot, bag):
+        """Whether a plasmid at this lot, sublot and bag would be found by the query"""
+        bag_number = int(bag[1:]) if bag and bag[1:].isdigit() else None
+        return (bag_number in self.bags
+                or (bag_number is not None and _in_ranges(bag_number, self.bag_ranges))
+                or lot in self.lots
+                or _in_ranges(lot, self.lot_ranges)
+                or (lot, sublot) in self.ids
+                or _in_ranges((lot, sublot), self.id_ranges))
+
+
+def _add_term(terms, match):
+    if match.group('bag_range'):
+        lo = int(Plasmid.validate_bag(f"C{match.group('bag_lo')}")[1:])
+        hi = int(Plasmid.validate_bag(f"C{match.group('bag_hi')}")[1:])
+        terms['bag_ranges'].append(_ordered_range(lo, hi, match))
+    elif match.group('bag'):
+        terms['bags'].append(int(Plasmid.validate_bag(match.group('bag'))[1:]))
+    elif match.group('id_range'):
+        lot_lo = Plasmid.validate_lot(match.group('range_lot_lo'))
+        lot_hi = Plasmid.validate_lot(match.group('range_lot_hi') or lot_lo)
+        lo = (lot_lo, Plasmid.validate_sublot(match.group('range_sub_lo')))
+        hi = (lot_hi, Plasmid.validate_sublot(match.group('range_sub_hi')))
+        terms['id_ranges'].append(_ordered_range(lo, hi, match))
+    elif match.group('lot_range'):
+        lo, hi = Plasmid.validate_lot(match.group('lot_lo')), Plasmid.validate_lot(match.group('lot_hi'))
+        terms['lot_ranges'].append(_ordered_range(lo, hi, match))
+    elif match.group('id'):
+        terms['ids'].append(Plasmid.validate_plasmid_format(match.group('id_lot'), match.group('id_sub')))
+    else:
+        terms['lots'].append(Plasmid.validate_lot(match.group('lot_no')))
+
+def _ordered_range(lo, hi, match):
+    if lo > hi:
+        raise ValueError(f"Invalid range '{match.group().strip()}': start is after end")
+    return lo, hi
+
+def _merge_ranges(ranges):
+    """Sort ranges and merge overlapping ones"""
+    merged = []
+    for lo, hi in sorted(ranges):
+        if merged and lo <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], hi))
+        else:
+            merged.append((lo, hi))
+    return tuple(merged)
+
+def _in_ranges(value, ranges):
+    return any(lo <= value <= hi for lo, hi in ranges)
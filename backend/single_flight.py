@@ -0,0 +1,70 @@
+import threading
+
+
+#----------------------------
+# Request Coalescing
+#----------------------------
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Runs identical concurrent reads once and hands every caller the same result
+
+    The first caller for a key runs the function; callers arriving while it is in flight
+    wait for it and share its result (or exception) instead of running their own query.
+    Nothing is kept once the call finishes. A local write starts a new generation, so a
+    request made after a write never joins a read that began before it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}  # (generation, key) -> _Call
+        self._generation = 0
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key, function):
+        with self._lock:
+            flight_key = (self._generation, key)
+            call = self._calls.get(flight_key)
+            leader = call is None
+            if leader:
+                call = self._calls[flight_key] = _Call()
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[flight_key]
+            call.done.set()
+
+    def on_write(self, kind, records):
+        """Repository write listener - later requests must not join reads from before the write"""
+        with self._lock:
+            self._generation += 1
+
+    def stats(self):
+        with self._lock:
+            return {'in_flight': len(self._calls), 'calls': self.calls, 'shared': self.shared}
+
+
+# Global single flight instance
+single_flight = SingleFlight()
@@ -0,0 +1,202 @@
+import bisect
+import os
+import re
+import threading
+import time
+
+from plasmid_backends import backend
+
+
+#----------------------------
+# Typeahead Suggestions
+#----------------------------
+# Keys sort naturally - ids by lot then sublot, bag names by number - so "5317-" completes
+# to 5317-1, 5317-2, ... 5317-10 rather than 5317-1, 5317-10, 5317-11, ... 5317-2.
+
+_ID, _BAG = 0, 1
+_ID_PREFIX = re.compile(r"(\d+)(-(\d*))?$")
+_BAG_PREFIX = re.compile(r"C(\d*)$")
+_UNBOUNDED = float('inf')
+
+def _natural_key(key):
+    """Sort key of an id ("5317-2") or bag name ("C25") - its numbers as ints"""
+    if key.startswith('C'):
+        return (_BAG, int(key[1:]), 0)
+    lot, sublot = key.split('-')
+    return (_ID, int(lot), int(sublot))
+
+def _key_text(natural_key):
+    kind, number, sublot = natural_key
+    return f"C{number}" if kind == _BAG else f"{number}-{sublot}"
+
+def _number_ranges(digits, largest):
+    """Ranges of the numbers up to largest whose decimal form starts with digits, in increasing order
+
+    "12" -> 12, 120..129, 1200..1299, ... - each range is contiguous in natural order.
+    """
+    if not digits:
+        return [(0, largest)]
+    if digits.startswith('0'):
+        return [(0, 0)] if digits == '0' else []  # stored numbers have no leading zeros
+    ranges = []
+    low, span = int(digits), 1
+    while low <= largest:
+        ranges.append((low, low + span - 1))
+        low, span = low * 10, span * 10
+    return ranges
+
+
+class SuggestIndex:
+    """In-memory sorted index of lot-sublot ids ("5317-2") and bag names ("C25") for prefix completion
+
+    A prefix lookup is a binary search into the sorted keys plus a short scan, so it
+    costs microseconds per keystroke. The index loads lazily from the database, is kept
+    current by the repository write listeners, and reloads every refresh_seconds to pick
+    up writes made by other processes.
+    """
+
+    def __init__(self, refresh_seconds=300):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()  # one rebuild at a time
+        self._keys = []        # natural keys of the ids and bag names, sorted
+        self._locations = {}   # key -> set of bags (for an id) or None (for a bag name)
+        self._loaded_at = None
+        self._pending = None   # writes seen while a rebuild is running, replayed onto the new index
+
+    def suggest(self, prefix, limit=10):
+        """Up to limit completions of prefix, in natural order"""
+        prefix = prefix.strip().upper()
+        if not prefix:
+            return []
+
+        self._ensure_loaded()
+        suggestions = []
+        with self._lock:
+            for natural_key in self._matches(prefix):
+                if len(suggestions) >= limit:
+                    break
+                key = _key_text(natural_key)
+                bags = self._locations[key]
+                if bags is None:
+                    suggestions.append({'type': 'bag', 'bag': key})
+                else:
+                    suggestions.append({'type': 'plasmid', 'id': key, 'lot': natural_key[1], 'sublot': natural_key[2], 'bags': sorted(bags)})
+        return suggestions
+
+    def _matches(self, prefix):
+        """Natural keys whose text starts with prefix, in order - one bisect per number range"""
+        bag = _BAG_PREFIX.match(prefix)
+        if bag:
+            largest = self._largest((_BAG, 0, 0), (_BAG, _UNBOUNDED, 0))
+            for low, high in _number_ranges(bag.group(1), largest[1] if largest else -1):
+                yield from self._between((_BAG, low, 0), (_BAG, high, 0))
+            return
+
+        plasmid_id = _ID_PREFIX.match(prefix)
+        if not plasmid_id:
+            return
+        lot_digits, dash, sublot_digits = plasmid_id.groups()
+        if not dash:
+            largest = self._largest((_ID, 0, 0), (_ID, _UNBOUNDED, _UNBOUNDED))
+            for low, high in _number_ranges(lot_digits, largest[1] if largest else -1):
+                yield from self._between((_ID, low, 0), (_ID, high, _UNBOUNDED))
+        elif lot_digits == str(int(lot_digits)):
+            lot = int(lot_digits)
+            largest = self._largest((_ID, lot, 0), (_ID, lot, _UNBOUNDED))
+            for low, high in _number_ranges(sublot_digits, largest[2] if largest else -1):
+                yield from self._between((_ID, lot, low), (_ID, lot, high))
+
+    def _between(self, low, high):
+        position = bisect.bisect_left(self._keys, low)
+        while position < len(self._keys) and self._keys[position] <= high:
+            yield self._keys[position]
+            position += 1
+
+    def _largest(self, low, high):
+        """The largest key from low to high, None if there is none"""
+        position = bisect.bisect_right(self._keys, high)
+        if position and self._keys[position - 1] >= low:
+            return self._keys[position - 1]
+        return None
+
+    def on_write(self, kind, records):
+        """Repository write listener - apply a committed write to the index"""
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((kind, records))
+            if self._loaded_at is not None:  # otherwise the first load reads it from the database
+                self._apply(kind, records)
+
+    def _apply(self, kind, records):
+        for record in records:
+            plasmid_id = f"{record['lot']}-{record['sublot']}"
+            if kind == 'deleted':
+                self._remove(plasmid_id, record['bag'])
+            elif kind == 'modified' and record.get('previous_bag') and record['previous_bag'] != record['bag']:
+                self._remove(plasmid_id, record['previous_bag'])
+                self._add(plasmid_id, record['bag'])
+            elif kind == 'added':
+                self._add(plasmid_id, record['bag'])
+
+    def reload(self):
+        with self._reload_lock:
+            self._rebuild()
+
+    def _rebuild(self):
+        # Read (from the primary) and build outside the lock so lookups keep using the current
+        # index meanwhile. Writes that land during the read are replayed onto the new index -
+        # applying one the read already saw is harmless, so none can be lost to the race.
+        with self._lock:
+            self._pending = []
+        try:
+            locations = {}
+            for row in backend.list_plasmid_locations():
+                locations.setdefault(f"{row['lot']}-{row['sublot']}", set()).add(row['bag'])
+                locations.setdefault(row['bag'], None)
+            keys = sorted(_natural_key(key) for key in locations)
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+
+        with self._lock:
+            self._locations, self._keys = locations, keys
+            for kind, records in self._pending:
+                self._apply(kind, records)
+            self._pending = None
+            self._loaded_at = time.monotonic()
+
+    def _ensure_loaded(self):
+        if self._loaded_at is None:
+            with self._reload_lock:
+                if self._loaded_at is None:  # another request may have loaded it while this one waited
+                    self._rebuild()
+        elif time.monotonic() - self._loaded_at > self.refresh_seconds:
+            # A stale index is still usable - one request refreshes it, the rest don't wait
+            if self._reload_lock.acquire(blocking=False):
+                try:
+                    self._rebuild()
+                finally:
+                    self._reload_lock.release()
+
+    def _add(self, plasmid_id, bag):
+        for key in (plasmid_id, bag):
+            if key not in self._locations:
+                self._locations[key] = set() if key == plasmid_id else None
+                bisect.insort(self._keys, _natural_key(key))
+        self._locations[plasmid_id].add(bag)
+
+    def _remove(self, plasmid_id, bag):
+        bags = self._locations.get(plasmid_id)
+        if bags is None:
+            return
+        bags.discard(bag)
+        if not bags:
+            del self._locations[plasmid_id]
+            self._keys.pop(bisect.bisect_left(self._keys, _natural_key(plasmid_id)))
+        # Bag names stay until the next reload even if the bag was emptied
+
+
+# Global suggest index instance
+suggest_index = SuggestIndex(refresh_seconds=float(os.getenv('SUGGEST_REFRESH_SECONDS', '300')))
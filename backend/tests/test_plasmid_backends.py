@@ -0,0 +1,199 @@
+import pytest
+
+import plasmid_backends
+import plasmid_storage
+from plasmid_backends import SQLiteBackend
+from plasmid_storage import ConflictError
+from plasmid_records import Plasmid, PlasmidCollection
+from search_language import SearchQuery
+
+
+#----------------------------
+# SQLiteBackend against the repository's contract
+#----------------------------
+# The routes only see the backend interface, so the embedded backend has to hand back the
+# same shapes and raise the same errors as the Postgres repository functions.
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "plasmids.db"))
+    backend.add_plasmid_record([
+        Plasmid(5317, 1, 'C1', [10.0, 5.5], notes="stock"),
+        Plasmid(5317, 2, 'C1', [4.0]),
+        Plasmid(6000, 1, 'C2', [1.0]),
+    ])
+    return backend
+
+@pytest.fixture
+def writes(monkeypatch):
+    """Write listener notifications as (kind, records)"""
+    notified = []
+    monkeypatch.setattr(plasmid_storage, '_write_listeners', [lambda kind, records: notified.append((kind, records))])
+    return notified
+
+def ids(plasmids):
+    return [str(plasmid) for plasmid in plasmids]
+
+
+### ADD ###
+
+def test_add_returns_inserted_records(backend, writes):
+    result = backend.add_plasmid_record(Plasmid(7000, 1, 'C3', [2.0]))
+
+    assert result == {"inserted_count": 1, "plasmids": [{"lot": 7000, "sublot": 1, "bag": 'C3'}]}
+    assert writes == [('added', [{'lot': 7000, 'sublot': 1, 'bag': 'C3'}])]
+
+def test_add_duplicate_is_rejected_as_a_unit(backend):
+    with pytest.raises(ValueError, match="duplicate entry"):
+        backend.add_plasmid_record([Plasmid(7000, 1, 'C2', [1.0]), Plasmid(5317, 1, 'C1', [1.0])])
+
+    assert ids(backend.find_plasmids_by_bag('C2')) == ['6000-1']
+
+def test_add_rejects_skipped_bag_numbers(backend):
+    with pytest.raises(ValueError, match="Most recent bag number is: C2"):
+        backend.add_plasmid_record(Plasmid(7000, 1, 'C9', [1.0]))
+
+def test_import_skips_existing_records(backend):
+    inserted = backend.import_plasmid_records([Plasmid(5317, 1, 'C1', [1.0]), Plasmid(7000, 1, 'C2', [1.0])])
+
+    assert inserted == {(7000, 1, 'C2')}
+
+
+### FIND ###
+
+def test_find_by_ids_and_bag(backend):
+    found = backend.find_plasmids(PlasmidCollection.from_user_input("5317-2, 6000-1, 9999-1"))
+
+    assert ids(found) == ['5317-2', '6000-1']
+    assert ids(backend.find_plasmids_by_bag('c1')) == ['5317-1', '5317-2']
+
+def test_find_returns_full_records(backend):
+    plasmid = backend.find_plasmids(Plasmid.temp_plasmid(5317, 1)).plasmids[0]
+
+    assert (plasmid.bag, plasmid.notes, plasmid.samples.to_list()) == ('C1', 'stock', [10.0, 5.5])
+    assert plasmid.version is not None
+    assert all(sample.version is not None for sample in plasmid.samples)
+
+def test_search(backend):
+    query = SearchQuery.parse("5317, C2")
+
+    assert ids(backend.find_plasmids_by_search(query)) == ['5317-1', '5317-2', '6000-1']
+    assert ids(backend.find_plasmids_by_search(SearchQuery.parse("5317-2..5317-9"))) == ['5317-2']
+    assert backend.count_plasmids_by_search(query) == {'C1': 2, 'C2': 1}
+
+def test_search_fields(backend):
+    query = SearchQuery.parse("5317-1")
+
+    assert backend.find_plasmid_fields_by_search(query, ['lot', 'bag']) == [{'lot': 5317, 'bag': 'C1'}]
+    assert [len(record['samples']) for record in backend.find_plasmid_fields_by_search(query, ['samples'])] == [2]
+    with pytest.raises(ValueError, match="Unknown field"):
+        backend.find_plasmid_fields_by_search(query, ['colour'])
+
+def test_lazy_find_streams_every_record(backend):
+    assert ids(backend.find_plasmids_lazy(itersize=1)) == ['5317-1', '5317-2', '6000-1']
+
+def test_max_bag_number(backend):
+    assert backend.get_max_bag_number() == 2
+
+
+### CHECKOUT / CHECKIN ###
+
+def test_checkout_and_checkin(backend, writes):
+    plasmid = Plasmid.temp_plasmid(5317, 1, 'C1')
+
+    checked_out = backend.checkout_sample(plasmid, 1, 'ana')
+    assert set(checked_out) == {'lot', 'sublot', 'bag', 'sample_version', 'version'}
+    assert checked_out['version'] > checked_out['sample_version']
+
+    checked_in = backend.checkin_sample(plasmid, 1, expected_version=checked_out['sample_version'], volume=3.0)
+    sample = backend.find_plasmids(plasmid).plasmids[0].samples.samples[1]
+    assert (sample.is_checked_out, sample.volume, sample.version) == (False, 3.0, checked_in['sample_version'])
+    assert writes[-1] == ('modified', [{'lot': 5317, 'sublot': 1, 'bag': 'C1', 'sample_index': 1}])
+
+def test_checkout_conflicts(backend):
+    plasmid = Plasmid.temp_plasmid(5317, 1, 'C1')
+    backend.checkout_sample(plasmid, 0, 'ana')
+
+    with pytest.raises(ConflictError, match="already checked out by ana"):
+        backend.checkout_sample(plasmid, 0, 'ben')
+    with pytest.raises(ConflictError, match="is not checked out"):
+        backend.checkin_sample(plasmid, 1)
+    with pytest.raises(ConflictError, match="changed by someone else"):
+        backend.checkin_sample(plasmid, 0, expected_version=1)
+
+def test_checkout_missing_sample(backend):
+    with pytest.raises(ValueError, match="Sample 5 of plasmid 5317-1 not found in C1") as error:
+        backend.checkout_sample(Plasmid.temp_plasmid(5317, 1, 'C1'), 5, 'ana')
+    assert not isinstance(error.value, ConflictError)
+
+
+### MODIFY ###
+
+def test_modify_checks_version(backend):
+    current = backend.find_plasmids(Plasmid.temp_plasmid(5317, 2)).plasmids[0]
+    updated = Plasmid(5317, 2, 'C2', current.samples.to_dict(), notes="moved by hand")
+
+    result = backend.modify_plasmid_record(updated, current)
+    assert result == {'lot': 5317, 'sublot': 2, 'bag': 'C2', 'version': result['version']}
+    assert result['version'] > current.version
+
+    stale = Plasmid(5317, 2, 'C2', [1.0], version=current.version)
+    with pytest.raises(ConflictError, match="changed by someone else"):
+        backend.modify_plasmid_record(stale, stale)
+
+def test_modify_missing_record(backend):
+    with pytest.raises(ValueError, match="Plasmid 9999-1 not found"):
+        backend.modify_plasmid_record(Plasmid(9999, 1, 'C1', [1.0]))
+
+
+### MOVE ###
+
+def test_move_by_ids(backend, writes):
+    result = backend.move_plasmids('C3', PlasmidCollection.from_user_input("5317-1, 6000-1"))
+
+    assert result['moved_count'] == 2
+    assert result['unchanged'] == []
+    assert [{key: row[key] for key in ('lot', 'sublot', 'bag', 'previous_bag')} for row in result['plasmids']] == [
+        {'lot': 5317, 'sublot': 1, 'bag': 'C3', 'previous_bag': 'C1'},
+        {'lot': 6000, 'sublot': 1, 'bag': 'C3', 'previous_bag': 'C2'},
+    ]
+    assert writes == [('modified', [{key: row[key] for key in ('lot', 'sublot', 'bag', 'previous_bag')} for row in result['plasmids']])]
+    assert ids(backend.find_plasmids_by_bag('C3')) == ['5317-1', '6000-1']
+
+def test_move_whole_bag_and_unchanged(backend):
+    assert backend.move_plasmids('C2', source_bag='C1')['moved_count'] == 2
+    assert backend.move_plasmids('C2', PlasmidCollection.from_user_input("5317-1")) == {'moved_count': 0, 'plasmids': [], 'unchanged': ['5317-1']}
+
+def test_move_rejects_the_batch(backend):
+    backend.add_plasmid_record(Plasmid(6000, 1, 'C1', [1.0]))
+
+    with pytest.raises(ValueError, match="Nothing was moved - not found: 9999-1; in several bags, give the bag to move from: 6000-1"):
+        backend.move_plasmids('C3', PlasmidCollection.from_user_input("5317-1, 6000-1, 9999-1"))
+    with pytest.raises(ValueError, match="already in C2 - duplicate entry: 6000-1"):
+        backend.move_plasmids('C2', source_bag='C1')
+    assert ids(backend.find_plasmids_by_bag('C1')) == ['5317-1', '5317-2', '6000-1']
+
+def test_move_rolls_back_if_a_row_changed(backend, writes, monkeypatch):
+    plan_move = plasmid_backends.plan_move
+
+    def stale_plan(*args):
+        # Plan one move whose row has since gone elsewhere
+        moves, unchanged = plan_move(*args)
+        return moves + [{'lot': 6000, 'sublot': 1, 'bag': 'C3', 'previous_bag': 'C1'}], unchanged
+
+    monkeypatch.setattr(plasmid_backends, 'plan_move', stale_plan)
+    with pytest.raises(ConflictError, match="nothing was moved"):
+        backend.move_plasmids('C3', source_bag='C1')
+
+    assert ids(backend.find_plasmids_by_bag('C1')) == ['5317-1', '5317-2']
+    assert writes == []
+
+
+### DELETE ###
+
+def test_delete(backend, writes):
+    assert backend.delete_plasmid_record(Plasmid.temp_plasmid(6000, 1, 'C2')) == {'lot': 6000, 'sublot': 1}
+    assert writes == [('deleted', [{'lot': 6000, 'sublot': 1, 'bag': 'C2'}])]
+
+    with pytest.raises(ValueError, match="Plasmid 6000-1 not found in database"):
+        backend.delete_plasmid_record(Plasmid.temp_plasmid(6000, 1, 'C2'))
@@ -0,0 +1,33 @@
+import sqlite3
+
+import pytest
+
+from plasmid_storage import SQLITE
+from search_language import SearchQuery
+
+
+def test_parse_mixed_terms():
+    query = SearchQuery.parse("C25; 5317-1..40, 5400..5499 6000-2")
+
+    assert str(query) == "C25, 5400..5499, 6000-2, 5317-1..5317-40"
+    assert query == SearchQuery.parse("6000-2 5317-1..5317-40 C25 5400..5499")
+
+@pytest.mark.parametrize("text", ["", "   ", ",,,", " ; ", ", ;\t,"])
+def test_parse_rejects_empty_input(text):
+    with pytest.raises(ValueError, match="Search input cannot be empty"):
+        SearchQuery.parse(text)
+
+def test_parse_names_the_bad_term():
+    with pytest.raises(ValueError, match="Invalid format: 'C0x'"):
+        SearchQuery.parse("5317, C0x")
+
+def test_to_sql_finds_what_matches():
+    rows = [(5317, 1, 'C1'), (5317, 2, 'C3'), (5320, 40, 'C25'), (6000, 1, 'C12'), (6000, 12, 'C2'), (7000, 5, 'C30'), (8000, 1, 'C2')]
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE plasmids (lot INTEGER, sublot INTEGER, bag TEXT)")
+    conn.executemany("INSERT INTO plasmids VALUES (?, ?, ?)", rows)
+    query = SearchQuery.parse("C25, C10-C12, 5317-2, 5318..5330, 7000, 6000-1..6000-9")
+
+    where_clause, params = query.to_sql(SQLITE)
+    found = conn.execute(f"SELECT lot, sublot, bag FROM plasmids p WHERE {where_clause}", params).fetchall()
+    assert sorted(found) == [row for row in rows if query.matches(*row)] == [(5317, 2, 'C3'), (5320, 40, 'C25'), (6000, 1, 'C12'), (7000, 5, 'C30')]
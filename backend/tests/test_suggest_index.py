@@ -0,0 +1,45 @@
+import pytest
+
+import suggest_index
+from suggest_index import SuggestIndex
+
+
+@pytest.fixture
+def index(monkeypatch):
+    class FakeBackend:
+        def list_plasmid_locations(self):
+            locations = [(5317, sublot, 'C1') for sublot in (1, 2, 3, 10, 11, 20, 100)]
+            locations += [(531, 1, 'C2'), (53170, 1, 'C10'), (6000, 1, 'C2'), (6000, 1, 'C3')]
+            return [{'lot': lot, 'sublot': sublot, 'bag': bag} for lot, sublot, bag in locations]
+
+    monkeypatch.setattr(suggest_index, 'backend', FakeBackend())
+    return SuggestIndex()
+
+def completions(index, prefix, limit=10):
+    return [suggestion.get('id') or suggestion['bag'] for suggestion in index.suggest(prefix, limit)]
+
+
+def test_ids_complete_in_numeric_order(index):
+    assert completions(index, "5317-") == ['5317-1', '5317-2', '5317-3', '5317-10', '5317-11', '5317-20', '5317-100']
+    assert completions(index, "5317-1") == ['5317-1', '5317-10', '5317-11', '5317-100']
+    assert completions(index, "5317-", limit=3) == ['5317-1', '5317-2', '5317-3']
+
+def test_lot_prefix_completes_longer_lots_after_shorter(index):
+    assert completions(index, "531") == ['531-1'] + [f"5317-{sublot}" for sublot in (1, 2, 3, 10, 11, 20, 100)] + ['53170-1']
+
+def test_bags_complete_in_numeric_order(index):
+    assert completions(index, "c") == ['C1', 'C2', 'C3', 'C10']
+    assert completions(index, "C1") == ['C1', 'C10']
+
+def test_writes_keep_numeric_order(index):
+    index.suggest("5317-")
+    index.on_write('added', [{'lot': 5317, 'sublot': 4, 'bag': 'C1'}])
+    index.on_write('deleted', [{'lot': 5317, 'sublot': 10, 'bag': 'C1'}])
+
+    assert completions(index, "5317-") == ['5317-1', '5317-2', '5317-3', '5317-4', '5317-11', '5317-20', '5317-100']
+    assert index.suggest("6000-1")[0]['bags'] == ['C2', 'C3']
+
+def test_no_match(index):
+    assert completions(index, "9") == []
+    assert completions(index, "05317-") == []
+    assert completions(index, "5317-x") == []
@@ -0,0 +1,97 @@
+import base64
+from datetime import datetime
+from decimal import Decimal
+from email.utils import parsedate_to_datetime
+
+import pytest
+
+pytest.importorskip("msgpack")
+
+import app as app_module
+import plasmid_backends
+from plasmid_backends import SQLiteBackend
+from plasmid_records import Plasmid
+from wire_format import MSGPACK_MIMETYPE, TIMESTAMP_FIELDS, unpack
+
+
+#----------------------------
+# JSON / MessagePack parity
+#----------------------------
+# The same requests against identical inventories must decode to the same payloads in
+# either format, once JSON's date strings and volume strings are parsed.
+
+AUTH = {'Authorization': 'Basic ' + base64.b64encode(b'lab:lab2024').decode()}
+NOW = datetime(2026, 3, 14, 9, 26, 53, 589793)
+
+
+class FrozenDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return NOW
+
+
+def run_requests(tmp_path, monkeypatch, accept):
+    """Seed a fresh inventory and make the same requests with the given Accept - [(status, payload)]"""
+    monkeypatch.setattr(plasmid_backends, 'datetime', FrozenDatetime)
+    backend = SQLiteBackend(str(tmp_path / f"{accept.replace('/', '_')}.db"))
+    backend.add_plasmid_record([
+        Plasmid(5317, 1, 'C1', [10.0, 5.5], notes="stock"),
+        Plasmid(5317, 2, 'C1', [4.0]),
+        Plasmid(6000, 1, 'C2', [Decimal('1.25')]),
+    ])
+    monkeypatch.setattr(app_module, 'backend', backend)
+    app_module.search_cache.clear()
+
+    client = app_module.app.test_client()
+    headers = {**AUTH, 'Accept': accept}
+    record = backend.find_plasmids(Plasmid.temp_plasmid(5317, 1)).plasmids[0].to_dict()
+    checkout = {'record': record, 'sample_index': 1, 'checked_out_by': 'ana'}
+    responses = [
+        client.get('/api/bags', headers=headers),
+        client.post('/api/search', json={'user_input': '5317, C2'}, headers=headers),
+        client.post('/api/search', json={'user_input': 'C1', 'view': 'summary'}, headers=headers),
+        client.post('/api/checkout', json=checkout, headers=headers),
+        client.post('/api/checkout', json=checkout, headers=headers),  # 409, already checked out
+    ]
+    payloads = []
+    for response in responses:
+        assert response.mimetype == accept
+        payloads.append((response.status_code, response.get_json() if accept == 'application/json' else unpack(response.data)))
+        response.close()
+    return payloads
+
+def normalize(value, key=None):
+    """Dates as naive datetimes and volumes as floats, whichever format they arrived in"""
+    if isinstance(value, dict):
+        return {item_key: normalize(item, item_key) for item_key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize(item) for item in value]
+    if key in TIMESTAMP_FIELDS and value is not None:
+        if isinstance(value, str):
+            try:
+                value = datetime.fromisoformat(value)
+            except ValueError:
+                value = parsedate_to_datetime(value).replace(tzinfo=None)  # HTTP date, whole seconds
+        # HTTP dates carry no fractions of a second
+        return value.replace(microsecond=0) if key == 'date_added' else value
+    if key == 'volume':
+        return float(value)
+    return value
+
+
+def test_msgpack_matches_json(tmp_path, monkeypatch):
+    json_responses = run_requests(tmp_path, monkeypatch, 'application/json')
+    msgpack_responses = run_requests(tmp_path, monkeypatch, MSGPACK_MIMETYPE)
+
+    assert [status for status, _ in json_responses] == [200, 200, 200, 200, 409]
+    assert [status for status, _ in msgpack_responses] == [status for status, _ in json_responses]
+    assert normalize(msgpack_responses) == normalize(json_responses)
+
+def test_msgpack_sends_native_dates_and_volumes(tmp_path, monkeypatch):
+    (_, bags), (_, search), *_ = run_requests(tmp_path, monkeypatch, MSGPACK_MIMETYPE)
+
+    record = search['results'][0]
+    assert record['date_added'] == NOW
+    assert record['samples'][0]['date_created'] == NOW
+    assert [sample['volume'] for sample in record['samples']] == ['10.0', 5.5]
+    assert bags['data']['C2'][0]['samples'][0]['volume'] == 1.25
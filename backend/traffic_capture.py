@@ -0,0 +1,88 @@
+import hashlib
+import json
+import os
+import secrets
+import threading
+import time
+
+
+#----------------------------
+# Traffic Capture
+#----------------------------
+# With CAPTURE_TRAFFIC_PATH set, every API request is appended to that file as one JSON
+# line - method, path and query, body, status and timing - for replay_traffic.py to play
+# back against a test stack. Credentials are never written, and people's names and free
+# text are replaced by stable pseudonyms, so a capture can be shared.
+
+# Body and query fields holding names or free text
+ANONYMIZED_FIELDS = frozenset({'checked_out_by', 'actor', 'user', 'notes'})
+# Not worth capturing or replaying
+SKIPPED_ENDPOINTS = frozenset({'stream_events', 'static'})
+
+
+def anonymize(value, salt):
+    """Stable pseudonym - the same name always maps to the same placeholder"""
+    if value is None or value == '':
+        return value
+    digest = hashlib.sha256(f"{salt}{value}".encode()).hexdigest()[:10]
+    return f"anon-{digest}"
+
+def anonymize_body(body, salt):
+    if isinstance(body, dict):
+        return {key: anonymize(value, salt) if key in ANONYMIZED_FIELDS and isinstance(value, str) else anonymize_body(value, salt)
+                for key, value in body.items()}
+    if isinstance(body, list):
+        return [anonymize_body(item, salt) for item in body]
+    return body
+
+
+class TrafficRecorder:
+    """Appends anonymized request records to a JSONL file"""
+
+    def __init__(self, path, salt):
+        self.path = path
+        self.salt = salt
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', encoding='utf-8')
+        self._started = time.time()
+
+    def record(self, request, status_code, duration):
+        if request.endpoint in SKIPPED_ENDPOINTS:
+            return
+
+        entry = {
+            'at': round(time.time(), 3),
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint,
+            'query': {key: anonymize(value, self.salt) if key in ANONYMIZED_FIELDS else value
+                      for key, value in request.args.items()},
+            'status': status_code,
+            'duration_ms': round(duration * 1000, 2),
+        }
+        if request.mimetype.startswith('multipart/'):
+            # Uploaded files are not captured - replays skip these requests
+            entry['body_omitted'] = True
+        elif request.content_length:
+            body = request.get_json(silent=True)
+            if body is not None:
+                entry['body'] = anonymize_body(body, self.salt)
+
+        line = json.dumps(entry, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+
+def recorder_from_env():
+    """TrafficRecorder for CAPTURE_TRAFFIC_PATH, or None when capture is off"""
+    path = os.getenv('CAPTURE_TRAFFIC_PATH')
+    if not path:
+        return None
+    print(f"WARNING: Capturing API traffic to {path}")
+    salt = os.getenv('CAPTURE_TRAFFIC_SALT')
+    if not salt:
+        # Unsalted hashes of a small lab roster could be reversed by hashing every name
+        salt = secrets.token_hex(16)
+        print("WARNING: CAPTURE_TRAFFIC_SALT is not set - using a random salt, so pseudonyms only match within this process")
+    return TrafficRecorder(path, salt=salt)
@@ -0,0 +1,103 @@
+import decimal
+import uuid
+from datetime import date, datetime
+
+from flask import Request, request, has_request_context
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import msgpack
+except ImportError:  # optional - without it every client gets JSON
+    msgpack = None
+
+
+#----------------------------
+# MessagePack Wire Format
+#----------------------------
+# Clients sending "Accept: application/msgpack" get every jsonify() response as MessagePack
+# instead of JSON, and may send request bodies as MessagePack with that Content-Type.
+# The payloads are the same as the JSON ones, except that timestamps travel as MessagePack
+# Timestamp values (server local time) rather than ISO or HTTP date strings.
+
+MSGPACK_MIMETYPE = 'application/msgpack'
+JSON_MIMETYPE = 'application/json'
+
+# Payload fields that hold ISO timestamp strings (see SampleCollection.to_dict)
+TIMESTAMP_FIELDS = frozenset({'date_added', 'date_created', 'date_modified', 'checked_out_at', 'checked_in_at',
+                              'occurred_at', 'snapshot_taken_at'})
+
+
+def response_mimetype():
+    """Mimetype the current request's response should use, from its Accept header"""
+    if msgpack is None or not has_request_context():
+        return JSON_MIMETYPE
+    # JSON wins ties, so "*/*" and a missing Accept header keep getting JSON
+    return request.accept_mimetypes.best_match([JSON_MIMETYPE, MSGPACK_MIMETYPE], default=JSON_MIMETYPE)
+
+def pack(payload):
+    return msgpack.packb(_compact_timestamps(payload), default=_encode_default, datetime=False)
+
+def unpack(data):
+    return msgpack.unpackb(data, timestamp=3, object_hook=_local_datetimes, strict_map_key=False)
+
+def _compact_timestamps(value):
+    if isinstance(value, dict):
+        return {key: _to_timestamp(item) if key in TIMESTAMP_FIELDS else _compact_timestamps(item)
+                for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_compact_timestamps(item) for item in value]
+    return value
+
+def _to_timestamp(value):
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    if isinstance(value, datetime):
+        # Naive database timestamps are server local time, which is what timestamp() assumes
+        return msgpack.Timestamp.from_datetime(value)
+    return value
+
+def _encode_default(value):
+    # Same conversions as the JSON provider, except dates become Timestamps
+    if isinstance(value, datetime):
+        return msgpack.Timestamp.from_datetime(value)
+    if isinstance(value, date):
+        return msgpack.Timestamp.from_datetime(datetime(value.year, value.month, value.day))
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not MessagePack serializable")
+
+def _local_datetimes(obj):
+    # Decoded Timestamps are UTC-aware - the rest of the app works in naive local time
+    return {key: value.astimezone().replace(tzinfo=None) if isinstance(value, datetime) else value
+            for key, value in obj.items()}
+
+
+class NegotiatedJSONProvider(DefaultJSONProvider):
+    """jsonify() that answers in MessagePack when the client asks for it"""
+
+    def response(self, *args, **kwargs):
+        if response_mimetype() == MSGPACK_MIMETYPE:
+            response = self._app.response_class(pack(self._prepare_response_obj(args, kwargs)), mimetype=MSGPACK_MIMETYPE)
+        else:
+            response = super().response(*args, **kwargs)
+        response.vary.add('Accept')
+        return response
+
+
+class NegotiatedRequest(Request):
+    """Request whose get_json() also accepts a MessagePack body"""
+
+    def get_json(self, force=False, silent=False, cache=True):
+        if msgpack is None or self.mimetype != MSGPACK_MIMETYPE:
+            return super().get_json(force=force, silent=silent, cache=cache)
+        try:
+            return unpack(self.get_data(cache=cache))
+        except ValueError as e:
+            if silent:
+                return None
+            return self.on_json_loading_failed(e)
@@ -162,7 +162,9 @@ const BagCard = ({bagName, recordsPassed, availableBags = [], onBagRecordsChange
         setSaveStatus(null);
 
         try {
-            await editPlasmid(editOperation.modified, editOperation.original);
+            const result = await editPlasmid(editOperation.modified, editOperation.original);
+            // Saved copy carries the new versions, so the next edit isn't flagged as a conflict
+            const savedRecord = new PlasmidRecord({...editOperation.modified, ...result.record});
 
             // Update local state only after successful database save
             let updatedPlasmids;
@@ -170,12 +172,12 @@ const BagCard = ({bagName, recordsPassed, availableBags = [], onBagRecordsChange
                 // Remove the record from current bag since it's moved to a different bag
                 updatedPlasmids = recordsPassed.filter(p => p.getFullId() !== editOperation.modified.getFullId());
                 // Call the move callback to handle moving record between bags
-                onBagRecordMoved(updatedPlasmids, editOperation.modified);
+                onBagRecordMoved(updatedPlasmids, savedRecord);
             } else {
                 // Update the record in place for regular edits
                 updatedPlasmids = recordsPassed.map(p => {
                     if (p.getFullId() === editOperation.modified.getFullId()) {
-                        return editOperation.modified;
+                        return savedRecord;
                     }
                     return p;
                 });
@@ -286,8 +288,8 @@ const BagCard = ({bagName, recordsPassed, availableBags = [], onBagRecordsChange
         setIsDragOver(false);
     }
 
-    const handleCheckIO = (plasmid, newSamples) => {
-        const updatedPlasmid = new PlasmidRecord({...plasmid, samples: newSamples});
+    const handleCheckIO = (plasmid, newSamples, version) => {
+        const updatedPlasmid = new PlasmidRecord({...plasmid, samples: newSamples, version: version ?? plasmid.version});
         const updatedPlasmids = recordsPassed.map(rec => rec.getFullId() === plasmid.getFullId() ? updatedPlasmid : rec);
         onBagRecordsChanged(updatedPlasmids);
     }
@@ -150,7 +150,7 @@ const BagCardInlineRow = ({
                         movedRecord={movedRecord}
                         availableBags={availableBags}
                         record={plasmid}
-                        onCheckIO={(newSamples) => onCheckIO(plasmid, newSamples)}
+                        onCheckIO={(newSamples, version) => onCheckIO(plasmid, newSamples, version)}
                         onFieldChange={(field, value) => {
                             if (field === 'save') onSaveEdit();
                             else if (field === 'cancel') onCancelEdit();
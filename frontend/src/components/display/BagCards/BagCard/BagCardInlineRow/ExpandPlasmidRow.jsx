@@ -122,16 +122,17 @@ const ExpandPlasmidRow = ({
         try {
             if (sample.is_checked_out) {
                 // Check in
-                await checkIn(record, index);
+                const result = await checkIn(record, index);
 
-                // Update local state
+                // Update local state (new versions keep later edits from being flagged as conflicts)
                 const newSamples = [...samples];
                 newSamples[index] = {
                     ...sample,
                     is_checked_out: false,
-                    checked_in_at: new Date().toISOString()
+                    checked_in_at: new Date().toISOString(),
+                    version: result.sample_version
                 };
-                onCheckIO(newSamples);
+                onCheckIO(newSamples, result.version);
             } else {
                 // Check out - prompt for username
                 const userName = localStorage.getItem('labUserName') || prompt('Enter your name:');
@@ -140,17 +141,18 @@ const ExpandPlasmidRow = ({
                 // Save name for future use
                 localStorage.setItem('labUserName', userName);
 
-                await checkOut(record, index, userName);
+                const result = await checkOut(record, index, userName);
 
-                // Update local state
+                // Update local state (new versions keep later edits from being flagged as conflicts)
                 const newSamples = [...samples];
                 newSamples[index] = {
                     ...sample,
                     is_checked_out: true,
                     checked_out_by: userName,
-                    checked_out_at: new Date().toISOString()
+                    checked_out_at: new Date().toISOString(),
+                    version: result.sample_version
                 };
-                onCheckIO(newSamples);
+                onCheckIO(newSamples, result.version);
             }
         } catch (error) {
             console.error('Checkout/checkin failed:', error);
@@ -80,11 +80,12 @@ const SearchPlasmidRecords = ({searchTerm, loading, setLoading}) => {
         });
     }
 
-    const handleCheckIO = (bagName, plasmidIndex, plasmid, newSamples) => {
+    const handleCheckIO = (bagName, plasmidIndex, plasmid, newSamples, version) => {
         // Create the updated plasmid
         const updatedPlasmid = new PlasmidRecord({
             ...plasmid,
-            samples: newSamples
+            samples: newSamples,
+            version: version ?? plasmid.version
         });
 
         // Update only the specific plasmid in results
@@ -168,7 +169,7 @@ const SearchPlasmidRecords = ({searchTerm, loading, setLoading}) => {
                                                     plasmid={plasmid}
                                                     isExpanded={expandedRecords.some(record => record.equals(plasmid))}
                                                     onViewDetails={() => handleViewDetails(plasmid)}
-                                                    onCheckIO={(plasmid, newSamples) => handleCheckIO(bagName, index, plasmid, newSamples)}
+                                                    onCheckIO={(plasmid, newSamples, version) => handleCheckIO(bagName, index, plasmid, newSamples, version)}
                                                 />
                                             ))}
                                         </div>
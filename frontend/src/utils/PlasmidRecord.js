@@ -10,13 +10,15 @@
 
 
 export class PlasmidRecord {
-    constructor({lot='', sublot='', bag='', samples=null, notes = '', date_added = ''}) {
+    constructor({lot='', sublot='', bag='', samples=null, notes = '', date_added = '', version = null}) {
         this.lot = lot;
         this.sublot = sublot;
         this.bag = bag;
         this.samples = this.normalizeSamples(samples); 
         this.notes = notes;
         this.date_added = date_added;
+        // Change version from the backend - sent back so concurrent edits are detected (409)
+        this.version = version;
         // Always calculate total_volume from samples, on each initialization
         this.total_volume = this.calculateTotalVolume();
     }
@@ -39,7 +41,8 @@ export class PlasmidRecord {
                         is_checked_out: sample.is_checked_out ?? false,
                         checked_out_by: sample.checked_out_by || "",
                         checked_out_at: sample.checked_out_at || "",
-                        checked_in_at: sample.checked_in_at || ""
+                        checked_in_at: sample.checked_in_at || "",
+                        version: sample.version ?? null
                     };
                 } else {
                     // Subcase 1b: Primitive volume (raw numbers/strings)
@@ -189,7 +192,8 @@ export class PlasmidRecord {
             bag: this.bag,
             samples: this.samples,
             notes: this.notes,
-            date_added: this.date_added
+            date_added: this.date_added,
+            version: this.version
         };
     }
 
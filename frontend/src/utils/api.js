@@ -5,6 +5,23 @@
 
 const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://localhost:5000';
 
+// Time of this client's last write, from the X-Last-Write response header. Sent back on every
+// request so the backend keeps serving our reads from the primary until replicas have our write.
+let lastWrite = null;
+
+/**
+ * fetch() that carries the X-Last-Write read-after-write marker
+ * @param {string} url - Request URL
+ * @param {Object} [options] - fetch options
+ * @returns {Promise<Response>} - The fetch response
+ */
+const apiFetch = async (url, options = {}) => {
+    const headers = lastWrite ? { ...options.headers, 'X-Last-Write': lastWrite } : options.headers;
+    const response = await fetch(url, { ...options, headers });
+    lastWrite = response.headers.get('X-Last-Write') || lastWrite;
+    return response;
+};
+
 /**
  * Wrapper for fetch calls that provides better error messages
  * @param {Function} fetchFn - Async function containing the fetch logic
@@ -32,7 +49,7 @@ export const searchPlasmids = async (user_input = '') => {
     return handleApiCall(async () => {
         const trimmedInput = user_input?.trim()
 
-        const response = await fetch(`${API_BASE_URL}/api/search`, {
+        const response = await apiFetch(`${API_BASE_URL}/api/search`, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({ user_input: trimmedInput })
@@ -56,7 +73,7 @@ export const searchPlasmids = async (user_input = '') => {
  */
 export const fetchAllBags = async () => {
     return handleApiCall(async () => {
-        const response = await fetch(`${API_BASE_URL}/api/bags`);
+        const response = await apiFetch(`${API_BASE_URL}/api/bags`);
 
         if (!response.ok) {
             const errorData = await response.json();
@@ -75,6 +92,37 @@ export const fetchAllBags = async () => {
     });
 };
 
+/**
+ * Fetch the bag directory - names and counts only, no records
+ * @returns {Promise<Object[]>} - [{bag, plasmid_count, sample_count, total_volume, checked_out_count, fill_level}]
+ */
+export const fetchBagIndex = async () => {
+    return handleApiCall(async () => {
+        const response = await apiFetch(`${API_BASE_URL}/api/bags/index`);
+
+        const result = await response.json();
+        if (!response.ok) throw new Error(`Failed to fetch bag index. Backend error: ${result.error || 'Unknown server error'}`);
+
+        return result.data;
+    });
+};
+
+/**
+ * Fetch the records of a single bag
+ * @param {string} bagName - e.g. "C25"
+ * @returns {Promise<Object>} - Object with the bagName key and its record array, like fetchAllBags
+ */
+export const fetchBag = async (bagName) => {
+    return handleApiCall(async () => {
+        const response = await apiFetch(`${API_BASE_URL}/api/bags/${encodeURIComponent(bagName)}`);
+
+        const result = await response.json();
+        if (!response.ok) throw new Error(`Failed to fetch bag ${bagName}. Backend error: ${result.error || 'Unknown server error'}`);
+
+        return result.data;
+    });
+};
+
 /**
  * Save NEW record records to the database
  * @param {PlasmidRecord|PlasmidRecord[]} records - Single record or array of records to save
@@ -90,7 +138,7 @@ export const saveToDb = async (records) => {
             ? recordsArray[0].toAPIPayload()
             : recordsArray.map(record => record.toAPIPayload());
 
-        const response = await fetch(`${API_BASE_URL}/api/add`, {
+        const response = await apiFetch(`${API_BASE_URL}/api/add`, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify(payload)
@@ -115,7 +163,7 @@ export const editPlasmid = async (updatedRecord, prevRecord) => {
 
         console.log("Sending to API:", payload);
 
-        const response = await fetch(`${API_BASE_URL}/api/modify`, {
+        const response = await apiFetch(`${API_BASE_URL}/api/modify`, {
             method: 'PUT',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify(payload)
@@ -139,7 +187,7 @@ export const deletePlasmid = async (record) => {
         const payload = record.toAPIPayload();
         console.log("Sending to API:", payload);
 
-        const response = await fetch(`${API_BASE_URL}/api/delete`, {
+        const response = await apiFetch(`${API_BASE_URL}/api/delete`, {
             method: 'DELETE',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify(payload)
@@ -165,7 +213,7 @@ export const checkOut = async (record, sampleIndex, user) => {
         const payload = {"record": record.toAPIPayload(), "sample_index": sampleIndex, "checked_out_by": user};
         console.log("Sending to API:", payload);
 
-        const response = await fetch(`${API_BASE_URL}/api/checkout`, {
+        const response = await apiFetch(`${API_BASE_URL}/api/checkout`, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify(payload)
@@ -190,7 +238,7 @@ export const checkIn = async (record, sampleIndex) => {
         const payload = {"record": record.toAPIPayload(), "sample_index": sampleIndex};
         console.log("Sending to API:", payload);
 
-        const response = await fetch(`${API_BASE_URL}/api/checkin`, {
+        const response = await apiFetch(`${API_BASE_URL}/api/checkin`, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify(payload)
@@ -204,9 +252,27 @@ export const checkIn = async (record, sampleIndex) => {
     });
 };
 
+/**
+ * Typeahead completions for what has been typed so far
+ * @param {string} prefix - Start of a plasmid id or bag name (e.g. "53", "5317-", "C2")
+ * @param {number} [limit] - Maximum number of suggestions
+ * @returns {Promise<Object[]>} - [{type: 'plasmid', id, lot, sublot, bags}] or [{type: 'bag', bag}]
+ */
+export const fetchSuggestions = async (prefix, limit = 10) => {
+    return handleApiCall(async () => {
+        const params = new URLSearchParams({ prefix, limit });
+        const response = await apiFetch(`${API_BASE_URL}/api/suggest?${params}`);
+
+        const result = await response.json();
+        if (!response.ok) throw new Error(`Backend: ${result.error || "Failed to fetch suggestions"}`);
+
+        return result.data;
+    });
+};
+
 export const getCheckedOutRecords = async () => {
     return handleApiCall(async () => {
-        const response = await fetch(`${API_BASE_URL}/api/getCheckedOut`);
+        const response = await apiFetch(`${API_BASE_URL}/api/getCheckedOut`);
 
         const result = await response.json();
         if (!response.ok) throw new Error(`Backend: ${result.error || "Failed to fetch checked out samples"}`);
@@ -220,4 +286,19 @@ export const getCheckedOutRecords = async () => {
         }
         return allCheckedOutRecords;
     })
-}
\ No newline at end of file
+}
+
+/**
+ * Subscribe to live inventory changes made by any user (Server-Sent Events)
+ * @param {Function} onChange - Called with {kind, version, records: [{id, lot, sublot, bag}]} for every change
+ * @returns {Function} - Call to close the subscription
+ */
+export const subscribeToChanges = (onChange) => {
+    const source = new EventSource(`${API_BASE_URL}/api/events`, { withCredentials: true });
+    const handleEvent = (event) => onChange(JSON.parse(event.data));
+
+    ['added', 'modified', 'deleted'].forEach(kind => source.addEventListener(kind, handleEvent));
+    source.onerror = () => console.warn("Change feed disconnected - browser will retry");
+
+    return () => source.close();
+};